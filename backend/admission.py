@@ -0,0 +1,190 @@
+"""
+Admission control for Ferienhaus Kalender
+Bounded concurrency per endpoint class with short wait queues and load shedding
+"""
+import asyncio
+import os
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+from fastapi import HTTPException
+
+
+# Configuration
+ADMISSION_CAPACITY = int(os.getenv("ADMISSION_CAPACITY", "10"))  # concurrent DB-bound requests
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "1.0"))  # seconds in queue
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))  # seconds
+
+
+@dataclass
+class EndpointClass:
+    """Limits and counters for one class of endpoints"""
+    name: str
+    limit: int       # max concurrent requests of this class
+    max_queue: int   # max requests of this class waiting for a slot
+    priority: int    # lower is served first when a slot frees up
+    active: int = 0
+    admitted: int = 0
+    shed: int = 0
+    waiters: deque = field(default_factory=deque)
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of queued"""
+
+
+class AdmissionController:
+    """
+    Shares a fixed number of slots between endpoint classes.
+    A request is admitted immediately if its class and the controller have free
+    slots, waits in a short per-class queue otherwise, and is shed when the queue
+    is full or the wait exceeds max_wait. Freed slots go to the waiting class
+    with the highest priority, so writes are served before bulk reads.
+    """
+
+    def __init__(self, capacity: int, classes: list[EndpointClass], max_wait: float):
+        self.capacity = capacity
+        self.max_wait = max_wait
+        self.classes = {endpoint_class.name: endpoint_class for endpoint_class in classes}
+        self.active = 0
+
+    def _can_admit(self, endpoint_class: EndpointClass) -> bool:
+        return self.active < self.capacity and endpoint_class.active < endpoint_class.limit
+
+    def _grant(self, endpoint_class: EndpointClass) -> None:
+        self.active += 1
+        endpoint_class.active += 1
+        endpoint_class.admitted += 1
+
+    def _wake(self) -> None:
+        """Hand free slots to waiters, highest priority class first"""
+        for endpoint_class in sorted(self.classes.values(), key=lambda c: c.priority):
+            while endpoint_class.waiters and self._can_admit(endpoint_class):
+                waiter = endpoint_class.waiters.popleft()
+                if waiter.done():
+                    continue
+                self._grant(endpoint_class)
+                waiter.set_result(None)
+
+    async def acquire(self, name: str) -> None:
+        """Wait for a slot of the given class or raise Overloaded"""
+        endpoint_class = self.classes[name]
+
+        if not endpoint_class.waiters and self._can_admit(endpoint_class):
+            self._grant(endpoint_class)
+            return
+
+        if len(endpoint_class.waiters) >= endpoint_class.max_queue:
+            endpoint_class.shed += 1
+            raise Overloaded(name)
+
+        waiter = asyncio.get_running_loop().create_future()
+        endpoint_class.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return  # granted just as the timeout fired
+            self._abandon(endpoint_class, waiter)
+            endpoint_class.shed += 1
+            raise Overloaded(name)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(name)
+            else:
+                self._abandon(endpoint_class, waiter)
+            raise
+
+    def _abandon(self, endpoint_class: EndpointClass, waiter: asyncio.Future) -> None:
+        waiter.cancel()
+        try:
+            endpoint_class.waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self, name: str) -> None:
+        """Give a slot back"""
+        endpoint_class = self.classes[name]
+        endpoint_class.active -= 1
+        self.active -= 1
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, name: str) -> AsyncIterator[None]:
+        """Hold a slot of the given class; overload becomes HTTP 503"""
+        try:
+            await self.acquire(name)
+        except Overloaded:
+            raise HTTPException(
+                status_code=503,
+                detail="Der Server ist gerade ausgelastet, bitte gleich noch einmal versuchen",
+                headers={"Retry-After": str(ADMISSION_RETRY_AFTER)}
+            )
+        try:
+            yield
+        finally:
+            self.release(name)
+
+    def stats(self) -> dict:
+        """Current queue depths, active requests and shed counts per class"""
+        return {
+            "capacity": self.capacity,
+            "active": self.active,
+            "classes": {
+                name: {
+                    "limit": endpoint_class.limit,
+                    "active": endpoint_class.active,
+                    "waiting": len(endpoint_class.waiters),
+                    "max_queue": endpoint_class.max_queue,
+                    "admitted": endpoint_class.admitted,
+                    "shed": endpoint_class.shed,
+                }
+                for name, endpoint_class in self.classes.items()
+            },
+        }
+
+
+def build_controller() -> AdmissionController:
+    """Create the controller from environment configuration"""
+    return AdmissionController(
+        capacity=ADMISSION_CAPACITY,
+        max_wait=ADMISSION_MAX_WAIT,
+        classes=[
+            EndpointClass(
+                name="write",
+                limit=int(os.getenv("ADMISSION_WRITE_LIMIT", "4")),
+                max_queue=int(os.getenv("ADMISSION_WRITE_QUEUE", "32")),
+                priority=0
+            ),
+            EndpointClass(
+                name="login",
+                limit=int(os.getenv("ADMISSION_LOGIN_LIMIT", "2")),
+                max_queue=int(os.getenv("ADMISSION_LOGIN_QUEUE", "8")),
+                priority=1
+            ),
+            EndpointClass(
+                name="read",
+                limit=int(os.getenv("ADMISSION_READ_LIMIT", "8")),
+                max_queue=int(os.getenv("ADMISSION_READ_QUEUE", "16")),
+                priority=2
+            ),
+        ]
+    )
+
+
+# Shared controller instance
+admission = build_controller()
+
+
+def admit(name: str):
+    """
+    FastAPI dependency factory holding an admission slot for the request.
+    Usage: _: None = Depends(admit("write"))
+    """
+    async def dependency() -> AsyncIterator[None]:
+        async with admission.slot(name):
+            yield
+
+    return dependency
@@ -0,0 +1,28 @@
+"""Add password hash to parties
+
+Revision ID: 4e8b2d6f9a13
+Revises: c9f1a3e5d7b2
+Create Date: 2026-10-19 21:14:37.502918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e8b2d6f9a13'
+down_revision: Union[str, Sequence[str], None] = 'c9f1a3e5d7b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('parties', sa.Column('password_hash', sa.String(length=255), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('parties', 'password_hash')
@@ -0,0 +1,69 @@
+"""Add booking change sequence and tombstones
+
+Revision ID: 740c0765a319
+Revises: 58577cbdf4a2
+Create Date: 2026-10-19 09:12:04.118230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '740c0765a319'
+down_revision: Union[str, Sequence[str], None] = '58577cbdf4a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def rebuild_bookings():
+    """
+    Batch mode for bookings. On SQLite the table is always rebuilt with
+    AUTOINCREMENT as in database.Booking: ids of deleted bookings are never
+    reused, because syncing clients and tombstones track bookings by id.
+    """
+    if op.get_bind().dialect.name != 'sqlite':
+        return op.batch_alter_table('bookings')
+    return op.batch_alter_table('bookings', recreate='always', table_kwargs={'sqlite_autoincrement': True})
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with rebuild_bookings() as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False))
+        batch_op.add_column(sa.Column('seq', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index('ix_bookings_seq', ['seq'], unique=False)
+
+    op.create_table(
+        'booking_tombstones',
+        sa.Column('booking_id', sa.Integer(), nullable=False),
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('booking_id')
+    )
+    op.create_index('ix_booking_tombstones_seq', 'booking_tombstones', ['seq'], unique=False)
+
+    op.create_table(
+        'sync_state',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    # Existing bookings get their id as initial sequence number
+    op.execute("UPDATE bookings SET seq = id")
+    op.execute("INSERT INTO sync_state (id, seq) SELECT 1, COALESCE(MAX(id), 0) FROM bookings")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sync_state')
+    op.drop_index('ix_booking_tombstones_seq', table_name='booking_tombstones')
+    op.drop_table('booking_tombstones')
+
+    with rebuild_bookings() as batch_op:
+        batch_op.drop_index('ix_bookings_seq')
+        batch_op.drop_column('seq')
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,35 @@
+"""Widen audit_log.action for series events
+
+Revision ID: 7c1f5e3a8d24
+Revises: 4e8b2d6f9a13
+Create Date: 2026-10-19 21:42:05.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1f5e3a8d24'
+down_revision: Union[str, Sequence[str], None] = '4e8b2d6f9a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('audit_log') as batch_op:
+        batch_op.alter_column(
+            'action', existing_type=sa.String(length=10), type_=sa.String(length=20), existing_nullable=False
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM audit_log WHERE action LIKE 'series_%'")
+    with op.batch_alter_table('audit_log') as batch_op:
+        batch_op.alter_column(
+            'action', existing_type=sa.String(length=20), type_=sa.String(length=10), existing_nullable=False
+        )
@@ -0,0 +1,41 @@
+"""Add composite booking indexes for overlap and per-party queries
+
+Revision ID: 9a4f3c2e8b17
+Revises: 5b2e9c7d41a8
+Create Date: 2026-10-19 11:40:22.604113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4f3c2e8b17'
+down_revision: Union[str, Sequence[str], None] = '5b2e9c7d41a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_bookings_end_start', 'bookings', ['end_date', 'start_date'],
+        postgresql_include=['id']
+    )
+    op.create_index('ix_bookings_party_start', 'bookings', ['party_id', 'start_date'])
+    # end_date and party_id are prefixes of the composite indexes above;
+    # start_date would be picked for overlap checks and scan the whole history
+    op.drop_index('ix_bookings_end_date', table_name='bookings')
+    op.drop_index('ix_bookings_party_id', table_name='bookings')
+    op.drop_index('ix_bookings_start_date', table_name='bookings')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_bookings_start_date', 'bookings', ['start_date'])
+    op.create_index('ix_bookings_party_id', 'bookings', ['party_id'])
+    op.create_index('ix_bookings_end_date', 'bookings', ['end_date'])
+    op.drop_index('ix_bookings_party_start', table_name='bookings')
+    op.drop_index('ix_bookings_end_start', table_name='bookings')
@@ -0,0 +1,67 @@
+"""Add full-text search over booking notes
+
+Revision ID: a8d4e6f1c2b7
+Revises: f2c6d8e0b4a9
+Create Date: 2026-10-19 17:31:05.142876
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d4e6f1c2b7'
+down_revision: Union[str, Sequence[str], None] = 'f2c6d8e0b4a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "CREATE INDEX ix_bookings_note_search ON bookings "
+            "USING gin (to_tsvector('german', coalesce(note, '')))"
+        )
+        return
+
+    op.execute("CREATE VIRTUAL TABLE booking_search USING fts5(note, tokenize = 'unicode61 remove_diacritics 2')")
+    op.execute(
+        """
+        CREATE TRIGGER booking_search_insert AFTER INSERT ON bookings WHEN new.note IS NOT NULL BEGIN
+            INSERT INTO booking_search (rowid, note) VALUES (new.id, new.note);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER booking_search_update AFTER UPDATE OF note ON bookings BEGIN
+            DELETE FROM booking_search WHERE rowid = old.id;
+            INSERT INTO booking_search (rowid, note) SELECT new.id, new.note WHERE new.note IS NOT NULL;
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER booking_search_delete AFTER DELETE ON bookings
+        WHEN NOT EXISTS (SELECT 1 FROM bookings_archive WHERE id = old.id) BEGIN
+            DELETE FROM booking_search WHERE rowid = old.id;
+        END
+        """
+    )
+    op.execute(
+        "INSERT INTO booking_search (rowid, note) SELECT id, note FROM bookings WHERE note IS NOT NULL "
+        "UNION ALL SELECT id, note FROM bookings_archive WHERE note IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX ix_bookings_note_search")
+        return
+
+    for trigger in ('booking_search_insert', 'booking_search_update', 'booking_search_delete'):
+        op.execute(f"DROP TRIGGER {trigger}")
+    op.execute("DROP TABLE booking_search")
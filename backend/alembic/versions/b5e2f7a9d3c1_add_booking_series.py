@@ -0,0 +1,52 @@
+"""Add recurring booking series
+
+Revision ID: b5e2f7a9d3c1
+Revises: a8d4e6f1c2b7
+Create Date: 2026-10-19 18:12:37.604219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e2f7a9d3c1'
+down_revision: Union[str, Sequence[str], None] = 'a8d4e6f1c2b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'booking_series',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('party_id', sa.Integer(), nullable=False),
+        sa.Column('party_rotation', sa.String(length=50), nullable=True),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('end_date', sa.Date(), nullable=False),
+        sa.Column('freq', sa.String(length=10), nullable=False),
+        sa.Column('interval', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=True),
+        sa.Column('until', sa.Date(), nullable=True),
+        sa.Column('note', sa.Text(), nullable=True),
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True
+    )
+    op.create_table(
+        'booking_series_exceptions',
+        sa.Column('series_id', sa.Integer(), nullable=False),
+        sa.Column('occurrence_date', sa.Date(), nullable=False),
+        sa.ForeignKeyConstraint(['series_id'], ['booking_series.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('series_id', 'occurrence_date')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('booking_series_exceptions')
+    op.drop_table('booking_series')
@@ -0,0 +1,91 @@
+"""Partition bookings by year (PostgreSQL) and add the booking archive (SQLite)
+
+Revision ID: c3d81e5a9f20
+Revises: 9a4f3c2e8b17
+Create Date: 2026-10-19 12:25:41.918406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d81e5a9f20'
+down_revision: Union[str, Sequence[str], None] = '9a4f3c2e8b17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BOOKING_COLUMNS = "id, party_id, start_date, end_date, note, created_at, updated_at, seq, version"
+
+
+def create_bookings_table(partitioned: bool) -> None:
+    """bookings as in database.Booking - yearly partitions are split off at startup"""
+    primary_key = "PRIMARY KEY (id, end_date)" if partitioned else "PRIMARY KEY (id)"
+    op.execute(
+        f"""
+        CREATE TABLE bookings (
+            id INTEGER NOT NULL DEFAULT nextval('bookings_id_seq'),
+            party_id INTEGER NOT NULL,
+            start_date DATE NOT NULL,
+            end_date DATE NOT NULL,
+            note TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+            updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+            seq INTEGER NOT NULL,
+            version INTEGER DEFAULT '1' NOT NULL,
+            {primary_key}
+        ){" PARTITION BY RANGE (end_date)" if partitioned else ""}
+        """
+    )
+    if partitioned:
+        op.execute("CREATE TABLE bookings_default PARTITION OF bookings DEFAULT")
+    op.create_index('ix_bookings_end_start', 'bookings', ['end_date', 'start_date'], postgresql_include=['id'])
+    op.create_index('ix_bookings_party_start', 'bookings', ['party_id', 'start_date'])
+    op.create_index('ix_bookings_seq', 'bookings', ['seq'])
+
+
+def rebuild_bookings(partitioned: bool) -> None:
+    """Copy bookings into a new (un)partitioned table, keeping the id sequence"""
+    op.execute("ALTER TABLE bookings RENAME TO bookings_old")
+    op.execute("ALTER TABLE bookings_old RENAME CONSTRAINT bookings_pkey TO bookings_old_pkey")
+    for index in ('ix_bookings_end_start', 'ix_bookings_party_start', 'ix_bookings_seq'):
+        op.drop_index(index, table_name='bookings_old')
+    create_bookings_table(partitioned)
+    op.execute(f"INSERT INTO bookings ({BOOKING_COLUMNS}) SELECT {BOOKING_COLUMNS} FROM bookings_old")
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY bookings.id")
+    op.drop_table('bookings_old')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'bookings_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('party_id', sa.Integer(), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('end_date', sa.Date(), nullable=False),
+        sa.Column('note', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_bookings_archive_end_date', 'bookings_archive', ['end_date'])
+
+    if op.get_bind().dialect.name == 'postgresql':
+        rebuild_bookings(partitioned=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        rebuild_bookings(partitioned=False)
+    else:
+        op.execute(f"INSERT INTO bookings ({BOOKING_COLUMNS}) SELECT {BOOKING_COLUMNS} FROM bookings_archive")
+
+    op.drop_index('ix_bookings_archive_end_date', table_name='bookings_archive')
+    op.drop_table('bookings_archive')
@@ -0,0 +1,118 @@
+"""Add properties and scope bookings, series and parties by property
+
+Revision ID: c9f1a3e5d7b2
+Revises: b5e2f7a9d3c1
+Create Date: 2026-10-19 19:05:48.217730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9f1a3e5d7b2'
+down_revision: Union[str, Sequence[str], None] = 'b5e2f7a9d3c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DEFAULT_PROPERTY_ID = 1
+DEFAULT_PROPERTY_NAME = "3MädelHausen"
+PARTIES = [
+    (1, "Siggi & Mausi", "#E63946"),
+    (2, "Silke & Wolfi & Zoe", "#2A9D8F"),
+    (3, "Claudi & Wolfram", "#E9C46A"),
+    (4, "Extern", "#7B68EE"),
+]
+
+# Tables whose rows belong to a property (existing rows: the default property).
+# Plain add_column, no batch mode: rebuilding bookings would drop its search triggers.
+SCOPED_TABLES = ('bookings', 'bookings_archive', 'booking_series', 'booking_tombstones')
+
+
+def property_id_column() -> sa.Column:
+    return sa.Column('property_id', sa.Integer(), nullable=False, server_default=str(DEFAULT_PROPERTY_ID))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    op.create_table(
+        'properties',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(
+        sa.text("INSERT INTO properties (id, name) VALUES (:id, :name)")
+        .bindparams(id=DEFAULT_PROPERTY_ID, name=DEFAULT_PROPERTY_NAME)
+    )
+
+    # parties was only ever created by init_db
+    if sa.inspect(bind).has_table('parties'):
+        op.add_column('parties', property_id_column())
+    else:
+        op.create_table(
+            'parties',
+            sa.Column('id', sa.Integer(), nullable=False),
+            property_id_column(),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('color', sa.String(length=7), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+    op.create_index('ix_parties_property_id', 'parties', ['property_id'])
+    for party_id, name, color in PARTIES:
+        op.execute(
+            sa.text(
+                "INSERT INTO parties (id, property_id, name, color) "
+                "SELECT :id, :property_id, :name, :color "
+                "WHERE NOT EXISTS (SELECT 1 FROM parties WHERE id = :id)"
+            ).bindparams(id=party_id, property_id=DEFAULT_PROPERTY_ID, name=name, color=color)
+        )
+
+    for table in SCOPED_TABLES:
+        op.add_column(table, property_id_column())
+
+    # Property first: overlap windows and change feeds never scan other houses
+    op.create_index(
+        'ix_bookings_property_end_start', 'bookings', ['property_id', 'end_date', 'start_date'],
+        postgresql_include=['id']
+    )
+    op.create_index('ix_bookings_property_seq', 'bookings', ['property_id', 'seq'])
+    op.drop_index('ix_bookings_end_start', table_name='bookings')
+    op.drop_index('ix_bookings_seq', table_name='bookings')
+    op.create_index('ix_bookings_archive_property_end', 'bookings_archive', ['property_id', 'end_date'])
+    op.drop_index('ix_bookings_archive_end_date', table_name='bookings_archive')
+    op.create_index('ix_booking_tombstones_property_seq', 'booking_tombstones', ['property_id', 'seq'])
+    op.drop_index('ix_booking_tombstones_seq', table_name='booking_tombstones')
+
+    if bind.dialect.name == 'postgresql':
+        for table in ('properties', 'parties'):
+            op.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_booking_tombstones_seq', 'booking_tombstones', ['seq'])
+    op.drop_index('ix_booking_tombstones_property_seq', table_name='booking_tombstones')
+    op.create_index('ix_bookings_archive_end_date', 'bookings_archive', ['end_date'])
+    op.drop_index('ix_bookings_archive_property_end', table_name='bookings_archive')
+    op.create_index('ix_bookings_seq', 'bookings', ['seq'])
+    op.create_index(
+        'ix_bookings_end_start', 'bookings', ['end_date', 'start_date'],
+        postgresql_include=['id']
+    )
+    op.drop_index('ix_bookings_property_seq', table_name='bookings')
+    op.drop_index('ix_bookings_property_end_start', table_name='bookings')
+
+    # Only the default property survives
+    op.execute(f"DELETE FROM sync_state WHERE id != {DEFAULT_PROPERTY_ID}")
+    for table in SCOPED_TABLES:
+        op.execute(f"DELETE FROM {table} WHERE property_id != {DEFAULT_PROPERTY_ID}")
+        op.drop_column(table, 'property_id')
+
+    op.execute(f"DELETE FROM parties WHERE property_id != {DEFAULT_PROPERTY_ID}")
+    op.drop_index('ix_parties_property_id', table_name='parties')
+    op.drop_column('parties', 'property_id')
+    op.drop_table('properties')
@@ -0,0 +1,31 @@
+"""Add booking version for optimistic concurrency
+
+Revision ID: d0bcfc548110
+Revises: 740c0765a319
+Create Date: 2026-10-19 10:03:47.552914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd0bcfc548110'
+down_revision: Union[str, Sequence[str], None] = '740c0765a319'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('bookings') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Dropping a column rebuilds the table on SQLite - keep AUTOINCREMENT
+    with op.batch_alter_table('bookings', table_kwargs={'sqlite_autoincrement': True}) as batch_op:
+        batch_op.drop_column('version')
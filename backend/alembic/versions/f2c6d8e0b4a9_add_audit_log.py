@@ -0,0 +1,40 @@
+"""Add audit log of booking changes
+
+Revision ID: f2c6d8e0b4a9
+Revises: e7b5a1c94d36
+Create Date: 2026-10-19 16:48:12.604417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c6d8e0b4a9'
+down_revision: Union[str, Sequence[str], None] = 'e7b5a1c94d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'audit_log',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('username', sa.String(length=50), nullable=False),
+        sa.Column('action', sa.String(length=10), nullable=False),
+        sa.Column('booking_id', sa.Integer(), nullable=False),
+        sa.Column('before', sa.Text(), nullable=True),
+        sa.Column('after', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_audit_log_booking_id', 'audit_log', ['booking_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_audit_log_booking_id', table_name='audit_log')
+    op.drop_table('audit_log')
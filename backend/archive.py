@@ -0,0 +1,177 @@
+"""
+Historical booking storage for Ferienhaus Kalender
+Almost all traffic concerns the current and next year. Hot endpoints only read
+bookings that end inside the hot window; older bookings stay available to the
+export and stats endpoints.
+
+PostgreSQL: `bookings` is range-partitioned by end_date year. Partitions are
+created ahead of time, and rows that landed in the default partition are moved
+into their own year.
+SQLite: bookings that ended before the hot window are moved to
+`bookings_archive`, and back when one of them is updated or deleted.
+"""
+import asyncio
+import logging
+import os
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import delete, exists, insert, select, text, union_all
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database import IS_POSTGRES, Booking, BookingArchive, async_session_maker
+from cache import booking_snapshots
+
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+ARCHIVE_KEEP_YEARS = int(os.getenv("ARCHIVE_KEEP_YEARS", "1"))  # full past years kept hot
+PARTITION_YEARS_AHEAD = int(os.getenv("PARTITION_YEARS_AHEAD", "2"))
+ARCHIVE_INTERVAL = float(os.getenv("ARCHIVE_INTERVAL", "86400"))  # seconds between maintenance runs
+
+BOOKING_COLUMNS = [column.name for column in Booking.__table__.c]
+
+
+def hot_window_start(today: Optional[date] = None) -> date:
+    """First end_date served by the hot endpoints (Jan 1 of last year by default)"""
+    today = today or date.today()
+    return date(today.year - ARCHIVE_KEEP_YEARS, 1, 1)
+
+
+def archived_overlap_condition(property_id: int, start_date: date, end_date: date):
+    """
+    SQL condition: an archived booking of the property overlaps the given range, or None.
+    Archived bookings end before the hot window, so only ranges starting
+    before it can collide with them.
+    """
+    if IS_POSTGRES or start_date >= hot_window_start():
+        return None
+    archived = BookingArchive.__table__
+    return exists().where(
+        archived.c.property_id == property_id,
+        archived.c.start_date <= end_date,
+        archived.c.end_date >= start_date
+    )
+
+
+def booking_history():
+    """Selectable over all bookings, hot and historical"""
+    if IS_POSTGRES:
+        return Booking.__table__
+    return union_all(
+        select(*(Booking.__table__.c[name] for name in BOOKING_COLUMNS)),
+        select(*(BookingArchive.__table__.c[name] for name in BOOKING_COLUMNS)),
+    ).subquery("history")
+
+
+def partition_name(year: int) -> str:
+    return f"bookings_y{year}"
+
+
+async def ensure_partitions(db: AsyncSession, today: Optional[date] = None) -> list[str]:
+    """
+    Create yearly partitions from the hot window up to PARTITION_YEARS_AHEAD,
+    plus any year found in the default partition. Returns the created names.
+    """
+    today = today or date.today()
+    years = set(range(hot_window_start(today).year, today.year + PARTITION_YEARS_AHEAD + 1))
+    result = await db.execute(text(
+        "SELECT DISTINCT EXTRACT(YEAR FROM end_date)::int FROM bookings_default"
+    ))
+    years |= set(result.scalars())
+
+    result = await db.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "WHERE parent.relname = 'bookings'"
+    ))
+    existing = set(result.scalars())
+
+    created = []
+    for year in sorted(years):
+        name = partition_name(year)
+        if name in existing:
+            continue
+        bounds = {"lower": date(year, 1, 1), "upper": date(year + 1, 1, 1)}
+        # A partition cannot be attached while the default partition holds
+        # rows of its range, so move them over first
+        await db.execute(text(f"CREATE TABLE {name} (LIKE bookings INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        await db.execute(text(
+            f"WITH moved AS (DELETE FROM bookings_default "
+            f"WHERE end_date >= :lower AND end_date < :upper RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ), bounds)
+        await db.execute(text(
+            f"ALTER TABLE bookings ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{bounds['lower']}') TO ('{bounds['upper']}')"
+        ))
+        created.append(name)
+    await db.commit()
+    return created
+
+
+async def archive_bookings(db: AsyncSession, today: Optional[date] = None) -> int:
+    """Move bookings that ended before the hot window to the archive table"""
+    cutoff = hot_window_start(today)
+    await db.execute(
+        insert(BookingArchive).from_select(
+            BOOKING_COLUMNS,
+            select(*(Booking.__table__.c[name] for name in BOOKING_COLUMNS)).where(Booking.end_date < cutoff)
+        )
+    )
+    result = await db.execute(delete(Booking).where(Booking.end_date < cutoff))
+    await db.commit()
+    return result.rowcount
+
+
+async def unarchive_booking(db: AsyncSession, property_id: int, booking_id: int) -> bool:
+    """
+    SQLite: move an archived booking back to the hot table when an update or
+    delete found no hot row, so old bookings stay editable as on PostgreSQL.
+    Part of the caller's transaction; maintenance archives it again later.
+    Returns whether a booking was moved.
+    """
+    if IS_POSTGRES:
+        return False
+    archived = BookingArchive.__table__
+    condition = (archived.c.id == booking_id) & (archived.c.property_id == property_id)
+    result = await db.execute(
+        insert(Booking).from_select(
+            BOOKING_COLUMNS,
+            select(*(archived.c[name] for name in BOOKING_COLUMNS)).where(condition)
+        )
+    )
+    if not result.rowcount:
+        return False
+    await db.execute(delete(BookingArchive).where(condition))
+    return True
+
+
+async def run_maintenance(
+    session_factory: async_sessionmaker[AsyncSession] = async_session_maker,
+    today: Optional[date] = None
+) -> None:
+    """Create upcoming partitions (PostgreSQL) or archive old bookings (SQLite)"""
+    async with session_factory() as session:
+        if IS_POSTGRES:
+            created = await ensure_partitions(session, today)
+            if created:
+                logger.info("Created booking partitions: %s", ", ".join(created))
+        else:
+            moved = await archive_bookings(session, today)
+            if moved:
+                for snapshots in booking_snapshots.values():
+                    snapshots.invalidate()
+                logger.info("Archived %d bookings", moved)
+
+
+async def maintenance_loop(interval: float = ARCHIVE_INTERVAL) -> None:
+    """Background task started by the app lifespan"""
+    while True:
+        try:
+            await run_maintenance()
+        except Exception:
+            logger.exception("Booking archive maintenance failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,137 @@
+"""
+Audit log of booking changes for Ferienhaus Kalender
+Series events (series_create, series_delete, series_skip) are logged under the
+id of an occurrence: the first one, or the skipped one.
+Writes only append an event to an in-process buffer. A background writer
+started by the app lifespan flushes the buffer in multi-row INSERTs, so
+auditing adds no statement to the booking writes themselves. The buffer is
+bounded; the lifespan flushes what is left on shutdown.
+"""
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from datetime import date, datetime
+from typing import Any, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database import AuditEntry, async_session_maker
+
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+AUDIT_BUFFER_SIZE = int(os.getenv("AUDIT_BUFFER_SIZE", "10000"))  # events held before dropping
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))  # rows per INSERT
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "2"))  # seconds between flushes
+
+AUDITED_FIELDS = ("party_id", "start_date", "end_date", "note", "version")
+
+
+def booking_state(booking: Any) -> dict:
+    """Audited fields of a booking row or of a dict of them (JSON-ready)"""
+    if not isinstance(booking, dict):
+        booking = {name: getattr(booking, name) for name in AUDITED_FIELDS}
+    return {name: value.isoformat() if isinstance(value, date) else value for name, value in booking.items()}
+
+
+def series_state(series: Any) -> dict:
+    """Rule and skipped dates of a booking series (JSON-ready)"""
+    return {
+        "party_rotation": list(series.party_ids),
+        "start_date": series.start_date.isoformat(),
+        "end_date": series.end_date.isoformat(),
+        "freq": series.freq,
+        "interval": series.interval,
+        "count": series.count,
+        "until": series.until.isoformat() if series.until else None,
+        "note": series.note,
+        "skipped": sorted(day.isoformat() for day in series.skipped),
+    }
+
+
+class AuditLog:
+    """Bounded buffer of audit events and their batched writer"""
+
+    def __init__(self, max_events: int = AUDIT_BUFFER_SIZE, batch_size: int = AUDIT_BATCH_SIZE):
+        self.max_events = max_events
+        self.batch_size = batch_size
+        self._events: deque[dict] = deque()
+        self._wakeup = asyncio.Event()
+        self.written = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def record(
+        self,
+        username: str,
+        action: str,
+        booking_id: int,
+        before: Optional[dict] = None,
+        after: Optional[dict] = None
+    ) -> None:
+        """Queue an event - never blocks and never touches the database"""
+        if len(self._events) >= self.max_events:
+            self.dropped += 1
+            logger.warning("Audit buffer full, dropped %s of booking %d by %s", action, booking_id, username)
+            return
+        self._events.append({
+            "created_at": datetime.utcnow(),
+            "username": username,
+            "action": action,
+            "booking_id": booking_id,
+            "before": json.dumps(before) if before is not None else None,
+            "after": json.dumps(after) if after is not None else None,
+        })
+        if len(self._events) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self, db: AsyncSession) -> int:
+        """Write all buffered events; failed batches go back to the buffer"""
+        written = 0
+        while self._events:
+            batch = [self._events.popleft() for _ in range(min(self.batch_size, len(self._events)))]
+            try:
+                await db.execute(insert(AuditEntry).values(batch))
+                await db.commit()
+            except BaseException:
+                await db.rollback()
+                self._events.extendleft(reversed(batch))
+                raise
+            written += len(batch)
+        self.written += written
+        return written
+
+    async def run(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = async_session_maker,
+        interval: float = AUDIT_FLUSH_INTERVAL
+    ) -> None:
+        """Background writer: flush every interval, or early when a batch is full"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self._events:
+                continue
+            try:
+                async with session_factory() as session:
+                    await self.flush(session)
+            except Exception:
+                logger.exception("Writing the audit log failed")
+
+    def clear(self) -> None:
+        self._events.clear()
+        self.written = 0
+        self.dropped = 0
+
+
+# Audit events of this process
+audit_log = AuditLog()
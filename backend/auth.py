@@ -2,23 +2,40 @@
 Authentication module for Ferienhaus Kalender
 Simple JWT-based authentication with passwords from environment variables
 """
+import asyncio
+import hashlib
+import heapq
+import hmac
+import logging
 import os
+import secrets
+import time
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional
 from dataclasses import dataclass
 
 from dotenv import load_dotenv
-from fastapi import HTTPException, Header
+from fastapi import Depends, HTTPException, Header
 from jose import JWTError, jwt
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database import Party, RevokedToken, async_session_maker, dialect_insert
+from tracing import span
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 # Configuration
 SECRET_KEY = os.getenv("SESSION_SECRET_KEY", "dev-secret-key-change-in-production")
 ALGORITHM = "HS256"
 TOKEN_EXPIRE_MINUTES = int(os.getenv("SESSION_EXPIRY_MINUTES", "480"))  # 8 hours default
+REVOCATION_PRUNE_INTERVAL = float(os.getenv("REVOCATION_PRUNE_INTERVAL", "3600"))  # seconds between prunes
+PASSWORD_HASH_ITERATIONS = 600_000  # PBKDF2-SHA256 rounds for party passwords stored in the database
 
 
 @dataclass
@@ -27,9 +44,55 @@ class User:
     party_id: Optional[int]  # None for admin
     is_admin: bool
     username: str
+    jti: Optional[str] = None  # token id, used for revocation
+    expires_at: Optional[datetime] = None  # token expiry (UTC)
+
+
+class RevocationList:
+    """
+    In-memory set of revoked token ids.
+    Entries expire together with their token, so lookups stay O(1) and the
+    set only ever holds tokens that would otherwise still be valid.
+    """
+
+    def __init__(self):
+        self._expiry: dict[str, float] = {}
+        self._heap: list[tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def add(self, jti: str, expires_at: datetime) -> None:
+        """Revoke token id until its expiry time (UTC)"""
+        expiry = expires_at.timestamp() if expires_at.tzinfo else (expires_at - datetime(1970, 1, 1)).total_seconds()
+        self._expiry[jti] = expiry
+        heapq.heappush(self._heap, (expiry, jti))
+
+    def is_revoked(self, jti: str) -> bool:
+        """Check token id - evicts expired entries on the way"""
+        self._evict(time.time())
+        return jti in self._expiry
+
+    def _evict(self, now: float) -> None:
+        while self._heap and self._heap[0][0] <= now:
+            expiry, jti = heapq.heappop(self._heap)
+            if self._expiry.get(jti) == expiry:
+                del self._expiry[jti]
 
+    def prune(self) -> None:
+        """Drop entries of expired tokens"""
+        self._evict(time.time())
 
-# Party name to ID mapping (must match PARTIES in main.py)
+    def clear(self) -> None:
+        self._expiry.clear()
+        self._heap.clear()
+
+
+# Revoked tokens of this process (persisted in the revoked_tokens table)
+revoked_tokens = RevocationList()
+
+
+# Party name to ID mapping (must match PARTIES in database.py)
 PARTY_NAMES = {
     "Siggi & Mausi": 1,
     "Silke & Wolfi & Zoe": 2,
@@ -73,6 +136,46 @@ def verify_password(username: str, password: str) -> Optional[User]:
         return User(party_id=party_id, is_admin=False, username=username)
 
 
+def hash_password(password: str) -> str:
+    """PBKDF2 hash of a party password, stored as pbkdf2_sha256$rounds$salt$hash"""
+    salt = secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), PASSWORD_HASH_ITERATIONS)
+    return f"pbkdf2_sha256${PASSWORD_HASH_ITERATIONS}${salt}${digest.hex()}"
+
+
+def check_password_hash(password: str, stored: str) -> bool:
+    """Compare a password with a hash_password() value"""
+    try:
+        algorithm, rounds, salt, expected = stored.split("$")
+    except ValueError:
+        return False
+    if algorithm != "pbkdf2_sha256":
+        return False
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), int(rounds))
+    return hmac.compare_digest(digest.hex(), expected)
+
+
+async def authenticate(db: AsyncSession, username: str, password: str) -> Optional[User]:
+    """
+    Verify a login: Admin and the predefined parties against environment
+    variables, parties of further properties against their stored password hash.
+    """
+    if username in get_password_config():
+        return verify_password(username, password)
+    if not password:
+        return None
+
+    result = await db.execute(
+        select(Party.id, Party.password_hash)
+        .where(Party.name == username, Party.password_hash.is_not(None))
+    )
+    party = result.first()
+    await db.close()  # release the connection while hashing
+    if not party or not await asyncio.to_thread(check_password_hash, password, party.password_hash):
+        return None
+    return User(party_id=party.id, is_admin=False, username=username)
+
+
 def create_session_token(user: User) -> str:
     """Create JWT token for authenticated user"""
     expire = datetime.utcnow() + timedelta(minutes=TOKEN_EXPIRE_MINUTES)
@@ -81,7 +184,8 @@ def create_session_token(user: User) -> str:
         "sub": user.username,
         "party_id": user.party_id,
         "is_admin": user.is_admin,
-        "exp": expire
+        "exp": expire,
+        "jti": uuid.uuid4().hex
     }
 
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
@@ -96,10 +200,16 @@ def verify_session_token(token: str) -> Optional[User]:
         if not username:
             return None
 
+        jti = payload.get("jti")
+        if jti and revoked_tokens.is_revoked(jti):
+            return None
+
         return User(
             party_id=payload.get("party_id"),
             is_admin=payload.get("is_admin", False),
-            username=username
+            username=username,
+            jti=jti,
+            expires_at=datetime.utcfromtimestamp(payload["exp"])
         )
     except JWTError:
         return None
@@ -122,7 +232,8 @@ async def get_current_user(authorization: str = Header(None)) -> User:
     else:
         token = authorization
 
-    user = verify_session_token(token)
+    with span("auth.verify_token"):
+        user = verify_session_token(token)
 
     if not user:
         raise HTTPException(
@@ -133,6 +244,67 @@ async def get_current_user(authorization: str = Header(None)) -> User:
     return user
 
 
+async def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
+    """
+    FastAPI dependency for admin-only endpoints.
+    Usage: current_user: User = Depends(get_admin_user)
+    """
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=403,
+            detail="Nur für Administratoren"
+        )
+    return current_user
+
+
+async def revoke_token(db: AsyncSession, user: User) -> None:
+    """Revoke the token the user authenticated with until it expires"""
+    if not user.jti or not user.expires_at:
+        return  # tokens issued before revocation support cannot be revoked
+
+    revoked_tokens.add(user.jti, user.expires_at)
+    # concurrent logouts with the same token insert the same jti
+    await db.execute(
+        dialect_insert(RevokedToken)
+        .values(jti=user.jti, expires_at=user.expires_at)
+        .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+    )
+    await db.commit()
+
+
+async def prune_revoked_tokens(db: AsyncSession) -> int:
+    """Delete revocations of expired tokens - returns the number of deleted rows"""
+    revoked_tokens.prune()
+    result = await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+    await db.commit()
+    return result.rowcount
+
+
+async def prune_loop(
+    session_factory: async_sessionmaker[AsyncSession] = async_session_maker,
+    interval: float = REVOCATION_PRUNE_INTERVAL
+) -> None:
+    """Background task started by the app lifespan - startup already pruned once"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_factory() as session:
+                pruned = await prune_revoked_tokens(session)
+            if pruned:
+                logger.info("Pruned %d expired token revocations", pruned)
+        except Exception:
+            logger.exception("Pruning revoked tokens failed")
+
+
+async def restore_revoked_tokens(db: AsyncSession) -> None:
+    """Load still-valid revocations on startup and drop expired ones"""
+    await prune_revoked_tokens(db)
+    result = await db.execute(select(RevokedToken))
+    for revoked in result.scalars():
+        revoked_tokens.add(revoked.jti, revoked.expires_at)
+    await db.commit()
+
+
 def can_modify_booking(user: User, party_id: int) -> bool:
     """Check if user is allowed to modify a booking for given party"""
     if user.is_admin:
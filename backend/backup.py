@@ -0,0 +1,252 @@
+"""
+Online database backup and restore for Ferienhaus Kalender
+SQLite: the backup API copies the live database in steps of
+BACKUP_PAGES_PER_STEP pages on a worker thread. The source is only locked
+during a step, so bookings can be read and written while the backup runs; a
+write from another connection makes SQLite restart the copy, so the finished
+file is always a consistent snapshot. After BACKUP_MAX_RESTARTS restarts the
+backup gives up instead of copying forever under steady writes.
+PostgreSQL: pg_dump (custom format) when it is installed locally.
+
+Backups are written to a temporary name and renamed when complete. Restores
+copy the backup into the SQLite database with the backup API under an
+exclusive lock (with the server stopped) or run pg_restore in a single
+transaction.
+
+Usage: python backup.py create [--dir DIR] | python backup.py restore FILE
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.engine import make_url
+
+from database import DATABASE_URL, IS_POSTGRES
+
+
+# Configuration
+BACKUP_DIR = os.getenv("BACKUP_DIR", "backups")
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))  # SQLite pages copied per lock
+BACKUP_STEP_PAUSE = float(os.getenv("BACKUP_STEP_PAUSE", "0.001"))  # seconds writers get between steps
+BACKUP_MAX_RESTARTS = int(os.getenv("BACKUP_MAX_RESTARTS", "20"))  # SQLite: copy restarts caused by writes
+
+
+class BackupUnavailable(Exception):
+    """No backup tool for this database (in-memory SQLite, pg_dump missing)"""
+
+
+class BackupBusy(Exception):
+    """Raised when another backup is already running"""
+
+
+class BackupInterrupted(Exception):
+    """SQLite copy restarted too often by concurrent writes"""
+
+
+@dataclass
+class BackupResult:
+    file: str
+    size: int
+    seconds: float
+    steps: int = 0  # SQLite backup steps (0 for pg_dump)
+
+
+def sqlite_path(url: str) -> Optional[str]:
+    """Database file of a SQLite URL - None for PostgreSQL or in-memory databases"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or parsed.database in (None, "", ":memory:"):
+        return None
+    return parsed.database
+
+
+def backup_name(directory: str, extension: str) -> str:
+    return os.path.join(directory, f"ferienhaus-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{extension}")
+
+
+def copy_sqlite(source: str, target: str, pages: int, pause: float, max_restarts: int = BACKUP_MAX_RESTARTS) -> int:
+    """Blocking: back up source into target step by step, returns the number of steps"""
+    steps = restarts = 0
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal steps, restarts, last_remaining
+        steps += 1
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1  # a write from another connection started the copy over
+            if restarts > max_restarts:
+                raise BackupInterrupted(f"Backup nach {max_restarts} Neustarts abgebrochen - zu viele Schreibzugriffe")
+        last_remaining = remaining
+        if remaining and pause:
+            time.sleep(pause)  # no lock held here - writers get their turn
+
+    with closing(sqlite3.connect(source)) as src, closing(sqlite3.connect(target)) as dst:
+        src.backup(dst, pages=pages, progress=progress)
+    return steps
+
+
+def check_sqlite(path: str) -> None:
+    """Raise ValueError unless path is an intact SQLite database"""
+    if not os.path.isfile(path):
+        raise ValueError(f"{path} nicht gefunden")
+    try:
+        with closing(sqlite3.connect(path)) as connection:
+            result = connection.execute("PRAGMA quick_check").fetchone()[0]
+    except sqlite3.DatabaseError as e:
+        raise ValueError(f"Keine gültige SQLite-Datenbank: {e}")
+    if result != "ok":
+        raise ValueError(f"Datenbank beschädigt: {result}")
+
+
+def fsync(path: str) -> None:
+    with open(path, "rb") as handle:
+        os.fsync(handle.fileno())
+
+
+async def backup_sqlite(
+    source: str,
+    target: str,
+    pages: int = BACKUP_PAGES_PER_STEP,
+    pause: float = BACKUP_STEP_PAUSE,
+    max_restarts: int = BACKUP_MAX_RESTARTS
+) -> BackupResult:
+    """Online backup of a SQLite file; target appears only when complete"""
+    started = time.perf_counter()
+    partial = f"{target}.part"
+    try:
+        steps = await asyncio.to_thread(copy_sqlite, source, partial, pages, pause, max_restarts)
+        await asyncio.to_thread(fsync, partial)
+        os.replace(partial, target)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return BackupResult(file=target, size=os.path.getsize(target), seconds=time.perf_counter() - started, steps=steps)
+
+
+def libpq_target(url: str) -> tuple[str, dict]:
+    """Connection URL for pg_dump/pg_restore, with the password moved to the environment"""
+    parsed = make_url(url)
+    env = dict(os.environ)
+    if parsed.password:
+        env["PGPASSWORD"] = parsed.password
+    plain = parsed._replace(drivername="postgresql", password=None)
+    return plain.render_as_string(hide_password=False), env
+
+
+async def run_tool(*args: str, env: dict) -> None:
+    """Run pg_dump/pg_restore without blocking the event loop"""
+    if shutil.which(args[0]) is None:
+        raise BackupUnavailable(f"{args[0]} ist nicht installiert")
+    process = await asyncio.create_subprocess_exec(
+        *args, env=env, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+    )
+    _, stderr = await process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f"{args[0]} fehlgeschlagen: {stderr.decode(errors='replace').strip()}")
+
+
+async def backup_postgres(url: str, target: str) -> BackupResult:
+    """pg_dump in custom format; target appears only when complete"""
+    started = time.perf_counter()
+    partial = f"{target}.part"
+    connection, env = libpq_target(url)
+    try:
+        await run_tool("pg_dump", "--format=custom", f"--file={partial}", connection, env=env)
+        os.replace(partial, target)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return BackupResult(file=target, size=os.path.getsize(target), seconds=time.perf_counter() - started)
+
+
+_running = asyncio.Lock()
+
+
+async def create_backup(directory: Optional[str] = None, url: Optional[str] = None) -> BackupResult:
+    """Back up the configured database into directory (BACKUP_DIR by default)"""
+    if _running.locked():
+        raise BackupBusy()
+    async with _running:
+        url = url or DATABASE_URL
+        directory = directory or BACKUP_DIR
+        os.makedirs(directory, exist_ok=True)
+        if make_url(url).get_backend_name() == "postgresql":
+            return await backup_postgres(url, backup_name(directory, "dump"))
+        source = sqlite_path(url)
+        if source is None:
+            raise BackupUnavailable("Für diese Datenbank ist kein Backup möglich")
+        return await backup_sqlite(source, backup_name(directory, "db"))
+
+
+def restore_sqlite(backup: str, target: str) -> Optional[str]:
+    """
+    Restore the SQLite database target from backup - with the server stopped.
+    The backup is checked, then copied into target with the backup API in one
+    step. The file is not replaced, so a connection still open sees the
+    restored data rather than a deleted file. Refused while the database is in
+    use (WAL file present or lock not available). Returns where the previous
+    database was kept.
+    """
+    if os.path.exists(f"{target}-wal"):
+        raise RuntimeError(f"{target}-wal existiert - läuft der Server noch?")
+    check_sqlite(backup)
+
+    with closing(sqlite3.connect(target, timeout=0, isolation_level=None)) as destination:
+        try:
+            # Fails while another connection reads or writes
+            destination.execute("BEGIN EXCLUSIVE")
+            destination.execute("ROLLBACK")
+        except sqlite3.OperationalError as e:
+            raise RuntimeError(f"{target} wird gerade benutzt - läuft der Server noch? ({e})")
+
+        previous = None
+        if os.path.getsize(target):
+            previous = f"{target}.before-restore"
+            copy_sqlite(target, previous, pages=-1, pause=0)
+        try:
+            with closing(sqlite3.connect(backup)) as source:
+                source.backup(destination)
+        except sqlite3.OperationalError as e:
+            raise RuntimeError(f"{target} wird gerade benutzt - läuft der Server noch? ({e})")
+    return previous
+
+
+async def restore_postgres(url: str, backup: str) -> None:
+    """pg_restore in a single transaction: all or nothing"""
+    connection, env = libpq_target(url)
+    await run_tool(
+        "pg_restore", "--clean", "--if-exists", "--single-transaction", "--no-owner",
+        f"--dbname={connection}", backup, env=env
+    )
+
+
+async def main(args: argparse.Namespace) -> int:
+    if args.command == "create":
+        result = await create_backup(args.dir)
+        print(f"{result.file}: {result.size} Bytes in {result.seconds:.2f} s")
+    elif IS_POSTGRES:
+        await restore_postgres(DATABASE_URL, args.file)
+        print(f"{args.file} wiederhergestellt")
+    else:
+        target = sqlite_path(DATABASE_URL)
+        if target is None:
+            raise BackupUnavailable("Für diese Datenbank ist keine Wiederherstellung möglich")
+        previous = restore_sqlite(args.file, target)
+        print(f"{args.file} wiederhergestellt" + (f", vorherige Datenbank: {previous}" if previous else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Online backup and restore of the booking database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("create", help="consistent backup of the running database")
+    create.add_argument("--dir", help=f"target directory (default: {BACKUP_DIR})")
+    restore = commands.add_parser("restore", help="replace the database by a backup (stop the server first for SQLite)")
+    restore.add_argument("file")
+    raise SystemExit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,142 @@
+"""
+In-process read caching for Ferienhaus Kalender
+Single-flight coalescing of identical reads and immutable serialized snapshots
+
+The app runs as a single uvicorn process; snapshots are invalidated by the
+booking writes of that process. Caches of booking data are kept per property,
+so a write to one house never drops, and reads never evict, another's entries.
+"""
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Generic, Hashable, Iterator, TypeVar
+
+
+class SingleFlight:
+    """Runs concurrent calls with the same key only once and shares the result"""
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn() - or the already running call for the same key"""
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved in case nobody else waits
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Serialized response body shared by all readers until invalidated"""
+    body: bytes
+    etag: str
+
+
+def snapshot_etag(body: bytes) -> str:
+    """Weak ETag derived from the serialized body"""
+    return f'W/"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+class SnapshotCache:
+    """
+    Immutable serialized payloads per key.
+    Concurrent misses for the same key share one build; any booking write
+    invalidates all snapshots. A build that raced with a write is returned to
+    its waiters but not stored.
+    """
+
+    def __init__(self):
+        self._snapshots: dict[Hashable, Snapshot] = {}
+        self._generation = 0
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.builds = 0
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    async def get(self, key: Hashable, build: Callable[[], Awaitable[bytes]]) -> Snapshot:
+        """Return the snapshot for key, building it at most once per generation"""
+        snapshot = self._snapshots.get(key)
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+        return await self._flight.do((key, self._generation), lambda: self._build(key, build))
+
+    async def _build(self, key: Hashable, build: Callable[[], Awaitable[bytes]]) -> Snapshot:
+        generation = self._generation
+        self.builds += 1
+        body = await build()
+        snapshot = Snapshot(body=body, etag=snapshot_etag(body))
+        if generation == self._generation:
+            self._snapshots[key] = snapshot
+        return snapshot
+
+    def invalidate(self) -> None:
+        """Drop all snapshots - called after every committed booking write"""
+        self._generation += 1
+        self._snapshots.clear()
+
+    def clear(self) -> None:
+        """Invalidate and reset counters"""
+        self.invalidate()
+        self.hits = 0
+        self.builds = 0
+
+
+C = TypeVar("C")
+
+
+class PerProperty(Generic[C]):
+    """One independent cache per property, created on first use"""
+
+    def __init__(self, factory: Callable[[], C]):
+        self._factory = factory
+        self._caches: dict[int, C] = {}
+
+    def __getitem__(self, property_id: int) -> C:
+        cache = self._caches.get(property_id)
+        if cache is None:
+            cache = self._caches[property_id] = self._factory()
+        return cache
+
+    def __contains__(self, property_id: int) -> bool:
+        return property_id in self._caches
+
+    def __len__(self) -> int:
+        """Entries over all properties"""
+        return sum(len(cache) for cache in self._caches.values())
+
+    def values(self) -> Iterator[C]:
+        return iter(list(self._caches.values()))
+
+    def clear(self) -> None:
+        """Forget the caches of all properties"""
+        self._caches.clear()
+
+
+# Snapshot caches for booking reads, per property
+booking_snapshots: PerProperty[SnapshotCache] = PerProperty(SnapshotCache)
@@ -0,0 +1,191 @@
+"""
+Response compression for Ferienhaus Kalender
+Negotiates brotli/gzip per request and caches compressed bodies of repeated responses
+"""
+import gzip
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional - gzip is always available
+    brotli = None
+
+
+# Configuration
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # bytes
+COMPRESSION_CACHE_SIZE = int(os.getenv("COMPRESSION_CACHE_SIZE", "64"))  # entries
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/msgpack",
+    "application/javascript",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def supported_encodings() -> tuple[str, ...]:
+    """Encodings this server can produce, in order of preference"""
+    if brotli is not None:
+        return ("br", "gzip")
+    return ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the best content coding from an Accept-Encoding header.
+    Returns None if the client accepts none of the supported encodings.
+    """
+    qualities: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding] = quality
+
+    best: Optional[str] = None
+    best_quality = 0.0
+    for coding in supported_encodings():
+        quality = qualities.get(coding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress body with the given content coding"""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressedBodyCache:
+    """Small LRU cache of compressed response bodies"""
+
+    def __init__(self, max_entries: int = COMPRESSION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_compress(self, key: str, body: bytes, encoding: str) -> bytes:
+        """Return cached compressed bytes for key, compressing on a miss"""
+        cache_key = (key, encoding)
+        cached = self._entries.get(cache_key)
+        if cached is not None:
+            self._entries.move_to_end(cache_key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        compressed = compress(body, encoding)
+        self._entries[cache_key] = compressed
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return compressed
+
+    def clear(self) -> None:
+        """Drop all cached bodies and reset counters"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Shared cache instance
+compressed_cache = CompressedBodyCache()
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses above a size threshold.
+    Bodies of successful GET responses are cached by ETag (or content hash),
+    so polling clients receive the same compressed bytes without recompression.
+    Streaming responses are passed through unchanged.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        cache: Optional[CompressedBodyCache] = None
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache = cache if cache is not None else compressed_cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        cacheable_request = scope["method"] == "GET"
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            if start_message is None:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            content_type = headers.get("content-type", "")
+
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or len(body) < self.minimum_size
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if cacheable_request and start_message["status"] == 200:
+                key = headers.get("etag") or hashlib.blake2b(body, digest_size=16).hexdigest()
+                compressed = self.cache.get_or_compress(key, body, encoding)
+            else:
+                compressed = compress(body, encoding)
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
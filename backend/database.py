@@ -4,12 +4,19 @@ Using SQLAlchemy async with PostgreSQL
 """
 import os
 from datetime import date, datetime
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Optional
 
-from sqlalchemy import String, Text, Date, DateTime, Integer, func
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy import (
+    String, Text, Date, DateTime, ForeignKey, Index, Integer, PrimaryKeyConstraint, Result, event, func, update, insert
+)
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
+from tracing import span
+
 
 # Database URL from environment variable
 DATABASE_URL = os.getenv(
@@ -22,9 +29,16 @@ engine_options = {
     "echo": os.getenv("DEBUG", "false").lower() == "true",
 }
 
+# PostgreSQL: bookings are range-partitioned by year (see archive.py);
+# SQLite moves old bookings into an archive table instead
+IS_POSTGRES = DATABASE_URL.startswith("postgresql")
+
 # PostgreSQL-specific options
-if DATABASE_URL.startswith("postgresql"):
+if IS_POSTGRES:
     engine_options["pool_pre_ping"] = True
+    engine_options["pool_size"] = int(os.getenv("DB_POOL_SIZE", "5"))
+    engine_options["max_overflow"] = int(os.getenv("DB_POOL_MAX_OVERFLOW", "5"))
+    engine_options["pool_timeout"] = float(os.getenv("DB_POOL_TIMEOUT", "10"))
 
 # Create async engine
 engine = create_async_engine(DATABASE_URL, **engine_options)
@@ -42,38 +56,394 @@ class Base(DeclarativeBase):
     pass
 
 
+# The house that existed before multi-property support; rows without an
+# explicit property belong to it, and so do the predefined parties
+DEFAULT_PROPERTY_ID = 1
+DEFAULT_PROPERTY_NAME = "3MädelHausen"
+
+# Predefined parties with distinct colors
+PARTIES = [
+    {"id": 1, "name": "Siggi & Mausi", "color": "#E63946"},      # Rot
+    {"id": 2, "name": "Silke & Wolfi & Zoe", "color": "#2A9D8F"}, # Türkis
+    {"id": 3, "name": "Claudi & Wolfram", "color": "#E9C46A"},    # Gold
+    {"id": 4, "name": "Extern", "color": "#7B68EE"}               # Lila
+]
+
+
 # Models
 class Booking(Base):
     """Booking model for vacation rental reservations"""
     __tablename__ = "bookings"
+    __table_args__ = (
+        # Overlap and window queries: equality on the property, range scan on
+        # end_date, start_date filtered inside the index (upcoming bookings are
+        # few, history is not) - the cost does not grow with other houses.
+        # There is deliberately no start_date index: planners without range
+        # statistics would pick it and walk the whole history.
+        Index("ix_bookings_property_end_start", "property_id", "end_date", "start_date", postgresql_include=["id"]),
+        # Per-party views ordered by date (a party belongs to one property)
+        Index("ix_bookings_party_start", "party_id", "start_date"),
+        # Change feed of one property
+        Index("ix_bookings_property_seq", "property_id", "seq"),
+        {
+            # Never reuse ids of deleted bookings - syncing clients track them by id
+            "sqlite_autoincrement": True,
+            # One partition per end_date year, so "current and upcoming" queries
+            # (end_date >= Jan 1 of last year) only touch the newest partitions
+            "postgresql_partition_by": "RANGE (end_date)",
+            "info": {"partition_key": "end_date"},
+        },
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    party_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
-    start_date: Mapped[date] = mapped_column(Date, nullable=False, index=True)
-    end_date: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    property_id: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=DEFAULT_PROPERTY_ID, server_default=str(DEFAULT_PROPERTY_ID)
+    )
+    party_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    start_date: Mapped[date] = mapped_column(Date, nullable=False)
+    end_date: Mapped[date] = mapped_column(Date, nullable=False)
     note: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime,
         nullable=False,
         server_default=func.now()
     )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now()
+    )
+    # Change sequence of the last insert/update (see SyncState)
+    seq: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Incremented on every update (optimistic concurrency)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
 
     def __repr__(self) -> str:
         return f"<Booking(id={self.id}, party_id={self.party_id}, {self.start_date} - {self.end_date})>"
 
 
+class BookingArchive(Base):
+    """
+    Bookings that ended before the hot window (SQLite only).
+    Moved out of `bookings` by archive.archive_bookings; PostgreSQL keeps them
+    in older partitions of `bookings` and leaves this table empty.
+    """
+    __tablename__ = "bookings_archive"
+    __table_args__ = (
+        Index("ix_bookings_archive_property_end", "property_id", "end_date"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    property_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    party_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    start_date: Mapped[date] = mapped_column(Date, nullable=False)
+    end_date: Mapped[date] = mapped_column(Date, nullable=False)
+    note: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<BookingArchive(id={self.id}, party_id={self.party_id}, {self.start_date} - {self.end_date})>"
+
+
+@compiles(PrimaryKeyConstraint, "postgresql")
+def compile_partitioned_primary_key(constraint, compiler, **kw):
+    """Primary keys of partitioned tables must contain the partition key"""
+    key = constraint.table.info.get("partition_key") if constraint.table is not None else None
+    if key is None or key in constraint.columns:
+        return compiler.visit_primary_key_constraint(constraint, **kw)
+    columns = ", ".join(compiler.preparer.quote(column.name) for column in constraint.columns)
+    return f"PRIMARY KEY ({columns}, {compiler.preparer.quote(key)})"
+
+
+@event.listens_for(Booking.__table__, "after_create")
+def create_default_partition(target, connection, **kw):
+    """Catch-all partition; archive.ensure_partitions splits it into years"""
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("CREATE TABLE bookings_default PARTITION OF bookings DEFAULT")
+
+
+# Full-text search over booking notes (see search.py).
+# SQLite: FTS5 table keyed by booking id, kept in sync by triggers. Moving a
+# booking to the archive deletes it from `bookings` after copying it, so the
+# delete trigger keeps rows that exist in the archive.
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE booking_search USING fts5(note, tokenize = 'unicode61 remove_diacritics 2')",
+    """CREATE TRIGGER booking_search_insert AFTER INSERT ON bookings WHEN new.note IS NOT NULL BEGIN
+        INSERT INTO booking_search (rowid, note) VALUES (new.id, new.note);
+    END""",
+    """CREATE TRIGGER booking_search_update AFTER UPDATE OF note ON bookings BEGIN
+        DELETE FROM booking_search WHERE rowid = old.id;
+        INSERT INTO booking_search (rowid, note) SELECT new.id, new.note WHERE new.note IS NOT NULL;
+    END""",
+    """CREATE TRIGGER booking_search_delete AFTER DELETE ON bookings
+    WHEN NOT EXISTS (SELECT 1 FROM bookings_archive WHERE id = old.id) BEGIN
+        DELETE FROM booking_search WHERE rowid = old.id;
+    END""",
+    "INSERT INTO booking_search (rowid, note) SELECT id, note FROM bookings WHERE note IS NOT NULL "
+    "UNION ALL SELECT id, note FROM bookings_archive WHERE note IS NOT NULL",
+]
+# PostgreSQL: GIN index over the German tsvector of the note (maintained by PostgreSQL)
+POSTGRES_SEARCH_DDL = [
+    "CREATE INDEX ix_bookings_note_search ON bookings USING gin (to_tsvector('german', coalesce(note, '')))",
+]
+
+
+@event.listens_for(Base.metadata, "after_create")
+def create_booking_search(target, connection, **kw):
+    """Create the search index once all tables exist"""
+    if connection.dialect.name == "postgresql":
+        exists = connection.exec_driver_sql("SELECT to_regclass('ix_bookings_note_search')").scalar()
+        statements = POSTGRES_SEARCH_DDL
+    else:
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE name = 'booking_search'"
+        ).scalar()
+        statements = SQLITE_SEARCH_DDL
+    if not exists:
+        for statement in statements:
+            connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Base.metadata, "after_drop")
+def drop_booking_search(target, connection, **kw):
+    """The FTS5 table is not part of the metadata (the PostgreSQL index goes with its table)"""
+    if connection.dialect.name != "postgresql":
+        connection.exec_driver_sql("DROP TABLE IF EXISTS booking_search")
+
+
+def advance_id_sequence(connection, table: str) -> None:
+    """PostgreSQL: move the id sequence past rows inserted with explicit ids"""
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+        )
+
+
+class Property(Base):
+    """A holiday house with its own parties, bookings and series"""
+    __tablename__ = "properties"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<Property(id={self.id}, name={self.name})>"
+
+
+@event.listens_for(Property.__table__, "after_create")
+def seed_default_property(target, connection, **kw):
+    """The house all existing data belongs to"""
+    connection.execute(target.insert().values(id=DEFAULT_PROPERTY_ID, name=DEFAULT_PROPERTY_NAME))
+    advance_id_sequence(connection, target.name)
+
+
 class Party(Base):
-    """Party model (optional - for future extensibility)"""
+    """Party (family) booking one property - ids are unique across properties"""
     __tablename__ = "parties"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    property_id: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=DEFAULT_PROPERTY_ID, server_default=str(DEFAULT_PROPERTY_ID), index=True
+    )
     name: Mapped[str] = mapped_column(String(100), nullable=False)
     color: Mapped[str] = mapped_column(String(7), nullable=False)  # Hex color
+    # Login of parties of further properties; the predefined parties use PARTY_n_PASSWORD
+    password_hash: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
 
     def __repr__(self) -> str:
         return f"<Party(id={self.id}, name={self.name})>"
 
 
+@event.listens_for(Party.__table__, "after_create")
+def seed_parties(target, connection, **kw):
+    """The predefined parties of the default property (their logins live in auth.py)"""
+    connection.execute(target.insert(), [{**party, "property_id": DEFAULT_PROPERTY_ID} for party in PARTIES])
+    advance_id_sequence(connection, target.name)
+
+
+class BookingSeries(Base):
+    """
+    Recurring booking: the first occurrence plus a recurrence rule.
+    Occurrences are never stored; series.py expands them for the requested range.
+    """
+    __tablename__ = "booking_series"
+    __table_args__ = {"sqlite_autoincrement": True}  # occurrence ids are derived from series ids
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    property_id: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=DEFAULT_PROPERTY_ID, server_default=str(DEFAULT_PROPERTY_ID)
+    )
+    party_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Comma-separated party ids taking turns per occurrence (None: always party_id)
+    party_rotation: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    start_date: Mapped[date] = mapped_column(Date, nullable=False)  # first occurrence
+    end_date: Mapped[date] = mapped_column(Date, nullable=False)
+    freq: Mapped[str] = mapped_column(String(10), nullable=False)  # weekly, yearly
+    interval: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    count: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    until: Mapped[date | None] = mapped_column(Date, nullable=True)
+    note: Mapped[str | None] = mapped_column(Text, nullable=True)
+    seq: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+
+    def __repr__(self) -> str:
+        return f"<BookingSeries(id={self.id}, {self.freq} from {self.start_date})>"
+
+
+class BookingSeriesException(Base):
+    """Skipped occurrence of a series, identified by its regular start date"""
+    __tablename__ = "booking_series_exceptions"
+
+    series_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("booking_series.id", ondelete="CASCADE"), primary_key=True
+    )
+    occurrence_date: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    def __repr__(self) -> str:
+        return f"<BookingSeriesException(series_id={self.series_id}, {self.occurrence_date})>"
+
+
+class BookingTombstone(Base):
+    """Marker for a deleted booking, so clients can sync deletions"""
+    __tablename__ = "booking_tombstones"
+    __table_args__ = (
+        Index("ix_booking_tombstones_property_seq", "property_id", "seq"),
+    )
+
+    booking_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    property_id: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=DEFAULT_PROPERTY_ID, server_default=str(DEFAULT_PROPERTY_ID)
+    )
+    seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        server_default=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"<BookingTombstone(booking_id={self.booking_id}, seq={self.seq})>"
+
+
+class RevokedToken(Base):
+    """Session token revoked by logout, kept until the token expires"""
+    __tablename__ = "revoked_tokens"
+
+    jti: Mapped[str] = mapped_column(String(64), primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<RevokedToken(jti={self.jti}, expires_at={self.expires_at})>"
+
+
+class AuditEntry(Base):
+    """One booking mutation: who, when, and the booking before and after (JSON)"""
+    __tablename__ = "audit_log"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)  # time of the write (UTC)
+    username: Mapped[str] = mapped_column(String(50), nullable=False)
+    action: Mapped[str] = mapped_column(String(20), nullable=False)  # create, update, delete, series_...
+    booking_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    before: Mapped[str | None] = mapped_column(Text, nullable=True)
+    after: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<AuditEntry(id={self.id}, {self.action} booking {self.booking_id} by {self.username})>"
+
+
+class IdempotencyRecord(Base):
+    """Stored response of a booking write sent with an Idempotency-Key"""
+    __tablename__ = "idempotency_keys"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)  # "<username>:<client key>"
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[int] = mapped_column(Integer, nullable=False)
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+    headers: Mapped[str] = mapped_column(Text, nullable=False, default="{}")
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<IdempotencyRecord(key={self.key}, status_code={self.status_code})>"
+
+
+class SyncState(Base):
+    """Booking change sequence counter - one row per property (id = property id)"""
+    __tablename__ = "sync_state"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    seq: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<SyncState(seq={self.seq})>"
+
+
+@event.listens_for(SyncState.__table__, "after_create")
+def seed_sync_state(target, connection, **kw):
+    """Create the counter row of the default property together with the table"""
+    connection.execute(target.insert().values(id=DEFAULT_PROPERTY_ID, seq=0))
+
+
+async def next_change_seq(db: "LazySession | AsyncSession", property_id: int = DEFAULT_PROPERTY_ID) -> int:
+    """
+    Allocate the next booking change sequence number of a property.
+    The counter row stays locked until the transaction ends, so concurrent
+    writers of the property are serialized and sequence numbers become visible
+    in commit order. Writers of different properties do not wait for each other.
+    """
+    result = await db.execute(
+        update(SyncState)
+        .where(SyncState.id == property_id)
+        .values(seq=SyncState.seq + 1)
+        .returning(SyncState.seq)
+    )
+    seq = result.scalar()
+    if seq is None:
+        await db.execute(insert(SyncState).values(id=property_id, seq=1))
+        seq = 1
+    return seq
+
+
+def dialect_insert(model):
+    """INSERT construct of the configured database, for ON CONFLICT clauses"""
+    return postgresql_insert(model) if IS_POSTGRES else sqlite_insert(model)
+
+
+def insert_tombstones(values: dict | list[dict]):
+    """
+    INSERT tombstones for deleted bookings. An older tombstone with the same
+    booking id (left by a database that reused ids) is replaced instead of
+    failing the delete.
+    """
+    statement = dialect_insert(BookingTombstone).values(values)
+    return statement.on_conflict_do_update(
+        index_elements=[BookingTombstone.booking_id],
+        set_={
+            "property_id": statement.excluded.property_id,
+            "seq": statement.excluded.seq,
+            "deleted_at": func.now(),
+        },
+    )
+
+
+def pool_status() -> dict:
+    """Checked-out connections and capacity of the engine pool (queue pools only)"""
+    pool = engine.pool
+    if not hasattr(pool, "checkedout") or not hasattr(pool, "size"):
+        return {"pool": type(pool).__name__}
+    capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+    return {
+        "pool": type(pool).__name__,
+        "checked_out": pool.checkedout(),
+        "capacity": capacity,
+        "saturation": round(pool.checkedout() / capacity, 2) if capacity else 0.0,
+    }
+
+
 # Database initialization
 async def init_db():
     """Initialize database - create all tables"""
@@ -81,11 +451,79 @@ async def init_db():
         await conn.run_sync(Base.metadata.create_all)
 
 
-# Dependency for FastAPI
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Dependency that provides a database session"""
-    async with async_session_maker() as session:
+class LazySession:
+    """
+    Request-scoped wrapper around AsyncSession.
+    No session exists - and no pool connection is checked out - until the first
+    statement runs, and the connection goes back to the pool as soon as the unit
+    of work is committed, rolled back or closed. Later statements open a new one.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]):
+        self._session_factory = session_factory
+        self._session: Optional[AsyncSession] = None
+
+    @property
+    def in_use(self) -> bool:
+        """Whether a session (and possibly a connection) is currently held"""
+        return self._session is not None
+
+    def _get_session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._session_factory()
+        return self._session
+
+    async def _connected_session(self) -> AsyncSession:
+        """Session with a checked-out connection (timed as its own span)"""
+        if self._session is None:
+            session = self._get_session()
+            with span("db.checkout"):
+                await session.connection()
+        return self._session
+
+    async def execute(self, statement, *args, **kwargs) -> Result:
+        return await (await self._connected_session()).execute(statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs) -> Any:
+        return await (await self._connected_session()).scalar(statement, *args, **kwargs)
+
+    async def connection(self) -> AsyncConnection:
+        """Connection of the current unit of work (e.g. for driver-level COPY)"""
+        return await (await self._connected_session()).connection()
+
+    def add(self, instance: Any) -> None:
+        self._get_session().add(instance)
+
+    async def commit(self) -> None:
+        """Commit the unit of work and release the connection"""
+        if self._session is None:
+            return
         try:
-            yield session
+            await self._session.commit()
         finally:
+            await self.close()
+
+    async def rollback(self) -> None:
+        """Roll back the unit of work and release the connection"""
+        if self._session is None:
+            return
+        try:
+            await self._session.rollback()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        """Release the session; uncommitted changes are rolled back"""
+        if self._session is not None:
+            session, self._session = self._session, None
             await session.close()
+
+
+# Dependency for FastAPI
+async def get_db() -> AsyncGenerator[LazySession, None]:
+    """Dependency that provides a lazily connecting database session"""
+    session = LazySession(async_session_maker)
+    try:
+        yield session
+    finally:
+        await session.close()
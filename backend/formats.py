@@ -0,0 +1,76 @@
+"""
+Bulk response formats for Ferienhaus Kalender
+`json` is the plain list[BookingResponse]. `columnar` is struct-of-arrays
+JSON: one array per field, parties dictionary-encoded and dates as day
+offsets from an epoch. `msgpack` is the columnar payload as MessagePack
+(needs the optional msgpack package).
+"""
+from datetime import date
+from typing import Any, Iterable, Literal
+
+from pydantic import TypeAdapter
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+
+BulkFormat = Literal["json", "columnar", "msgpack"]
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "columnar": "application/json",
+    "msgpack": "application/msgpack",
+}
+
+columnar_adapter = TypeAdapter(dict[str, Any])
+
+# Shown for bookings whose party is unknown
+UNKNOWN_PARTY_NAME = "Unbekannt"
+UNKNOWN_PARTY_COLOR = "#888888"
+
+
+def columnar(bookings: Iterable[Any], parties: list[dict]) -> dict:
+    """
+    Struct-of-arrays payload. `party` holds indexes into `parties`;
+    `start` and `end` are days since `epoch` (the earliest start date);
+    `series` is the series id of expanded occurrences (None for bookings).
+    """
+    bookings = list(bookings)
+    epoch = min((booking.start_date for booking in bookings), default=date(1970, 1, 1))
+    base = epoch.toordinal()
+    parties = list(parties)
+    party_index = {party["id"]: index for index, party in enumerate(parties)}
+
+    def party_of(party_id: int) -> int:
+        # Parties no longer in the property's list (removed, legacy rows) are
+        # added like the JSON format shows them
+        if party_id not in party_index:
+            party_index[party_id] = len(parties)
+            parties.append({"id": party_id, "name": UNKNOWN_PARTY_NAME, "color": UNKNOWN_PARTY_COLOR})
+        return party_index[party_id]
+
+    party = [party_of(booking.party_id) for booking in bookings]
+
+    return {
+        "format": "columnar",
+        "epoch": epoch.isoformat(),
+        "parties": parties,
+        "id": [booking.id for booking in bookings],
+        "party": party,
+        "start": [booking.start_date.toordinal() - base for booking in bookings],
+        "end": [booking.end_date.toordinal() - base for booking in bookings],
+        "note": [booking.note for booking in bookings],
+        "seq": [booking.seq for booking in bookings],
+        "version": [booking.version for booking in bookings],
+        "series": [getattr(booking, "series_id", None) for booking in bookings],
+    }
+
+
+def encode_columnar(bookings: Iterable[Any], parties: list[dict], bulk_format: BulkFormat) -> bytes:
+    """Serialize bookings as columnar JSON or MessagePack"""
+    payload = columnar(bookings, parties)
+    if bulk_format == "msgpack":
+        return msgpack.packb(payload, use_bin_type=True)
+    return columnar_adapter.dump_json(payload)
@@ -0,0 +1,242 @@
+"""
+Idempotency keys for booking writes
+A client may send an `Idempotency-Key` header with POST, PUT and DELETE. The
+first request with a key runs; its response is kept in a bounded TTL cache and
+in the idempotency_keys table - inserted in the transaction of the write, so a
+committed write always has its key - and a replay of the key gets that
+response without running the write again. Concurrent duplicates wait for the first
+execution instead of racing it.
+
+Keys are scoped per user and bound to the request they were first used with
+(method, path and body).
+"""
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from auth import User
+from cache import SingleFlight
+from database import IdempotencyRecord, LazySession
+
+
+# Configuration
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))  # seconds a key is remembered
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "1000"))  # in-memory entries
+
+MAX_KEY_LENGTH = 200
+REPLAYED_HEADER = "Idempotent-Replayed"
+STORED_HEADERS = ("etag",)
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    """Response of the first execution of a key"""
+    fingerprint: str
+    status_code: int
+    body: bytes
+    headers: dict[str, str]
+    expires_at: datetime
+
+    def to_response(self, replayed: bool) -> Response:
+        headers = dict(self.headers)
+        if replayed:
+            headers[REPLAYED_HEADER] = "true"
+        return Response(
+            content=self.body,
+            status_code=self.status_code,
+            media_type="application/json",
+            headers=headers
+        )
+
+
+class IdempotencyCache:
+    """Most recent stored responses, dropped after IDEMPOTENCY_TTL"""
+
+    def __init__(self, max_entries: int = IDEMPOTENCY_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._responses: OrderedDict[str, StoredResponse] = OrderedDict()
+        self.flight = SingleFlight()
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        stored = self._responses.get(key)
+        if stored is None:
+            return None
+        if stored.expires_at <= datetime.utcnow():
+            del self._responses[key]
+            return None
+        self._responses.move_to_end(key)
+        return stored
+
+    def put(self, key: str, stored: StoredResponse) -> None:
+        self._responses[key] = stored
+        self._responses.move_to_end(key)
+        while len(self._responses) > self.max_entries:
+            self._responses.popitem(last=False)
+
+    def clear(self) -> None:
+        self._responses.clear()
+
+
+# Stored responses of this process
+idempotency_cache = IdempotencyCache()
+
+
+async def request_fingerprint(request: Request) -> str:
+    """Hash of method, path and body - a key must not be reused for another request"""
+    digest = hashlib.sha256(f"{request.method} {request.url.path}\n".encode())
+    digest.update(await request.body())
+    return digest.hexdigest()
+
+
+async def load_stored(db: LazySession, key: str) -> Optional[StoredResponse]:
+    result = await db.execute(
+        select(IdempotencyRecord).where(
+            IdempotencyRecord.key == key,
+            IdempotencyRecord.expires_at > datetime.utcnow()
+        )
+    )
+    record = result.scalar()
+    await db.close()
+    if record is None:
+        return None
+    return StoredResponse(
+        fingerprint=record.fingerprint,
+        status_code=record.status_code,
+        body=record.body.encode(),
+        headers=json.loads(record.headers),
+        expires_at=record.expires_at
+    )
+
+
+def record_values(key: str, stored: StoredResponse) -> dict:
+    return {
+        "key": key,
+        "fingerprint": stored.fingerprint,
+        "status_code": stored.status_code,
+        "body": stored.body.decode(),
+        "headers": json.dumps(stored.headers),
+        "expires_at": stored.expires_at,
+    }
+
+
+async def save_stored(db: LazySession, key: str, stored: StoredResponse) -> None:
+    """Persist an error response (no write to go with) and drop expired keys"""
+    try:
+        await db.execute(delete(IdempotencyRecord).where(IdempotencyRecord.expires_at <= datetime.utcnow()))
+        await db.execute(insert(IdempotencyRecord).values(record_values(key, stored)))
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()  # stored meanwhile by another worker
+
+
+class KeyTaken(Exception):
+    """Another worker committed a write with the same key first"""
+
+
+Commit = Callable[[Any], Awaitable[None]]
+
+
+async def idempotent(
+    request: Request,
+    db: LazySession,
+    user: User,
+    key: Optional[str],
+    execute: Callable[[Commit], Awaitable[Any]],
+    status_code: int = 200,
+    response: Optional[Response] = None
+) -> Any:
+    """
+    Run a write once per Idempotency-Key.
+    execute(commit) does the write and calls commit(result) instead of
+    db.commit(): with a key, the response is stored in the same transaction,
+    so a write is never committed without its key (and never repeated by a
+    retry). Without a key, commit just commits.
+    4xx errors are stored and replayed as well; 5xx responses are not stored,
+    so the client can retry them.
+    """
+    if key is None:
+        async def commit(result: Any) -> None:
+            await db.commit()
+
+        return await execute(commit)
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail="Ungültiger Idempotency-Key")
+
+    scoped = f"{user.username}:{key}"
+    fingerprint = await request_fingerprint(request)
+    waited = scoped in idempotency_cache.flight
+
+    def stored_response(body: bytes, code: int, headers: dict[str, str]) -> StoredResponse:
+        return StoredResponse(
+            fingerprint=fingerprint,
+            status_code=code,
+            body=body,
+            headers=headers,
+            expires_at=datetime.utcnow() + timedelta(seconds=IDEMPOTENCY_TTL)
+        )
+
+    async def run() -> tuple[StoredResponse, bool]:
+        stored = idempotency_cache.get(scoped) or await load_stored(db, scoped)
+        if stored is not None:
+            idempotency_cache.put(scoped, stored)
+            return stored, True
+
+        committed: Optional[StoredResponse] = None
+
+        async def commit(result: Any) -> None:
+            """Insert the key next to the write, then commit both"""
+            nonlocal committed
+            headers = {
+                name: value for name, value in (response.headers.items() if response else [])
+                if name.lower() in STORED_HEADERS
+            }
+            committed = stored_response(result.model_dump_json().encode(), status_code, headers)
+            try:
+                await db.execute(
+                    delete(IdempotencyRecord).where(IdempotencyRecord.expires_at <= datetime.utcnow())
+                )
+                await db.execute(insert(IdempotencyRecord).values(record_values(scoped, committed)))
+                await db.commit()
+            except IntegrityError:
+                await db.rollback()  # the write is undone with it
+                raise KeyTaken()
+
+        try:
+            await execute(commit)
+            stored = committed
+        except KeyTaken:
+            stored = await load_stored(db, scoped)
+            if stored is None:
+                raise HTTPException(status_code=409, detail="Die Anfrage wird bereits bearbeitet")
+            idempotency_cache.put(scoped, stored)
+            return stored, True
+        except HTTPException as exc:
+            await db.rollback()
+            stored = stored_response(
+                json.dumps({"detail": exc.detail}).encode(), exc.status_code, dict(exc.headers or {})
+            )
+            if exc.status_code < 500:
+                await save_stored(db, scoped, stored)
+
+        if stored.status_code < 500:
+            idempotency_cache.put(scoped, stored)
+        return stored, False
+
+    stored, replayed = await idempotency_cache.flight.do(scoped, run)
+    if stored.fingerprint != fingerprint:
+        raise HTTPException(
+            status_code=422,
+            detail="Der Idempotency-Key wurde bereits für eine andere Anfrage verwendet"
+        )
+    return stored.to_response(replayed or waited)
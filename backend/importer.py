@@ -0,0 +1,350 @@
+"""
+Bulk import of bookings from iCalendar or CSV files for Ferienhaus Kalender
+The upload is parsed as a stream and handled in chunks of IMPORT_CHUNK_SIZE
+rows. Each chunk is validated, checked for overlaps with one range query plus
+the in-memory series, and inserted in one transaction under the property's
+change-sequence lock: PostgreSQL loads the rows with COPY, SQLite with one
+executemany INSERT. Memory stays bounded by the chunk size; only the per-row
+report grows with the file.
+
+Audit entries of a chunk are inserted in the same transaction rather than
+queued in the audit buffer, which is too small for a large import.
+"""
+import asyncio
+import csv
+import json
+import os
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from itertools import chain, islice
+from typing import Iterable, Iterator, Optional, TextIO
+
+from sqlalchemy import func, insert, select
+
+from auth import User, can_modify_booking
+from audit import booking_state
+from database import IS_POSTGRES, AuditEntry, Booking, LazySession, next_change_seq
+from archive import booking_history
+from cache import booking_snapshots
+from month_grid import month_grids
+from properties import PropertyInfo
+from series import booking_series
+
+
+# Configuration
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))  # rows per transaction
+
+CONFLICT = "Es gibt bereits eine Buchung in diesem Zeitraum"
+
+# Report counter of each row status
+STATUS_COUNTERS = {"created": "created", "conflict": "conflicts", "invalid": "invalid"}
+
+# CSV header names (lower case) and their German aliases
+CSV_COLUMNS = {
+    "party_id": "party", "party": "party", "familie": "party",
+    "start_date": "start_date", "von": "start_date",
+    "end_date": "end_date", "bis": "end_date",
+    "note": "note", "notiz": "note",
+}
+GERMAN_DATE = re.compile(r"(\d{1,2})\.(\d{1,2})\.(\d{4})")
+ICAL_ESCAPE = re.compile(r"\\([\\,;nN])")
+
+# Columns written by COPY; the remaining ones have server defaults
+COPY_COLUMNS = ["id", "property_id", "party_id", "start_date", "end_date", "note", "seq"]
+
+
+class ImportFormatError(Exception):
+    """The file is not a readable iCalendar or CSV file"""
+
+
+@dataclass
+class ImportRow:
+    """One booking read from the file (error set when it could not be read)"""
+    line: int
+    party: Optional[str] = None  # party id or name as given in the file
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    note: Optional[str] = None
+    error: Optional[str] = None
+    party_id: Optional[int] = None
+
+
+def import_format(filename: Optional[str], content_type: Optional[str]) -> str:
+    """"ical" for .ics files or text/calendar, "csv" otherwise"""
+    if (filename or "").lower().endswith(".ics") or (content_type or "").startswith("text/calendar"):
+        return "ical"
+    return "csv"
+
+
+def parse_date(value: str) -> date:
+    """ISO (2026-07-01) or German (1.7.2026) date - ValueError otherwise"""
+    value = value.strip()
+    match = GERMAN_DATE.fullmatch(value)
+    if match:
+        day, month, year = map(int, match.groups())
+        return date(year, month, day)
+    return date.fromisoformat(value)
+
+
+def read_csv(stream: TextIO) -> Iterator[ImportRow]:
+    """
+    Rows of a CSV file with a header line, separated by comma or semicolon.
+    Reads nothing until the first row is requested, so the header is read with
+    the first chunk in import_bookings' worker thread, never on the event loop.
+    """
+    header_line = stream.readline()
+    delimiter = ";" if header_line.count(";") > header_line.count(",") else ","
+    reader = csv.reader(chain([header_line], stream), delimiter=delimiter)
+    header = [CSV_COLUMNS.get(name.strip().lower()) for name in next(reader, [])]
+    if "start_date" not in header or "end_date" not in header:
+        raise ImportFormatError("Die CSV-Datei braucht die Spalten start_date und end_date")
+
+    for values in reader:
+        if not any(value.strip() for value in values):
+            continue
+        fields = {name: value.strip() for name, value in zip(header, values) if name}
+        row = ImportRow(line=reader.line_num, party=fields.get("party"), note=fields.get("note") or None)
+        try:
+            row.start_date = parse_date(fields.get("start_date", ""))
+            row.end_date = parse_date(fields.get("end_date", ""))
+        except ValueError:
+            row.error = "Ungültiges Datum"
+        yield row
+
+
+def unfolded_lines(stream: TextIO) -> Iterator[tuple[int, str]]:
+    """iCalendar content lines with continuation lines joined, numbered by their first line"""
+    pending, pending_line = None, 0
+    for number, raw in enumerate(stream, 1):
+        raw = raw.rstrip("\r\n")
+        if raw[:1] in (" ", "\t") and pending is not None:
+            pending += raw[1:]
+            continue
+        if pending:
+            yield pending_line, pending
+        pending, pending_line = raw, number
+    if pending:
+        yield pending_line, pending
+
+
+def ical_day(value: str) -> tuple[date, bool]:
+    """Day of a DATE or DATE-TIME value, and whether it ends the previous day (date or midnight)"""
+    day = datetime.strptime(value[:8], "%Y%m%d").date()
+    return day, len(value) == 8 or value[9:15] == "000000"
+
+
+def event_row(line: int, properties: dict[str, str]) -> ImportRow:
+    """Booking of a VEVENT - DTEND of all-day events is exclusive"""
+    summary = properties.get("SUMMARY")
+    row = ImportRow(line=line, note=ICAL_ESCAPE.sub(
+        lambda match: "\n" if match.group(1) in "nN" else match.group(1), summary
+    ) if summary else None)
+    if "RRULE" in properties:
+        row.error = "Wiederkehrende Termine bitte als Serie anlegen"
+        return row
+    try:
+        row.start_date, _ = ical_day(properties["DTSTART"])
+        row.end_date = row.start_date
+        if "DTEND" in properties:
+            end, exclusive = ical_day(properties["DTEND"])
+            row.end_date = end - timedelta(days=1) if exclusive and end > row.start_date else end
+    except (KeyError, ValueError):
+        row.error = "Ungültiges Datum"
+    return row
+
+
+def read_ical(stream: TextIO) -> Iterator[ImportRow]:
+    """One row per VEVENT of an iCalendar file"""
+    lines = unfolded_lines(stream)
+    first = next(lines, (0, ""))[1]
+    if first.strip().upper() != "BEGIN:VCALENDAR":
+        raise ImportFormatError("Keine gültige iCalendar-Datei")
+
+    event, event_line = None, 0
+    for number, content in lines:
+        name, _, value = content.partition(":")
+        name = name.split(";", 1)[0].upper()
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            event, event_line = {}, number
+        elif event is None:
+            continue
+        elif name == "END" and value.upper() == "VEVENT":
+            yield event_row(event_line, event)
+            event = None
+        else:
+            event.setdefault(name, value)
+
+
+def check_row(row: ImportRow, prop: PropertyInfo, user: User, default_party_id: Optional[int]) -> Optional[str]:
+    """Resolve the party of a row and return why it cannot be imported, if so"""
+    if row.error:
+        return row.error
+    if not row.party:
+        row.party_id = default_party_id
+    elif row.party.isdigit():
+        row.party_id = int(row.party)
+    else:
+        name = row.party.casefold()
+        row.party_id = next((party["id"] for party in prop.parties if party["name"].casefold() == name), None)
+
+    if row.party_id is None and not row.party:
+        return "Familie fehlt"
+    if row.party_id is None or prop.party(row.party_id) is None:
+        return "Ungültige Familie"
+    if not can_modify_booking(user, row.party_id):
+        return "Sie können nur Buchungen für Ihre eigene Familie erstellen"
+    if row.end_date < row.start_date:
+        return "Das Ende liegt vor dem Beginn"
+    return None
+
+
+class TakenRanges:
+    """Disjoint date ranges sorted by start - what a new booking must not overlap"""
+
+    def __init__(self, ranges: Iterable[tuple[date, date]]):
+        ordered = sorted(ranges)
+        self.starts = [start for start, _ in ordered]
+        self.ends = [end for _, end in ordered]
+
+    def overlaps(self, start_date: date, end_date: date) -> bool:
+        # Only the last range starting on or before end_date can reach start_date
+        index = bisect_right(self.starts, end_date) - 1
+        return index >= 0 and self.ends[index] >= start_date
+
+    def add(self, start_date: date, end_date: date) -> None:
+        index = bisect_right(self.starts, start_date)
+        self.starts.insert(index, start_date)
+        self.ends.insert(index, end_date)
+
+
+async def insert_bookings(db: LazySession, property_id: int, seq: int, rows: list[ImportRow]) -> list[int]:
+    """Insert the rows in one round trip and return their ids in row order"""
+    if IS_POSTGRES:
+        result = await db.execute(
+            select(func.nextval("bookings_id_seq")).select_from(func.generate_series(1, len(rows)))
+        )
+        ids = list(result.scalars())
+        connection = await (await db.connection()).get_raw_connection()
+        await connection.driver_connection.copy_records_to_table(
+            "bookings",
+            columns=COPY_COLUMNS,
+            records=[
+                (booking_id, property_id, row.party_id, row.start_date, row.end_date, row.note, seq)
+                for booking_id, row in zip(ids, rows)
+            ]
+        )
+        return ids
+
+    # Batched into multi-row INSERTs; accepted rows of a chunk never share a start date
+    result = await db.execute(
+        insert(Booking).returning(Booking.start_date, Booking.id),
+        [
+            {
+                "property_id": property_id,
+                "party_id": row.party_id,
+                "start_date": row.start_date,
+                "end_date": row.end_date,
+                "note": row.note,
+                "seq": seq,
+            }
+            for row in rows
+        ]
+    )
+    ids = dict(result.all())
+    return [ids[row.start_date] for row in rows]
+
+
+async def import_chunk(
+    db: LazySession,
+    prop: PropertyInfo,
+    user: User,
+    rows: list[ImportRow],
+    default_party_id: Optional[int] = None
+) -> list[dict]:
+    """Validate, overlap-check and insert one chunk - report entries in row order"""
+    report = []
+    candidates = []
+    for row in rows:
+        error = check_row(row, prop, user, default_party_id)
+        entry = {"line": row.line, "status": "invalid" if error else "created", "id": None, "detail": error}
+        report.append(entry)
+        if not error:
+            candidates.append((row, entry))
+    if not candidates:
+        return report
+
+    # Serializes with all other writers of the property until the commit
+    seq = await next_change_seq(db, prop.id)
+    first_day = min(row.start_date for row, _ in candidates)
+    last_day = max(row.end_date for row, _ in candidates)
+    history = booking_history()
+    result = await db.execute(
+        select(history.c.start_date, history.c.end_date)
+        .where(
+            history.c.property_id == prop.id,
+            history.c.start_date <= last_day,
+            history.c.end_date >= first_day
+        )
+    )
+    taken = TakenRanges(result.all())
+    registry = booking_series[prop.id]
+
+    # Earlier rows of the file win over later ones
+    accepted = []
+    for row, entry in candidates:
+        if taken.overlaps(row.start_date, row.end_date) or registry.conflict(row.start_date, row.end_date) is not None:
+            entry["status"], entry["detail"] = "conflict", CONFLICT
+        else:
+            taken.add(row.start_date, row.end_date)
+            accepted.append((row, entry))
+    if not accepted:
+        await db.rollback()
+        return report
+
+    ids = await insert_bookings(db, prop.id, seq, [row for row, _ in accepted])
+    now = datetime.utcnow()
+    await db.execute(
+        insert(AuditEntry),
+        [
+            {
+                "created_at": now,
+                "username": user.username,
+                "action": "create",
+                "booking_id": booking_id,
+                "before": None,
+                "after": json.dumps(booking_state({
+                    "party_id": row.party_id, "start_date": row.start_date, "end_date": row.end_date,
+                    "note": row.note, "version": 1
+                })),
+            }
+            for booking_id, (row, _) in zip(ids, accepted)
+        ]
+    )
+    await db.commit()
+    for booking_id, (_, entry) in zip(ids, accepted):
+        entry["id"] = booking_id
+    booking_snapshots[prop.id].invalidate()
+    month_grids[prop.id].invalidate(start_date=first_day, end_date=last_day)
+    return report
+
+
+async def import_bookings(
+    db: LazySession,
+    prop: PropertyInfo,
+    user: User,
+    rows: Iterator[ImportRow],
+    default_party_id: Optional[int] = None,
+    chunk_size: int = IMPORT_CHUNK_SIZE
+) -> dict:
+    """Import all rows chunk by chunk; the file, header included, is read in a worker thread"""
+    report = {"created": 0, "conflicts": 0, "invalid": 0, "rows": []}
+    while True:
+        chunk = await asyncio.to_thread(lambda: list(islice(rows, chunk_size)))
+        if not chunk:
+            break
+        report["rows"].extend(await import_chunk(db, prop, user, chunk, default_party_id))
+    for entry in report["rows"]:
+        report[STATUS_COUNTERS[entry["status"]]] += 1
+    return report
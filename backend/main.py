@@ -2,25 +2,55 @@
 Ferienhaus Kalender - FastAPI Backend
 Vacation rental booking calendar API with PostgreSQL
 """
+import asyncio
+import heapq
+import io
+import json
 import os
-from datetime import date
-from typing import Optional
+import re
+import time
+from datetime import date, datetime
+from typing import Literal, Optional
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, File, Form, Header, Path, Query, Request, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from pydantic import BaseModel, field_validator
-from sqlalchemy import select, and_, or_
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import FileResponse, JSONResponse
+from pydantic import BaseModel, TypeAdapter, field_validator, model_validator
+from sqlalchemy import Date, Integer, Text, select, insert, update, delete, exists, false, literal, extract, func, or_
 
-from database import get_db, init_db, Booking, Party
+from database import (
+    IS_POSTGRES, DEFAULT_PROPERTY_ID, get_db, init_db, pool_status, async_session_maker, next_change_seq, insert_tombstones,
+    LazySession, AuditEntry, Booking, BookingSeries, BookingSeriesException, BookingTombstone, Party, Property, SyncState
+)
+from compression import CompressionMiddleware, compressed_cache
+from cache import Snapshot, booking_snapshots
+from admission import admission, admit
+from formats import MEDIA_TYPES, UNKNOWN_PARTY_COLOR, UNKNOWN_PARTY_NAME, BulkFormat, encode_columnar, msgpack
+from audit import AUDITED_FIELDS, audit_log, booking_state, series_state
+from search import search_bookings_query
+from idempotency import Commit, idempotency_cache, idempotent
+from month_grid import build_month_grid, grid_bounds, month_grids
+from series import OCCURRENCE_ID_FACTOR, Series, booking_series, occurrence_id, restore_series, series_horizon
+from properties import PropertyInfo, properties, restore_properties
+from importer import ImportFormatError, import_bookings, import_format, read_csv, read_ical
+from archive import hot_window_start, archived_overlap_condition, booking_history, maintenance_loop, unarchive_booking
+from backup import BackupBusy, BackupInterrupted, BackupUnavailable, create_backup
+from profiling import ProfilingMiddleware, ProfilerBusy, profile_window, request_profiles
+from tracing import TracingMiddleware, span, tracer
+from monitoring import loop_monitor, READY_MAX_LOOP_LAG, READY_DB_TIMEOUT, READY_MAX_POOL_SATURATION
 from auth import (
-    verify_password,
+    authenticate,
+    hash_password,
     create_session_token,
     get_current_user,
+    get_admin_user,
     can_modify_booking,
+    revoke_token,
+    prune_loop,
+    restore_revoked_tokens,
+    revoked_tokens,
     User
 )
 
@@ -42,8 +72,8 @@ class BookingCreate(BaseModel):
     @field_validator('party_id')
     @classmethod
     def valid_party_id(cls, v):
-        if v < 1 or v > 4:
-            raise ValueError('party_id must be between 1 and 4')
+        if v < 1:
+            raise ValueError('party_id must be positive')
         return v
 
 
@@ -55,11 +85,152 @@ class BookingResponse(BaseModel):
     start_date: date
     end_date: date
     note: Optional[str]
+    seq: int
+    version: int
+    series_id: Optional[int] = None  # set for expanded occurrences of a booking series
 
     class Config:
         from_attributes = True
 
 
+class BookingUpdate(BookingCreate):
+    version: Optional[int] = None  # expected current version (optimistic concurrency)
+
+
+class SeriesCreate(BookingCreate):
+    """First occurrence plus recurrence rule; count and/or until end the series"""
+    freq: Literal["weekly", "yearly"]
+    interval: int = 1
+    count: Optional[int] = None
+    until: Optional[date] = None
+    party_rotation: Optional[list[int]] = None  # parties taking turns, e.g. for Christmas
+
+    @field_validator('interval')
+    @classmethod
+    def valid_interval(cls, v):
+        if v < 1 or v > 52:
+            raise ValueError('interval must be between 1 and 52')
+        return v
+
+    @field_validator('count')
+    @classmethod
+    def valid_count(cls, v):
+        if v is not None and (v < 1 or v > 1000):
+            raise ValueError('count must be between 1 and 1000')
+        return v
+
+    @field_validator('party_rotation')
+    @classmethod
+    def valid_rotation(cls, v):
+        if v is not None and (not v or len(v) > 12):
+            raise ValueError('party_rotation must list 1 to 12 party ids')
+        return v
+
+    @model_validator(mode='after')
+    def finite(self):
+        if self.count is None and self.until is None:
+            raise ValueError('count or until is required')
+        if self.until is not None and self.until < self.start_date:
+            raise ValueError('until must be after or equal to start_date')
+        rule = Series(
+            id=0, party_ids=(self.party_id,), start_date=self.start_date, end_date=self.end_date,
+            freq=self.freq, interval=self.interval, count=self.count, until=self.until
+        )
+        if rule.last_index >= OCCURRENCE_ID_FACTOR:
+            # Occurrence ids are derived from series id and index (see series.py)
+            raise ValueError(f'a series can have at most {OCCURRENCE_ID_FACTOR} occurrences')
+        return self
+
+
+class SeriesResponse(BaseModel):
+    id: int
+    party_id: int
+    party_rotation: list[int]
+    start_date: date
+    end_date: date
+    freq: str
+    interval: int
+    count: Optional[int]
+    until: Optional[date]
+    note: Optional[str]
+    seq: int
+    skipped: list[date]
+
+
+class SeriesExceptionCreate(BaseModel):
+    date: date  # regular start date of the occurrence to skip
+
+
+class BookingChangesResponse(BaseModel):
+    seq: int
+    upserts: list[BookingResponse]
+    deleted: list[int]
+
+
+class BookingStatsResponse(BaseModel):
+    year: int
+    party_id: int
+    bookings: int
+    days: int
+
+
+class DayBookingResponse(BaseModel):
+    id: int
+    party_id: int
+    position: Literal["start", "middle", "end", "single"]
+
+
+class CalendarDayResponse(BaseModel):
+    date: date
+    day: int
+    in_month: bool
+    bookings: list[DayBookingResponse]
+
+
+class MonthGridResponse(BaseModel):
+    year: int
+    month: int
+    start: date
+    end: date
+    days: list[CalendarDayResponse]
+
+
+class ImportRowResponse(BaseModel):
+    line: int  # line of the row (CSV) or of BEGIN:VEVENT (iCalendar)
+    status: Literal["created", "conflict", "invalid"]
+    id: Optional[int]  # id of the created booking
+    detail: Optional[str]
+
+
+class ImportResponse(BaseModel):
+    created: int
+    conflicts: int
+    invalid: int
+    rows: list[ImportRowResponse]
+
+
+class BackupResponse(BaseModel):
+    file: str  # name in BACKUP_DIR
+    size: int
+    seconds: float
+    steps: int
+
+
+class AuditEntryResponse(BaseModel):
+    id: int
+    created_at: datetime
+    username: str
+    action: str
+    booking_id: int
+    before: Optional[dict]
+    after: Optional[dict]
+
+
+class AuditPageResponse(BaseModel):
+    items: list[AuditEntryResponse]
+    next_before: Optional[int]  # pass as ?before= for the next (older) page
+
+
 class PartyResponse(BaseModel):
     id: int
     name: str
@@ -69,6 +240,53 @@ class PartyResponse(BaseModel):
         from_attributes = True
 
 
+class PartyCreate(BaseModel):
+    name: str
+    color: str
+    password: Optional[str] = None  # login of the party; without one only Admin books for it
+
+    @field_validator('name')
+    @classmethod
+    def valid_name(cls, v):
+        if not v.strip() or len(v) > 100:
+            raise ValueError('name must have 1 to 100 characters')
+        return v.strip()
+
+    @field_validator('color')
+    @classmethod
+    def valid_color(cls, v):
+        if not HEX_COLOR.fullmatch(v):
+            raise ValueError('color must be a hex color like #2A9D8F')
+        return v
+
+
+class PropertyCreate(BaseModel):
+    name: str
+    parties: list[PartyCreate]
+
+    @field_validator('name')
+    @classmethod
+    def valid_name(cls, v):
+        if not v.strip() or len(v) > 100:
+            raise ValueError('name must have 1 to 100 characters')
+        return v.strip()
+
+    @field_validator('parties')
+    @classmethod
+    def valid_parties(cls, v):
+        if not v or len(v) > 12:
+            raise ValueError('a property needs 1 to 12 parties')
+        if len({party.name for party in v}) != len(v):
+            raise ValueError('party names must be unique')
+        return v
+
+
+class PropertyResponse(BaseModel):
+    id: int
+    name: str
+    parties: list[PartyResponse]
+
+
 class MessageResponse(BaseModel):
     message: str
 
@@ -90,20 +308,36 @@ class UserResponse(BaseModel):
     username: str
 
 
-# Predefined parties with distinct colors
-PARTIES = [
-    {"id": 1, "name": "Siggi & Mausi", "color": "#E63946"},      # Rot
-    {"id": 2, "name": "Silke & Wolfi & Zoe", "color": "#2A9D8F"}, # Türkis
-    {"id": 3, "name": "Claudi & Wolfram", "color": "#E9C46A"},    # Gold
-    {"id": 4, "name": "Extern", "color": "#7B68EE"}               # Lila
-]
+booking_list_adapter = TypeAdapter(list[BookingResponse])
+
+HEX_COLOR = re.compile(r"#[0-9A-Fa-f]{6}")
+
+# Property-scoped routes are served under this prefix; the unscoped /api/...
+# routes act on the default property (DEFAULT_PROPERTY_ID)
+PROPERTY_PREFIX = "/api/properties/{property_id:int}"
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan - initialize database on startup"""
     await init_db()
+    async with async_session_maker() as session:
+        await restore_revoked_tokens(session)
+        await restore_properties(session)
+        await restore_series(session)
+    background = [
+        asyncio.create_task(maintenance_loop()),
+        asyncio.create_task(prune_loop()),
+        asyncio.create_task(loop_monitor.run()),
+        asyncio.create_task(audit_log.run()),
+    ]
     yield
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    await asyncio.to_thread(tracer.flush)  # traces still queued for the writer thread
+    async with async_session_maker() as session:
+        await audit_log.flush(session)  # events recorded since the last flush
 
 
 # FastAPI Application
@@ -123,41 +357,146 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Response compression (gzip, or brotli when installed)
+app.add_middleware(CompressionMiddleware)
+
+# Per-request profiling for admins (X-Profile: 1)
+app.add_middleware(ProfilingMiddleware)
+
+# Request tracing (TRACING=console|file) - outermost, so it times everything
+app.add_middleware(TracingMiddleware)
+
 
 # Helper functions
 def get_party_by_id(party_id: int) -> Optional[dict]:
-    """Get party info by ID"""
-    for party in PARTIES:
-        if party["id"] == party_id:
-            return party
-    return None
+    """Get party info by ID (party ids are unique across properties)"""
+    return properties.party(party_id)
+
+
+def current_property(request: Request, current_user: User = Depends(get_current_user)) -> PropertyInfo:
+    """
+    Property of the route: {property_id} of a property-scoped route, the
+    default property otherwise. Party users only see their own property.
+    """
+    property_id = request.path_params.get("property_id", DEFAULT_PROPERTY_ID)
+    info = properties.get(property_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Haus nicht gefunden")
+    if not properties.can_access(current_user, info.id):
+        raise HTTPException(status_code=403, detail="Kein Zugriff auf dieses Haus")
+    return info
+
+
+def get_property_party(prop: PropertyInfo, party_id: int) -> dict:
+    """Party of the property - 422 for parties of other properties or unknown ids"""
+    party = prop.party(party_id)
+    if not party:
+        raise HTTPException(status_code=422, detail="Ungültige Familie")
+    return party
 
 
-async def check_booking_overlap(
-    db: AsyncSession,
+def booking_overlap_condition(
+    property_id: int,
     start_date: date,
     end_date: date,
     exclude_id: Optional[int] = None
-) -> bool:
-    """Check if there's an overlapping booking"""
-    query = select(Booking).where(
-        and_(
-            Booking.start_date <= end_date,
-            Booking.end_date >= start_date
-        )
+):
+    """SQL condition: another booking of the property overlaps the given date range"""
+    other = Booking.__table__.alias("other")
+    condition = exists().where(
+        other.c.property_id == property_id,
+        other.c.start_date <= end_date,
+        other.c.end_date >= start_date
     )
     if exclude_id:
-        query = query.where(Booking.id != exclude_id)
+        condition = condition.where(other.c.id != exclude_id)
+    archived = archived_overlap_condition(property_id, start_date, end_date)
+    if archived is not None:
+        condition = or_(condition, archived)
+    return condition
 
-    result = await db.execute(query)
-    return result.scalar() is not None
+
+def booking_to_response(booking: Booking) -> BookingResponse:
+    """Build API response for a booking including party information"""
+    party = get_party_by_id(booking.party_id)
+    return BookingResponse(
+        id=booking.id,
+        party_id=booking.party_id,
+        party_name=party["name"] if party else UNKNOWN_PARTY_NAME,
+        party_color=party["color"] if party else UNKNOWN_PARTY_COLOR,
+        start_date=booking.start_date,
+        end_date=booking.end_date,
+        note=booking.note,
+        seq=booking.seq,
+        version=booking.version,
+        series_id=getattr(booking, "series_id", None)
+    )
+
+
+def series_to_response(series: Series) -> SeriesResponse:
+    return SeriesResponse(
+        id=series.id,
+        party_id=series.party_ids[0],
+        party_rotation=list(series.party_ids),
+        start_date=series.start_date,
+        end_date=series.end_date,
+        freq=series.freq,
+        interval=series.interval,
+        count=series.count,
+        until=series.until,
+        note=series.note,
+        seq=series.seq,
+        skipped=sorted(series.skipped)
+    )
+
+
+def with_occurrences(property_id: int, bookings: list, start_date: date, end_date: date) -> list:
+    """Merge the property's expanded series occurrences into bookings sorted by start date"""
+    occurrences = booking_series[property_id].occurrences(start_date, end_date)
+    if not occurrences:
+        return bookings
+    return list(heapq.merge(bookings, occurrences, key=lambda booking: booking.start_date))
+
+
+def raise_series_conflict(property_id: int, start_date: date, end_date: date) -> None:
+    """409 if an occurrence of a booking series of the property overlaps the range"""
+    if booking_series[property_id].conflict(start_date, end_date) is not None:
+        raise HTTPException(
+            status_code=409,
+            detail="Es gibt bereits eine Buchung in diesem Zeitraum"
+        )
+
+
+def snapshot_response(request: Request, snapshot: Snapshot, media_type: str = "application/json") -> Response:
+    """Serve a cached snapshot, answering conditional requests with 304"""
+    headers = {"ETag": snapshot.etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == snapshot.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type=media_type, headers=headers)
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """Extract the expected booking version from an If-Match header"""
+    if not if_match:
+        return None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Ungültiger If-Match Header")
 
 
 # Authentication Routes
 @app.post("/api/auth/login", response_model=LoginResponse)
-async def login(credentials: LoginRequest):
+async def login(
+    credentials: LoginRequest,
+    _: None = Depends(admit("login")),
+    db: LazySession = Depends(get_db)
+):
     """Authenticate user and return session token"""
-    user = verify_password(credentials.username, credentials.password)
+    user = await authenticate(db, credentials.username, credentials.password)
 
     if not user:
         raise HTTPException(
@@ -189,182 +528,894 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 
 
 @app.post("/api/auth/logout", response_model=MessageResponse)
-async def logout(current_user: User = Depends(get_current_user)):
-    """Logout endpoint (token invalidation handled client-side)"""
+async def logout(
+    current_user: User = Depends(get_current_user),
+    db: LazySession = Depends(get_db)
+):
+    """Logout endpoint - revokes the session token until it expires"""
+    await revoke_token(db, current_user)
     return MessageResponse(message="Erfolgreich abgemeldet")
 
 
 # API Routes
+@app.get("/api/properties", response_model=list[PropertyResponse])
+async def get_properties(current_user: User = Depends(get_current_user)):
+    """Properties visible to the user, with their parties - requires authentication"""
+    return [
+        PropertyResponse(id=info.id, name=info.name, parties=info.parties)
+        for info in properties
+        if properties.can_access(current_user, info.id)
+    ]
+
+
+@app.post("/api/properties", response_model=PropertyResponse, status_code=201)
+async def create_property(
+    property_data: PropertyCreate,
+    current_user: User = Depends(get_admin_user),
+    db: LazySession = Depends(get_db)
+):
+    """
+    Add a property with its parties - admin only. Its routes live under /api/properties/{id}/.
+    Parties with a password log in with their name, which must be unique across properties.
+    """
+    taken = {"Admin"} | {party["name"] for info in properties for party in info.parties}
+    for party in property_data.parties:
+        if party.password and party.name in taken:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Der Name {party.name} ist bereits vergeben"
+            )
+    password_hashes = [
+        await asyncio.to_thread(hash_password, party.password) if party.password else None
+        for party in property_data.parties
+    ]
+
+    result = await db.execute(insert(Property).values(name=property_data.name).returning(Property.id))
+    property_id = result.scalar_one()
+    result = await db.execute(
+        insert(Party)
+        .values([
+            {"property_id": property_id, "name": party.name, "color": party.color, "password_hash": password_hash}
+            for party, password_hash in zip(property_data.parties, password_hashes)
+        ])
+        .returning(Party.id, Party.name, Party.color)
+    )
+    parties = sorted(
+        ({"id": row.id, "name": row.name, "color": row.color} for row in result),
+        key=lambda party: party["id"]
+    )
+    # The property's own change sequence, so its writers never wait for other properties
+    await db.execute(insert(SyncState).values(id=property_id, seq=0))
+    await db.commit()
+
+    info = PropertyInfo(id=property_id, name=property_data.name, parties=parties)
+    properties.add(info)
+    return PropertyResponse(id=info.id, name=info.name, parties=info.parties)
+
+
 @app.get("/api/parties", response_model=list[PartyResponse])
-async def get_parties(current_user: User = Depends(get_current_user)):
-    """Get all available parties (families) - requires authentication"""
-    return PARTIES
+@app.get(f"{PROPERTY_PREFIX}/parties", response_model=list[PartyResponse])
+async def get_parties(prop: PropertyInfo = Depends(current_property)):
+    """Get the parties (families) of a property - requires authentication"""
+    return prop.parties
+
+
+def check_bulk_format(bulk_format: BulkFormat) -> None:
+    """Reject MessagePack when the optional package is missing"""
+    if bulk_format == "msgpack" and msgpack is None:
+        raise HTTPException(
+            status_code=406,
+            detail="MessagePack ist auf diesem Server nicht verfügbar"
+        )
 
 
 @app.get("/api/bookings", response_model=list[BookingResponse])
+@app.get(f"{PROPERTY_PREFIX}/bookings", response_model=list[BookingResponse])
 async def get_bookings(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    bulk_format: BulkFormat = Query("json", alias="format"),
+    prop: PropertyInfo = Depends(current_property),
+    db: LazySession = Depends(get_db)
 ):
-    """Get all bookings with party information - requires authentication"""
-    result = await db.execute(
-        select(Booking).order_by(Booking.start_date)
+    """
+    Get current and upcoming bookings with party information - requires authentication.
+    Bookings that ended before the hot window are served by /api/bookings/export;
+    series occurrences are included up to the series horizon.
+    format=columnar|msgpack returns struct-of-arrays instead of a list of objects.
+    Concurrent requests share one query; the serialized list is reused until the next write.
+    """
+    check_bulk_format(bulk_format)
+    window_start = hot_window_start()
+
+    async def build() -> bytes:
+        async with admission.slot("read"):
+            result = await db.execute(
+                select(Booking)
+                .where(Booking.property_id == prop.id, Booking.end_date >= window_start)
+                .order_by(Booking.start_date)
+            )
+            bookings = result.scalars().all()
+            await db.close()  # release the connection before serialization
+        bookings = with_occurrences(prop.id, bookings, window_start, series_horizon())
+        with span("serialize", items=len(bookings), format=bulk_format):
+            if bulk_format != "json":
+                return encode_columnar(bookings, prop.parties, bulk_format)
+            return booking_list_adapter.dump_json([booking_to_response(booking) for booking in bookings])
+
+    snapshot = await booking_snapshots[prop.id].get(("bookings", window_start, bulk_format), build)
+    return snapshot_response(request, snapshot, MEDIA_TYPES[bulk_format])
+
+
+@app.get("/api/bookings/changes", response_model=BookingChangesResponse)
+@app.get(f"{PROPERTY_PREFIX}/bookings/changes", response_model=BookingChangesResponse)
+async def get_booking_changes(
+    since: int = Query(0, ge=0),
+    prop: PropertyInfo = Depends(current_property),
+    _: None = Depends(admit("read")),
+    db: LazySession = Depends(get_db)
+):
+    """
+    Get bookings changed and deleted after change sequence `since` - requires authentication.
+    Sequence numbers count per property. The initial sync (since=0) only
+    contains bookings inside the hot window. Changed series are sent as their
+    occurrences up to the series horizon.
+    """
+    query = (
+        select(Booking)
+        .where(Booking.property_id == prop.id, Booking.seq > since)
+        .order_by(Booking.seq)
     )
+    if since == 0:
+        query = query.where(Booking.end_date >= hot_window_start())
+    result = await db.execute(query)
     bookings = result.scalars().all()
 
-    response = []
-    for booking in bookings:
-        party = get_party_by_id(booking.party_id)
-        response.append(BookingResponse(
-            id=booking.id,
-            party_id=booking.party_id,
-            party_name=party["name"] if party else "Unbekannt",
-            party_color=party["color"] if party else "#888888",
-            start_date=booking.start_date,
-            end_date=booking.end_date,
-            note=booking.note
-        ))
+    result = await db.execute(
+        select(BookingTombstone.booking_id, BookingTombstone.seq)
+        .where(BookingTombstone.property_id == prop.id, BookingTombstone.seq > since)
+        .order_by(BookingTombstone.seq)
+    )
+    tombstones = result.all()
+    await db.close()  # release the connection before serialization
+
+    changed_series = booking_series[prop.id].changed_since(since)
+    window_start, horizon = hot_window_start(), series_horizon()
+    occurrences = [
+        occurrence
+        for series in changed_series
+        for occurrence in series.occurrences(window_start, horizon)
+    ]
+    bookings = [*bookings, *occurrences]
+
+    latest = max(
+        [since]
+        + [booking.seq for booking in bookings]
+        + [tombstone.seq for tombstone in tombstones]
+    )
 
-    return response
+    with span("serialize", items=len(bookings)):
+        return BookingChangesResponse(
+            seq=latest,
+            upserts=[booking_to_response(booking) for booking in bookings],
+            deleted=[tombstone.booking_id for tombstone in tombstones]
+        )
+
+
+@app.get("/api/bookings/export", response_model=list[BookingResponse])
+@app.get(f"{PROPERTY_PREFIX}/bookings/export", response_model=list[BookingResponse])
+async def export_bookings(
+    from_date: Optional[date] = Query(None),
+    to_date: Optional[date] = Query(None),
+    bulk_format: BulkFormat = Query("json", alias="format"),
+    prop: PropertyInfo = Depends(current_property),
+    _: None = Depends(admit("read")),
+    db: LazySession = Depends(get_db)
+):
+    """
+    Export all bookings including history and all series occurrences,
+    optionally limited to a date range - requires authentication.
+    format=columnar|msgpack returns struct-of-arrays instead of a list of objects.
+    """
+    check_bulk_format(bulk_format)
+    history = booking_history()
+    query = select(history).where(history.c.property_id == prop.id).order_by(history.c.start_date)
+    if from_date:
+        query = query.where(history.c.end_date >= from_date)
+    if to_date:
+        query = query.where(history.c.start_date <= to_date)
+    result = await db.execute(query)
+    bookings = result.all()
+    await db.close()  # release the connection before serialization
+    bookings = with_occurrences(prop.id, bookings, from_date or date.min, to_date or date.max)
+
+    if bulk_format != "json":
+        with span("serialize", items=len(bookings), format=bulk_format):
+            body = encode_columnar(bookings, prop.parties, bulk_format)
+        return Response(content=body, media_type=MEDIA_TYPES[bulk_format])
+    return [booking_to_response(booking) for booking in bookings]
+
+
+@app.get("/api/bookings/search", response_model=list[BookingResponse])
+@app.get(f"{PROPERTY_PREFIX}/bookings/search", response_model=list[BookingResponse])
+async def search_bookings(
+    q: str = Query(min_length=1, max_length=200),
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    limit: int = Query(20, ge=1, le=100),
+    prop: PropertyInfo = Depends(current_property),
+    _: None = Depends(admit("read")),
+    db: LazySession = Depends(get_db)
+):
+    """Bookings whose note matches q, best match first, including the archive - requires authentication"""
+    query = search_bookings_query(prop.id, q, from_date, to_date, limit)
+    if query is None:
+        return []
+    result = await db.execute(query)
+    rows = result.all()
+    await db.close()
+    return [booking_to_response(row) for row in rows]
+
+
+@app.get("/api/bookings/stats", response_model=list[BookingStatsResponse])
+@app.get(f"{PROPERTY_PREFIX}/bookings/stats", response_model=list[BookingStatsResponse])
+async def booking_stats(
+    prop: PropertyInfo = Depends(current_property),
+    _: None = Depends(admit("read")),
+    db: LazySession = Depends(get_db)
+):
+    """Bookings and booked days per year and party over the whole history - requires authentication"""
+    history = booking_history()
+    year = extract("year", history.c.start_date)
+    if IS_POSTGRES:
+        days = history.c.end_date - history.c.start_date + 1
+    else:
+        days = func.julianday(history.c.end_date) - func.julianday(history.c.start_date) + 1
+    result = await db.execute(
+        select(
+            year.label("year"),
+            history.c.party_id,
+            func.count().label("bookings"),
+            func.sum(days).cast(Integer).label("days")
+        )
+        .where(history.c.property_id == prop.id)
+        .group_by(year, history.c.party_id)
+        .order_by(year, history.c.party_id)
+    )
+    rows = result.all()
+    await db.close()
+
+    return [
+        BookingStatsResponse(year=row.year, party_id=row.party_id, bookings=row.bookings, days=row.days)
+        for row in rows
+    ]
+
+
+@app.get("/api/calendar/month/{year}/{month}", response_model=MonthGridResponse)
+@app.get(f"{PROPERTY_PREFIX}/calendar/month/{{year}}/{{month}}", response_model=MonthGridResponse)
+async def get_month_grid(
+    request: Request,
+    year: int = Path(ge=1900, le=2200),
+    month: int = Path(ge=1, le=12),
+    prop: PropertyInfo = Depends(current_property),
+    db: LazySession = Depends(get_db)
+):
+    """
+    The 42 day cells of a month view with booking ids and positions - requires authentication.
+    Grids are cached per property and month; a booking write only invalidates the months it touches.
+    """
+    grid_start, grid_end = grid_bounds(year, month)
+
+    async def build() -> dict:
+        bookings = booking_history() if grid_start < hot_window_start() else Booking.__table__
+        async with admission.slot("read"):
+            result = await db.execute(
+                select(bookings.c.id, bookings.c.party_id, bookings.c.start_date, bookings.c.end_date)
+                .where(
+                    bookings.c.property_id == prop.id,
+                    bookings.c.start_date <= grid_end,
+                    bookings.c.end_date >= grid_start
+                )
+                .order_by(bookings.c.start_date)
+            )
+            rows = result.all()
+            await db.close()
+        rows = with_occurrences(prop.id, rows, grid_start, grid_end)
+        with span("serialize", items=len(rows), format="grid"):
+            return build_month_grid(year, month, rows)
+
+    snapshot = await month_grids[prop.id].get(year, month, build)
+    return snapshot_response(request, snapshot)
 
 
 @app.post("/api/bookings", response_model=BookingResponse, status_code=201)
+@app.post(f"{PROPERTY_PREFIX}/bookings", response_model=BookingResponse, status_code=201)
 async def create_booking(
     booking: BookingCreate,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    idempotency_key: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    prop: PropertyInfo = Depends(current_property),
+    _: None = Depends(admit("write")),
+    db: LazySession = Depends(get_db)
 ):
-    """Create a new booking - requires authentication and authorization"""
-    # Validate party exists
-    party = get_party_by_id(booking.party_id)
-    if not party:
-        raise HTTPException(status_code=400, detail="Ungültige Familie")
+    """
+    Create a new booking - requires authentication and authorization.
+    Retries with the same Idempotency-Key get the original response.
+    """
+    async def execute(commit: Commit) -> BookingResponse:
+        # Validate party exists in this property
+        get_property_party(prop, booking.party_id)
+
+        # Check authorization: users can only book for their own party
+        if not can_modify_booking(current_user, booking.party_id):
+            raise HTTPException(
+                status_code=403,
+                detail="Sie können nur Buchungen für Ihre eigene Familie erstellen"
+            )
 
-    # Check authorization: users can only book for their own party
-    if not can_modify_booking(current_user, booking.party_id):
-        raise HTTPException(
-            status_code=403,
-            detail="Sie können nur Buchungen für Ihre eigene Familie erstellen"
-        )
+        # Allocate the change sequence first - this serializes concurrent writers of the property
+        seq = await next_change_seq(db, prop.id)
+        raise_series_conflict(prop.id, booking.start_date, booking.end_date)  # in memory, no query
+
+        # Insert only if no booking overlaps - guard and insert are one statement
+        values = select(
+            literal(prop.id),
+            literal(booking.party_id),
+            literal(booking.start_date, Date),
+            literal(booking.end_date, Date),
+            literal(booking.note, Text),
+            literal(seq)
+        ).where(~booking_overlap_condition(prop.id, booking.start_date, booking.end_date))
+
+        with span("booking.overlap_check"):  # atomic with the insert
+            result = await db.execute(
+                insert(Booking)
+                .from_select(["property_id", "party_id", "start_date", "end_date", "note", "seq"], values)
+                .returning(*Booking.__table__.c)
+            )
+            db_booking = result.first()
 
-    # Check for overlapping bookings
-    if await check_booking_overlap(db, booking.start_date, booking.end_date):
-        raise HTTPException(
-            status_code=409,
-            detail="Es gibt bereits eine Buchung in diesem Zeitraum"
-        )
+        if not db_booking:
+            raise HTTPException(
+                status_code=409,
+                detail="Es gibt bereits eine Buchung in diesem Zeitraum"
+            )
 
-    # Create booking
-    db_booking = Booking(
-        party_id=booking.party_id,
-        start_date=booking.start_date,
-        end_date=booking.end_date,
-        note=booking.note
-    )
-    db.add(db_booking)
-    await db.commit()
-    await db.refresh(db_booking)
+        created = booking_to_response(db_booking)
+        await commit(created)
+        booking_snapshots[prop.id].invalidate()
+        month_grids[prop.id].invalidate(db_booking.id, db_booking.start_date, db_booking.end_date)
+        audit_log.record(current_user.username, "create", db_booking.id, after=booking_state(db_booking))
 
-    return BookingResponse(
-        id=db_booking.id,
-        party_id=db_booking.party_id,
-        party_name=party["name"],
-        party_color=party["color"],
-        start_date=db_booking.start_date,
-        end_date=db_booking.end_date,
-        note=db_booking.note
-    )
+        return created
+
+    return await idempotent(request, db, current_user, idempotency_key, execute, status_code=201)
 
 
 @app.put("/api/bookings/{booking_id}", response_model=BookingResponse)
+@app.put(f"{PROPERTY_PREFIX}/bookings/{{booking_id}}", response_model=BookingResponse)
 async def update_booking(
     booking_id: int,
-    booking_data: BookingCreate,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    booking_data: BookingUpdate,
+    response: Response,
+    request: Request,
+    if_match: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    prop: PropertyInfo = Depends(current_property),
+    _: None = Depends(admit("write")),
+    db: LazySession = Depends(get_db)
 ):
-    """Update a booking by ID - requires authentication and authorization"""
+    """
+    Update a booking by ID - requires authentication and authorization.
+    The expected version can be given as `version` in the body (409 if stale)
+    or as If-Match header (412 if stale).
+    """
+    async def execute(commit: Commit) -> BookingResponse:
+        expected_version = parse_if_match(if_match)
+        if expected_version is None:
+            expected_version = booking_data.version
+
+        # Validate new party exists in this property
+        get_property_party(prop, booking_data.party_id)
+
+        seq = await next_change_seq(db, prop.id)
+
+        # The row as it was before the update, for the audit log. Materialized
+        # before any row changes, so RETURNING can report the old values.
+        old = (
+            select(*(Booking.__table__.c[name] for name in ("id", *AUDITED_FIELDS)))
+            .where(Booking.id == booking_id)
+            .cte("old")
+            .prefix_with("MATERIALIZED")
+        )
+
+        # Single statement: authorization, version and overlap checks are part of the WHERE clause
+        conditions = [
+            Booking.id == booking_id,
+            Booking.property_id == prop.id,
+            Booking.id.in_(select(old.c.id)),
+            ~booking_overlap_condition(prop.id, booking_data.start_date, booking_data.end_date, exclude_id=booking_id)
+        ]
+        if not current_user.is_admin:
+            conditions.append(Booking.party_id == current_user.party_id)
+        if expected_version is not None:
+            conditions.append(Booking.version == expected_version)
+        if booking_series[prop.id].conflict(booking_data.start_date, booking_data.end_date) is not None:
+            conditions.append(false())  # reported as overlap by raise_update_failure
+
+        booking = None
+        if can_modify_booking(current_user, booking_data.party_id):
+            statement = (
+                update(Booking)
+                .where(*conditions)
+                .values(
+                    party_id=booking_data.party_id,
+                    start_date=booking_data.start_date,
+                    end_date=booking_data.end_date,
+                    note=booking_data.note,
+                    seq=seq,
+                    version=Booking.version + 1
+                )
+                .returning(Booking, *(select(old.c[name]).scalar_subquery() for name in AUDITED_FIELDS))
+                .execution_options(synchronize_session=False)
+            )
+            with span("booking.overlap_check"):  # atomic with the update
+                row = (await db.execute(statement)).first()
+                if row is None and await unarchive_booking(db, prop.id, booking_id):
+                    row = (await db.execute(statement)).first()  # archived (SQLite), now back in bookings
+            if row is not None:
+                booking, before = row[0], dict(zip(AUDITED_FIELDS, row[1:]))
+
+        if not booking:
+            await db.rollback()
+            await raise_update_failure(db, prop, booking_id, booking_data, current_user, expected_version, if_match)
+
+        updated = booking_to_response(booking)
+        response.headers["ETag"] = f'"{booking.version}"'
+        await commit(updated)
+        booking_snapshots[prop.id].invalidate()
+        month_grids[prop.id].invalidate(booking.id, booking.start_date, booking.end_date)
+        audit_log.record(
+            current_user.username, "update", booking.id,
+            before=booking_state(before), after=booking_state(booking)
+        )
+
+        return updated
+
+    return await idempotent(request, db, current_user, idempotency_key, execute, response=response)
+
+
+async def raise_update_failure(
+    db: LazySession,
+    prop: PropertyInfo,
+    booking_id: int,
+    booking_data: BookingUpdate,
+    current_user: User,
+    expected_version: Optional[int],
+    if_match: Optional[str]
+) -> None:
+    """Find out why a conditional update matched no row and raise the matching error"""
+    history = booking_history()  # the rollback moved an archived booking back to the archive
     result = await db.execute(
-        select(Booking).where(Booking.id == booking_id)
+        select(history.c.party_id, history.c.version)
+        .where(history.c.id == booking_id, history.c.property_id == prop.id)
     )
-    booking = result.scalar()
+    current = result.first()
 
-    if not booking:
+    if not current:
         raise HTTPException(status_code=404, detail="Buchung nicht gefunden")
 
     # Check authorization: users can only update their own party's bookings
-    if not can_modify_booking(current_user, booking.party_id):
+    if not can_modify_booking(current_user, current.party_id):
         raise HTTPException(
             status_code=403,
             detail="Sie können nur Ihre eigenen Buchungen bearbeiten"
         )
 
     # If changing party, check authorization for new party too
-    if booking_data.party_id != booking.party_id:
-        if not can_modify_booking(current_user, booking_data.party_id):
+    if not can_modify_booking(current_user, booking_data.party_id):
+        raise HTTPException(
+            status_code=403,
+            detail="Sie können keine Buchungen für andere Familien erstellen"
+        )
+
+    if expected_version is not None and current.version != expected_version:
+        raise HTTPException(
+            status_code=412 if if_match else 409,
+            detail="Die Buchung wurde zwischenzeitlich geändert",
+            headers={"ETag": f'"{current.version}"'}
+        )
+
+    raise HTTPException(
+        status_code=409,
+        detail="Es gibt bereits eine Buchung in diesem Zeitraum"
+    )
+
+
+@app.delete("/api/bookings/{booking_id}", response_model=MessageResponse)
+@app.delete(f"{PROPERTY_PREFIX}/bookings/{{booking_id}}", response_model=MessageResponse)
+async def delete_booking(
+    booking_id: int,
+    request: Request,
+    idempotency_key: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    prop: PropertyInfo = Depends(current_property),
+    _: None = Depends(admit("write")),
+    db: LazySession = Depends(get_db)
+):
+    """Delete a booking by ID - requires authentication and authorization"""
+    async def execute(commit: Commit) -> MessageResponse:
+        seq = await next_change_seq(db, prop.id)
+
+        # Check authorization: users can only delete their own party's bookings
+        conditions = [Booking.id == booking_id, Booking.property_id == prop.id]
+        if not current_user.is_admin:
+            conditions.append(Booking.party_id == current_user.party_id)
+
+        statement = (
+            delete(Booking)
+            .where(*conditions)
+            .returning(*Booking.__table__.c)
+            .execution_options(synchronize_session=False)
+        )
+        deleted = (await db.execute(statement)).first()
+        if deleted is None and await unarchive_booking(db, prop.id, booking_id):
+            deleted = (await db.execute(statement)).first()  # archived (SQLite), now back in bookings
+
+        if deleted is None:
+            await db.rollback()
+            history = booking_history()
+            result = await db.execute(
+                select(history.c.party_id).where(history.c.id == booking_id, history.c.property_id == prop.id)
+            )
+            if result.first() is None:
+                raise HTTPException(status_code=404, detail="Buchung nicht gefunden")
             raise HTTPException(
                 status_code=403,
-                detail="Sie können keine Buchungen für andere Familien erstellen"
+                detail="Sie können nur Ihre eigenen Buchungen löschen"
             )
 
-    # Validate new party exists
-    party = get_party_by_id(booking_data.party_id)
-    if not party:
-        raise HTTPException(status_code=400, detail="Ungültige Familie")
+        # Leave a tombstone so syncing clients learn about the deletion
+        await db.execute(
+            insert_tombstones({"booking_id": booking_id, "property_id": prop.id, "seq": seq})
+        )
+        message = MessageResponse(message="Buchung erfolgreich gelöscht")
+        await commit(message)
+        booking_snapshots[prop.id].invalidate()
+        month_grids[prop.id].invalidate(booking_id)
+        audit_log.record(current_user.username, "delete", booking_id, before=booking_state(deleted))
+
+        return message
 
-    # Check for overlapping bookings (exclude current booking)
-    if await check_booking_overlap(db, booking_data.start_date, booking_data.end_date, exclude_id=booking_id):
+    return await idempotent(request, db, current_user, idempotency_key, execute)
+
+
+def get_modifiable_series(prop: PropertyInfo, series_id: int, current_user: User) -> Series:
+    """Series of the property by ID if the user may change it - users can only change their own party's series"""
+    series = booking_series[prop.id].get(series_id)
+    if series is None:
+        raise HTTPException(status_code=404, detail="Serie nicht gefunden")
+    if not all(can_modify_booking(current_user, party_id) for party_id in series.party_ids):
+        raise HTTPException(
+            status_code=403,
+            detail="Sie können nur Ihre eigenen Buchungen bearbeiten"
+        )
+    return series
+
+
+@app.get("/api/series", response_model=list[SeriesResponse])
+@app.get(f"{PROPERTY_PREFIX}/series", response_model=list[SeriesResponse])
+async def get_series(prop: PropertyInfo = Depends(current_property)):
+    """All booking series of a property with their rules and skipped occurrences - requires authentication"""
+    return [
+        series_to_response(series)
+        for series in sorted(booking_series[prop.id], key=lambda series: series.start_date)
+    ]
+
+
+@app.post("/api/series", response_model=SeriesResponse, status_code=201)
+@app.post(f"{PROPERTY_PREFIX}/series", response_model=SeriesResponse, status_code=201)
+async def create_series(
+    series_data: SeriesCreate,
+    current_user: User = Depends(get_current_user),
+    prop: PropertyInfo = Depends(current_property),
+    _: None = Depends(admit("write")),
+    db: LazySession = Depends(get_db)
+):
+    """
+    Create a recurring booking series - requires authentication and authorization.
+    With party_rotation the occurrences take turns between those parties.
+    Rejected with 409 if any occurrence overlaps a booking or another series.
+    """
+    party_ids = tuple(series_data.party_rotation or [series_data.party_id])
+    for party_id in party_ids:
+        get_property_party(prop, party_id)
+    if not all(can_modify_booking(current_user, party_id) for party_id in party_ids):
+        raise HTTPException(
+            status_code=403,
+            detail="Sie können nur Buchungen für Ihre eigene Familie erstellen"
+        )
+
+    series = Series(
+        id=0,
+        party_ids=party_ids,
+        start_date=series_data.start_date,
+        end_date=series_data.end_date,
+        freq=series_data.freq,
+        interval=series_data.interval,
+        count=series_data.count,
+        until=series_data.until,
+        note=series_data.note
+    )
+    if series.duration.days >= series.period_days:
+        raise HTTPException(
+            status_code=400,
+            detail="Die Termine einer Serie dürfen sich nicht überschneiden"
+        )
+
+    seq = await next_change_seq(db, prop.id)
+    registry = booking_series[prop.id]
+
+    # Overlaps with bookings: fetch the bookings in the series' range, test each against the rule
+    first_day, last_day = series.start_date, series.last_end_date
+    history = booking_history()
+    with span("booking.overlap_check"):
+        result = await db.execute(
+            select(history.c.start_date, history.c.end_date)
+            .where(
+                history.c.property_id == prop.id,
+                history.c.start_date <= last_day,
+                history.c.end_date >= first_day
+            )
+        )
+        clash = any(
+            next(series.occurrences(row.start_date, row.end_date), None) is not None
+            for row in result
+        )
+    if clash or registry.series_conflict(series) is not None:
         raise HTTPException(
             status_code=409,
             detail="Es gibt bereits eine Buchung in diesem Zeitraum"
         )
 
-    # Update booking
-    booking.party_id = booking_data.party_id
-    booking.start_date = booking_data.start_date
-    booking.end_date = booking_data.end_date
-    booking.note = booking_data.note
+    result = await db.execute(
+        insert(BookingSeries)
+        .values(
+            property_id=prop.id,
+            party_id=party_ids[0],
+            party_rotation=",".join(map(str, party_ids)) if series_data.party_rotation else None,
+            start_date=series.start_date,
+            end_date=series.end_date,
+            freq=series.freq,
+            interval=series.interval,
+            count=series.count,
+            until=series.until,
+            note=series.note,
+            seq=seq
+        )
+        .returning(BookingSeries.id)
+    )
+    series.id, series.seq = result.scalar_one(), seq
+
+    # Registered before the commit: writers waiting for the change sequence must see it
+    registry.add(series)
+    try:
+        await db.commit()
+    except BaseException:
+        registry.remove(series.id)
+        raise
+    booking_snapshots[prop.id].invalidate()
+    month_grids[prop.id].invalidate(start_date=first_day, end_date=last_day)
+    audit_log.record(
+        current_user.username, "series_create", occurrence_id(series.id, 0), after=series_state(series)
+    )
+
+    return series_to_response(series)
+
 
+@app.delete("/api/series/{series_id}", response_model=MessageResponse)
+@app.delete(f"{PROPERTY_PREFIX}/series/{{series_id}}", response_model=MessageResponse)
+async def delete_series(
+    series_id: int,
+    current_user: User = Depends(get_current_user),
+    prop: PropertyInfo = Depends(current_property),
+    _: None = Depends(admit("write")),
+    db: LazySession = Depends(get_db)
+):
+    """Delete a series with all its occurrences - requires authentication and authorization"""
+    series = get_modifiable_series(prop, series_id, current_user)
+    seq = await next_change_seq(db, prop.id)
+
+    # Exceptions explicitly: SQLite does not enforce the cascade
+    await db.execute(delete(BookingSeriesException).where(BookingSeriesException.series_id == series_id))
+    result = await db.execute(
+        delete(BookingSeries).where(BookingSeries.id == series_id).returning(BookingSeries.id)
+    )
+    if result.first() is None:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="Serie nicht gefunden")
+
+    # Tombstones for the occurrences syncing clients may have received
+    tombstones = [
+        {"booking_id": occurrence.id, "property_id": prop.id, "seq": seq}
+        for occurrence in series.occurrences(hot_window_start(), series_horizon())
+    ]
+    if tombstones:
+        await db.execute(insert_tombstones(tombstones))
     await db.commit()
-    await db.refresh(booking)
+    booking_series[prop.id].remove(series_id)
+    booking_snapshots[prop.id].invalidate()
+    month_grids[prop.id].invalidate(start_date=series.start_date, end_date=series.last_end_date)
+    audit_log.record(
+        current_user.username, "series_delete", occurrence_id(series_id, 0), before=series_state(series)
+    )
 
-    return BookingResponse(
-        id=booking.id,
-        party_id=booking.party_id,
-        party_name=party["name"],
-        party_color=party["color"],
-        start_date=booking.start_date,
-        end_date=booking.end_date,
-        note=booking.note
+    return MessageResponse(message="Serie erfolgreich gelöscht")
+
+
+@app.post("/api/series/{series_id}/exceptions", response_model=SeriesResponse, status_code=201)
+@app.post(f"{PROPERTY_PREFIX}/series/{{series_id}}/exceptions", response_model=SeriesResponse, status_code=201)
+async def skip_series_occurrence(
+    series_id: int,
+    exception: SeriesExceptionCreate,
+    current_user: User = Depends(get_current_user),
+    prop: PropertyInfo = Depends(current_property),
+    _: None = Depends(admit("write")),
+    db: LazySession = Depends(get_db)
+):
+    """Skip one occurrence of a series, given by its start date - requires authentication and authorization"""
+    series = get_modifiable_series(prop, series_id, current_user)
+    seq = await next_change_seq(db, prop.id)
+
+    occurrence = next(series.occurrences(exception.date, exception.date), None)
+    if occurrence is None or occurrence.start_date != exception.date:
+        raise HTTPException(status_code=404, detail="Termin nicht gefunden")
+
+    await db.execute(
+        insert(BookingSeriesException).values(series_id=series_id, occurrence_date=exception.date)
+    )
+    await db.execute(update(BookingSeries).where(BookingSeries.id == series_id).values(seq=seq))
+    await db.execute(insert_tombstones({"booking_id": occurrence.id, "property_id": prop.id, "seq": seq}))
+
+    # Applied before the commit, like a new series, and undone if it fails
+    before = series_state(series)
+    previous_seq = series.seq
+    series.skipped.add(exception.date)
+    series.seq = seq
+    try:
+        await db.commit()
+    except BaseException:
+        series.skipped.discard(exception.date)
+        series.seq = previous_seq
+        raise
+    booking_snapshots[prop.id].invalidate()
+    month_grids[prop.id].invalidate(start_date=occurrence.start_date, end_date=occurrence.end_date)
+    audit_log.record(
+        current_user.username, "series_skip", occurrence.id, before=before, after=series_state(series)
     )
 
+    return series_to_response(series)
 
-@app.delete("/api/bookings/{booking_id}", response_model=MessageResponse)
-async def delete_booking(
-    booking_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+
+@app.post("/api/import", response_model=ImportResponse)
+@app.post(f"{PROPERTY_PREFIX}/import", response_model=ImportResponse)
+async def import_booking_file(
+    file: UploadFile = File(...),
+    party_id: Optional[int] = Form(None),
+    current_user: User = Depends(get_current_user),
+    prop: PropertyInfo = Depends(current_property),
+    _: None = Depends(admit("write")),
+    db: LazySession = Depends(get_db)
 ):
-    """Delete a booking by ID - requires authentication and authorization"""
-    result = await db.execute(
-        select(Booking).where(Booking.id == booking_id)
+    """
+    Import bookings from an iCalendar (.ics) or CSV file - requires authentication.
+    CSV needs the columns start_date and end_date, optionally party (id or
+    name) and note. party_id is used for rows without a party and for all
+    iCalendar events. Rows are imported in chunks; overlapping or invalid
+    rows are skipped and reported per row.
+    """
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", errors="replace", newline="")
+    try:
+        reader = read_ical if import_format(file.filename, file.content_type) == "ical" else read_csv
+        return await import_bookings(db, prop, current_user, reader(stream), party_id)
+    except ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        stream.detach()  # the upload closes its own file
+
+
+@app.get("/api/audit", response_model=AuditPageResponse)
+async def get_audit_log(
+    before: Optional[int] = Query(None, ge=1),
+    limit: int = Query(50, ge=1, le=500),
+    booking_id: Optional[int] = None,
+    current_user: User = Depends(get_admin_user),
+    db: LazySession = Depends(get_db)
+):
+    """Booking changes, newest first - admin only. Page backwards with ?before=next_before."""
+    await audit_log.flush(db)  # include events still waiting for the background writer
+
+    query = select(AuditEntry).order_by(AuditEntry.id.desc()).limit(limit + 1)
+    if before is not None:
+        query = query.where(AuditEntry.id < before)
+    if booking_id is not None:
+        query = query.where(AuditEntry.booking_id == booking_id)
+    result = await db.execute(query)
+    entries = result.scalars().all()
+    await db.close()
+
+    page = entries[:limit]
+    return AuditPageResponse(
+        items=[
+            AuditEntryResponse(
+                id=entry.id,
+                created_at=entry.created_at,
+                username=entry.username,
+                action=entry.action,
+                booking_id=entry.booking_id,
+                before=json.loads(entry.before) if entry.before else None,
+                after=json.loads(entry.after) if entry.after else None
+            )
+            for entry in page
+        ],
+        next_before=page[-1].id if len(entries) > limit else None
     )
-    booking = result.scalar()
 
-    if not booking:
-        raise HTTPException(status_code=404, detail="Buchung nicht gefunden")
 
-    # Check authorization: users can only delete their own party's bookings
-    if not can_modify_booking(current_user, booking.party_id):
+@app.post("/api/debug/profile")
+async def profile_workers(
+    seconds: float = Query(5, gt=0, le=60),
+    limit: int = Query(30, ge=1, le=200),
+    current_user: User = Depends(get_admin_user)
+):
+    """Sample this worker's event loop for `seconds` and return time per function - admin only"""
+    try:
+        return await profile_window(seconds, limit)
+    except ProfilerBusy:
         raise HTTPException(
-            status_code=403,
-            detail="Sie können nur Ihre eigenen Buchungen löschen"
+            status_code=409,
+            detail="Es läuft bereits eine Profilmessung"
         )
 
-    await db.delete(booking)
-    await db.commit()
 
-    return MessageResponse(message="Buchung erfolgreich gelöscht")
+@app.post("/api/backup", response_model=BackupResponse, status_code=201)
+async def backup_database(current_user: User = Depends(get_admin_user)):
+    """
+    Consistent online backup into BACKUP_DIR - admin only.
+    Bookings can be read and written while it runs.
+    """
+    try:
+        result = await create_backup()
+    except BackupBusy:
+        raise HTTPException(status_code=409, detail="Es läuft bereits ein Backup")
+    except (BackupUnavailable, BackupInterrupted) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return BackupResponse(file=os.path.basename(result.file), size=result.size, seconds=result.seconds, steps=result.steps)
+
+
+@app.get("/api/debug/profile/{profile_id}")
+async def get_request_profile(
+    profile_id: str,
+    current_user: User = Depends(get_admin_user)
+):
+    """cProfile stats of a request sent with `X-Profile: 1` - admin only"""
+    profile = request_profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Profil nicht gefunden"
+        )
+    return profile
+
+
+@app.get("/api/debug/health")
+async def get_worker_health(
+    current_user: User = Depends(get_admin_user),
+    db: LazySession = Depends(get_db)
+):
+    """Readiness details of this worker, including stall stacks of the loop monitor - admin only"""
+    return await worker_health(db)
 
 
 # Mount static files and serve frontend
@@ -383,8 +1434,75 @@ async def serve_frontend():
     return {"message": "Frontend not built. Run 'npm run build' in frontend directory."}
 
 
+@app.get("/sw.js")
+async def serve_service_worker():
+    """Serve the service worker from the root so it controls the whole app"""
+    service_worker_path = os.path.join(os.path.dirname(__file__), "../frontend/sw.js")
+    if not os.path.exists(service_worker_path):
+        raise HTTPException(status_code=404, detail="Service Worker nicht gefunden")
+    # Always revalidated: a new build must reach the browsers with its new precache list
+    return FileResponse(service_worker_path, media_type="text/javascript", headers={"Cache-Control": "no-cache"})
+
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "version": "2.0.0"}
+    """Health check endpoint (liveness)"""
+    return {"status": "healthy", "version": "2.0.0", "admission": admission.stats()}
+
+
+async def worker_health(db: LazySession) -> dict:
+    """Readiness of this worker with loop, database, pool, cache and admission details"""
+    problems = []
+
+    loop = loop_monitor.stats()
+    if loop_monitor.percentile(0.99) > READY_MAX_LOOP_LAG:
+        problems.append("event loop lag")
+
+    began = time.perf_counter()
+    try:
+        await asyncio.wait_for(db.execute(select(literal(1))), timeout=READY_DB_TIMEOUT)
+        database = {"ok": True}
+    except Exception as exc:
+        database = {"ok": False, "error": type(exc).__name__}
+        problems.append("database unreachable")
+    finally:
+        await db.close()
+    database["ping_ms"] = round((time.perf_counter() - began) * 1000, 2)
+
+    pool = pool_status()
+    if pool.get("saturation", 0.0) >= READY_MAX_POOL_SATURATION:
+        problems.append("connection pool exhausted")
+
+    return {
+        "status": "not_ready" if problems else "ready",
+        "problems": problems,
+        "loop": loop,
+        "database": database,
+        "pool": pool,
+        "caches": {
+            "booking_snapshots": len(booking_snapshots),
+            "month_grids": len(month_grids),
+            "booking_series": len(booking_series),
+            "properties": len(properties),
+            "idempotency_keys": len(idempotency_cache),
+            "audit_buffer": len(audit_log),
+            "compressed_bodies": len(compressed_cache),
+            "revoked_tokens": len(revoked_tokens),
+        },
+        "admission": admission.stats(),
+    }
+
+
+@app.get("/health/ready")
+async def readiness_check(db: LazySession = Depends(get_db)):
+    """
+    Readiness endpoint - 503 while the event loop lags, the database does not
+    answer in time or the connection pool is exhausted. Public, so it only
+    names the problems; the details are served by /api/debug/health.
+    """
+    health = await worker_health(db)
+    return JSONResponse(
+        status_code=503 if health["problems"] else 200,
+        content={"status": health["status"], "problems": health["problems"]}
+    )
@@ -0,0 +1,124 @@
+"""
+Event-loop monitoring for Ferienhaus Kalender
+Samples scheduling lag of the event loop and records where the loop was stuck
+when it stalled, for the readiness endpoint.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+
+# Configuration
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.1"))  # seconds between samples
+LOOP_STALL_THRESHOLD = float(os.getenv("LOOP_STALL_THRESHOLD", "0.1"))    # lag that counts as a stall
+LOOP_MONITOR_WINDOW = int(os.getenv("LOOP_MONITOR_WINDOW", "600"))        # samples kept (1 min at 0.1s)
+
+# Readiness thresholds (see /health/ready)
+READY_MAX_LOOP_LAG = float(os.getenv("READY_MAX_LOOP_LAG", "0.25"))            # p99 lag in seconds
+READY_DB_TIMEOUT = float(os.getenv("READY_DB_TIMEOUT", "1.0"))                 # seconds for SELECT 1
+READY_MAX_POOL_SATURATION = float(os.getenv("READY_MAX_POOL_SATURATION", "1.0"))  # checked out / capacity
+
+
+@dataclass(frozen=True)
+class Stall:
+    """One period in which the loop did not run the monitor on time"""
+    at: float            # wall clock time the stall ended
+    duration: float      # seconds of lag
+    stack: tuple[str, ...]  # innermost frames of the loop thread during the stall
+
+
+class LoopMonitor:
+    """
+    Measures how late a periodic sleep wakes up - the time every other
+    callback waits for the loop as well.
+    A watchdog thread captures the loop thread's stack while a stall is in
+    progress, so the slowest recent stalls say which code blocked the loop.
+    This works with any loop implementation (asyncio or uvloop).
+    """
+
+    def __init__(
+        self,
+        interval: float = LOOP_MONITOR_INTERVAL,
+        stall_threshold: float = LOOP_STALL_THRESHOLD,
+        window: int = LOOP_MONITOR_WINDOW,
+        keep_stalls: int = 10
+    ):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.samples: deque[float] = deque(maxlen=window)
+        self.stalls: deque[Stall] = deque(maxlen=keep_stalls * 10)
+        self.keep_stalls = keep_stalls
+        self.running = False
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._stall_stack: tuple[str, ...] = ()
+
+    async def run(self) -> None:
+        """Sample until cancelled - started as a task by the app lifespan"""
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        stop = threading.Event()
+        watchdog = threading.Thread(target=self._watch, args=(stop,), name="loop-watchdog", daemon=True)
+        self.running = True
+        watchdog.start()
+        try:
+            while True:
+                self._heartbeat = time.monotonic()
+                scheduled = loop.time() + self.interval
+                await asyncio.sleep(self.interval)
+                self.record(max(0.0, loop.time() - scheduled))
+        finally:
+            self.running = False
+            stop.set()
+
+    def record(self, lag: float) -> None:
+        """Add one lag sample; lags above the threshold are kept as stalls"""
+        self.samples.append(lag)
+        if lag >= self.stall_threshold:
+            self.stalls.append(Stall(at=time.time(), duration=lag, stack=self._stall_stack))
+        self._stall_stack = ()
+
+    def _watch(self, stop: threading.Event) -> None:
+        """Watchdog thread: remember what the loop thread runs while it is late"""
+        while not stop.wait(self.interval / 2):
+            if time.monotonic() - self._heartbeat < self.interval + self.stall_threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None and not self._stall_stack:
+                self._stall_stack = tuple(
+                    f"{entry.filename}:{entry.lineno} in {entry.name}"
+                    for entry in traceback.extract_stack(frame)[-5:]
+                )
+
+    def percentile(self, fraction: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def slowest(self) -> list[Stall]:
+        """Longest recent stalls, slowest first"""
+        return sorted(self.stalls, key=lambda stall: stall.duration, reverse=True)[:self.keep_stalls]
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "samples": len(self.samples),
+            "lag_p50_ms": round(self.percentile(0.5) * 1000, 2),
+            "lag_p99_ms": round(self.percentile(0.99) * 1000, 2),
+            "lag_max_ms": round(max(self.samples, default=0.0) * 1000, 2),
+            "slowest": [
+                {"at": stall.at, "duration_ms": round(stall.duration * 1000, 2), "stack": list(stall.stack)}
+                for stall in self.slowest()
+            ],
+        }
+
+
+# Monitor of the app's event loop
+loop_monitor = LoopMonitor()
@@ -0,0 +1,151 @@
+"""
+Month grids for Ferienhaus Kalender
+The calendar shows 6 weeks (42 days) starting on the Monday on or before the
+1st of the month. Each grid is computed with one sweep over the bookings that
+touch it and cached per month; a booking write only drops the months it
+touches.
+"""
+from datetime import date, timedelta
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from pydantic import TypeAdapter
+
+from cache import PerProperty, SingleFlight, Snapshot, snapshot_etag
+
+
+GRID_DAYS = 42
+
+grid_adapter = TypeAdapter(dict[str, Any])
+
+
+def grid_bounds(year: int, month: int) -> tuple[date, date]:
+    """First and last day shown for a month (both inclusive)"""
+    first = date(year, month, 1)
+    start = first - timedelta(days=first.weekday())
+    return start, start + timedelta(days=GRID_DAYS - 1)
+
+
+def position(booking: Any, day: date) -> str:
+    if booking.start_date == day == booking.end_date:
+        return "single"
+    if booking.start_date == day:
+        return "start"
+    if booking.end_date == day:
+        return "end"
+    return "middle"
+
+
+def build_month_grid(year: int, month: int, bookings: Iterable[Any]) -> dict:
+    """
+    42 day cells with the bookings of each day.
+    Bookings must be sorted by start_date; they enter the active set on their
+    first visible day and leave it after their last one.
+    """
+    start, end = grid_bounds(year, month)
+    ends: dict[int, list] = {}
+    pending = iter(bookings)
+    upcoming = next(pending, None)
+    active: dict[int, Any] = {}
+    days = []
+
+    for offset in range(GRID_DAYS):
+        day = start + timedelta(days=offset)
+        while upcoming is not None and upcoming.start_date <= day:
+            if upcoming.end_date >= day:
+                active[upcoming.id] = upcoming
+                ends.setdefault((upcoming.end_date - start).days, []).append(upcoming.id)
+            upcoming = next(pending, None)
+
+        days.append({
+            "date": day.isoformat(),
+            "day": day.day,
+            "in_month": day.month == month,
+            "bookings": [
+                {"id": booking.id, "party_id": booking.party_id, "position": position(booking, day)}
+                for booking in active.values()
+            ],
+        })
+        for booking_id in ends.pop(offset, ()):
+            del active[booking_id]
+
+    return {"year": year, "month": month, "start": start.isoformat(), "end": end.isoformat(), "days": days}
+
+
+class MonthGridCache:
+    """
+    Serialized month grids keyed by (year, month).
+    Each entry remembers the booking ids it shows, so a write drops exactly
+    the months that showed the booking before and the months covering its
+    new dates. A build that raced with any write is returned but not stored.
+    """
+
+    def __init__(self):
+        self._grids: dict[tuple[int, int], Snapshot] = {}
+        self._booking_ids: dict[tuple[int, int], frozenset[int]] = {}
+        self._writes = 0
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.builds = 0
+
+    def __len__(self) -> int:
+        return len(self._grids)
+
+    def __contains__(self, key: tuple[int, int]) -> bool:
+        return key in self._grids
+
+    async def get(self, year: int, month: int, build: Callable[[], Awaitable[dict]]) -> Snapshot:
+        """Return the grid of a month, building it at most once between writes"""
+        key = (year, month)
+        snapshot = self._grids.get(key)
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+        return await self._flight.do((key, self._writes), lambda: self._build(key, build))
+
+    async def _build(self, key: tuple[int, int], build: Callable[[], Awaitable[dict]]) -> Snapshot:
+        writes = self._writes
+        self.builds += 1
+        grid = await build()
+        body = grid_adapter.dump_json(grid)
+        snapshot = Snapshot(body=body, etag=snapshot_etag(body))
+        if writes == self._writes:
+            self._grids[key] = snapshot
+            self._booking_ids[key] = frozenset(
+                booking["id"] for day in grid["days"] for booking in day["bookings"]
+            )
+        return snapshot
+
+    def invalidate(
+        self,
+        booking_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> int:
+        """Drop the months showing booking_id or overlapping start_date..end_date"""
+        self._writes += 1
+        touched = [
+            key for key in self._grids
+            if booking_id in self._booking_ids[key]
+            or (start_date is not None and self._overlaps(key, start_date, end_date))
+        ]
+        for key in touched:
+            del self._grids[key]
+            del self._booking_ids[key]
+        return len(touched)
+
+    @staticmethod
+    def _overlaps(key: tuple[int, int], start_date: date, end_date: date) -> bool:
+        first, last = grid_bounds(*key)
+        return first <= end_date and last >= start_date
+
+    def clear(self) -> None:
+        """Drop all grids and reset counters"""
+        self._writes += 1
+        self._grids.clear()
+        self._booking_ids.clear()
+        self.hits = 0
+        self.builds = 0
+
+
+# Month grid caches, per property
+month_grids: PerProperty[MonthGridCache] = PerProperty(MonthGridCache)
@@ -0,0 +1,204 @@
+"""
+On-demand profiling for Ferienhaus Kalender
+Nothing here runs unless an admin asks for it: the sampling profiler thread
+only exists during a profiling window, and the per-request profiler only
+wraps requests that carry the X-Profile header with an admin token.
+"""
+import asyncio
+import cProfile
+import itertools
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from types import CodeType
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from auth import verify_session_token
+
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Only one profiler can be active per process (cProfile hooks the interpreter)
+_active = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    """Raised when another profile is already running"""
+
+
+def describe(code: CodeType) -> dict:
+    return {"function": code.co_qualname, "file": code.co_filename, "line": code.co_firstlineno}
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread (the event loop) at a fixed interval.
+    Every coroutine the loop runs during the window is covered, and the
+    profiled code itself is not slowed down. Samples in which the loop waits
+    in the selector count as idle.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = 0
+        self.idle = 0
+        self.own: Counter = Counter()
+        self.total: Counter = Counter()
+
+    def sample(self) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        self.samples += 1
+        if frame.f_code.co_name == "select" and "selectors" in frame.f_code.co_filename:
+            self.idle += 1
+            return
+        self.own[frame.f_code] += 1
+        seen = set()
+        while frame is not None:
+            if frame.f_code not in seen:
+                seen.add(frame.f_code)
+                self.total[frame.f_code] += 1
+            frame = frame.f_back
+
+    def run(self, seconds: float) -> None:
+        """Sample until the window ends (blocking - run in a worker thread)"""
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            self.sample()
+            time.sleep(self.interval)
+
+    def stats(self, limit: int = 30) -> dict:
+        """Functions by samples spent anywhere in their call tree"""
+        return {
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "idle_samples": self.idle,
+            "functions": [
+                {
+                    **describe(code),
+                    "own_samples": self.own[code],
+                    "total_samples": count,
+                    "own_ms": round(self.own[code] * self.interval * 1000, 1),
+                    "total_ms": round(count * self.interval * 1000, 1),
+                }
+                for code, count in self.total.most_common(limit)
+            ],
+        }
+
+
+async def profile_window(seconds: float, limit: int = 30) -> dict:
+    """Sample the running event loop for the given window"""
+    if not _active.acquire(blocking=False):
+        raise ProfilerBusy()
+    try:
+        profiler = SamplingProfiler(threading.get_ident())
+        await asyncio.to_thread(profiler.run, seconds)
+    finally:
+        _active.release()
+    return {"seconds": seconds, **profiler.stats(limit)}
+
+
+def cprofile_stats(profile: cProfile.Profile, limit: int = 30) -> dict:
+    """Functions of a finished cProfile run by cumulative time"""
+    stats = pstats.Stats(profile)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return {
+        "total_ms": round(stats.total_tt * 1000, 1),
+        "functions": [
+            {
+                "function": name,
+                "file": filename,
+                "line": line,
+                "calls": calls,
+                "own_ms": round(own * 1000, 3),
+                "total_ms": round(total * 1000, 3),
+            }
+            for (filename, line, name), (_, calls, own, total, _) in rows
+        ],
+    }
+
+
+class RequestProfiles:
+    """Most recent per-request profiles, retrievable by id"""
+
+    def __init__(self, max_entries: int = 20):
+        self.max_entries = max_entries
+        self._profiles: OrderedDict[str, dict] = OrderedDict()
+        self._ids = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def next_id(self) -> str:
+        return str(next(self._ids))
+
+    def store(self, profile_id: str, stats: dict) -> None:
+        self._profiles[profile_id] = stats
+        while len(self._profiles) > self.max_entries:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        return self._profiles.get(profile_id)
+
+    def clear(self) -> None:
+        self._profiles.clear()
+
+
+# Finished per-request profiles of this process
+request_profiles = RequestProfiles()
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling single requests with cProfile.
+    Only requests with an `X-Profile: 1` header and an admin token are
+    profiled; the response carries X-Profile-Id for GET /api/debug/profile/{id}.
+    cProfile sees the whole thread, so other requests the loop runs meanwhile
+    appear in the profile too - use it on a quiet worker.
+    """
+
+    def __init__(self, app: ASGIApp, profiles: Optional[RequestProfiles] = None):
+        self.app = app
+        self.profiles = profiles if profiles is not None else request_profiles
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not any(name == b"x-profile" for name, _ in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        token = headers.get("authorization", "").removeprefix("Bearer ")
+        user = verify_session_token(token) if token else None
+        if headers.get(PROFILE_HEADER) != "1" or user is None or not user.is_admin:
+            await self.app(scope, receive, send)
+            return
+
+        if not _active.acquire(blocking=False):
+            await self.app(scope, receive, send)  # another profile is running
+            return
+
+        profile_id = self.profiles.next_id()
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(PROFILE_ID_HEADER, profile_id)
+            await send(message)
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            try:
+                await self.app(scope, receive, send_with_id)
+            finally:
+                profile.disable()
+        finally:
+            _active.release()
+        self.profiles.store(profile_id, {"path": scope["path"], **cprofile_stats(profile)})
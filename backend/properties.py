@@ -0,0 +1,86 @@
+"""
+Properties (houses) and their parties for Ferienhaus Kalender
+Every booking, series and party belongs to one property. Properties and
+parties are few and rarely change, so they are held in memory (restored on
+startup, like booking series) and routes resolve them without a query.
+"""
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth import User
+from database import DEFAULT_PROPERTY_ID, DEFAULT_PROPERTY_NAME, PARTIES, Party, Property
+
+
+@dataclass
+class PropertyInfo:
+    """A property with its parties ({"id", "name", "color"})"""
+    id: int
+    name: str
+    parties: list[dict] = field(default_factory=list)
+
+    def party(self, party_id: int) -> Optional[dict]:
+        for party in self.parties:
+            if party["id"] == party_id:
+                return party
+        return None
+
+
+class PropertyDirectory:
+    """All properties and the property of every party"""
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self._properties)
+
+    def __iter__(self) -> Iterator[PropertyInfo]:
+        return iter(sorted(self._properties.values(), key=lambda info: info.id))
+
+    def get(self, property_id: int) -> Optional[PropertyInfo]:
+        return self._properties.get(property_id)
+
+    def add(self, info: PropertyInfo) -> None:
+        self._properties[info.id] = info
+        for party in info.parties:
+            self._parties[party["id"]] = (info.id, party)
+
+    def party(self, party_id: int) -> Optional[dict]:
+        """Party by ID, whatever property it belongs to"""
+        entry = self._parties.get(party_id)
+        return entry[1] if entry else None
+
+    def property_of_party(self, party_id: Optional[int]) -> Optional[int]:
+        entry = self._parties.get(party_id)
+        return entry[0] if entry else None
+
+    def can_access(self, user: User, property_id: int) -> bool:
+        """Admins see all properties, party users the one of their party"""
+        return user.is_admin or self.property_of_party(user.party_id) == property_id
+
+    def clear(self) -> None:
+        """Back to the default property with the predefined parties"""
+        self._properties: dict[int, PropertyInfo] = {}
+        self._parties: dict[int, tuple[int, dict]] = {}
+        self.add(PropertyInfo(id=DEFAULT_PROPERTY_ID, name=DEFAULT_PROPERTY_NAME, parties=list(PARTIES)))
+
+
+# Properties of this database
+properties = PropertyDirectory()
+
+
+async def restore_properties(db: AsyncSession) -> None:
+    """Load all properties and their parties on startup"""
+    result = await db.execute(select(Party).order_by(Party.id))
+    parties: dict[int, list[dict]] = {}
+    for party in result.scalars():
+        parties.setdefault(party.property_id, []).append(
+            {"id": party.id, "name": party.name, "color": party.color}
+        )
+    result = await db.execute(select(Property).order_by(Property.id))
+    for row in result.scalars():
+        default = list(PARTIES) if row.id == DEFAULT_PROPERTY_ID else []
+        properties.add(PropertyInfo(id=row.id, name=row.name, parties=parties.get(row.id) or default))
@@ -0,0 +1,80 @@
+"""
+Full-text search over booking notes for Ferienhaus Kalender
+SQLite matches the FTS5 table `booking_search` (prefix matching per word,
+ranked by bm25); PostgreSQL matches the German tsvector GIN index (stemming,
+ranked by ts_rank). Both look up matches in the index and then fetch the
+bookings by id, so a search does not scan the booking history.
+"""
+import re
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import column, func, literal_column, select, table, union_all
+
+from database import IS_POSTGRES, Booking, BookingArchive
+from archive import BOOKING_COLUMNS
+
+
+WORD = re.compile(r"\w+")
+
+booking_search = table("booking_search", column("rowid"), column("note"))
+
+
+def fts_query(text: str) -> Optional[str]:
+    """FTS5 query for user input: every word must match as a prefix; None without words"""
+    words = WORD.findall(text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def date_conditions(bookings, from_date: Optional[date], to_date: Optional[date]) -> list:
+    """Bookings overlapping from_date..to_date (open-ended if omitted)"""
+    conditions = []
+    if from_date is not None:
+        conditions.append(bookings.c.end_date >= from_date)
+    if to_date is not None:
+        conditions.append(bookings.c.start_date <= to_date)
+    return conditions
+
+
+def search_bookings_query(
+    property_id: int,
+    text: str,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    limit: int = 20
+):
+    """Select of the property's matching bookings (all of BOOKING_COLUMNS), best match first - None if nothing to match"""
+    if IS_POSTGRES:
+        bookings = Booking.__table__
+        document = func.to_tsvector(literal_column("'german'"), func.coalesce(bookings.c.note, ""))
+        query = func.websearch_to_tsquery(literal_column("'german'"), text)
+        rank = func.ts_rank(document, query)
+        return (
+            select(*(bookings.c[name] for name in BOOKING_COLUMNS), rank.label("rank"))
+            .where(
+                bookings.c.property_id == property_id,
+                document.op("@@")(query),
+                *date_conditions(bookings, from_date, to_date)
+            )
+            .order_by(rank.desc(), bookings.c.start_date)
+            .limit(limit)
+        )
+
+    match = fts_query(text)
+    if match is None:
+        return None
+    # bm25 is lower for better matches; one branch per table, each joining matches by id
+    branches = [
+        select(*(source.c[name] for name in BOOKING_COLUMNS), func.bm25(literal_column("booking_search")).label("rank"))
+        .join(booking_search, booking_search.c.rowid == source.c.id)
+        .where(
+            literal_column("booking_search").op("MATCH")(match),
+            source.c.property_id == property_id,
+            *date_conditions(source, from_date, to_date)
+        )
+        for source in (Booking.__table__, BookingArchive.__table__)
+    ]
+    results = union_all(*branches).subquery("results")
+    return select(results).order_by(results.c.rank, results.c.start_date).limit(limit)
@@ -0,0 +1,229 @@
+"""
+Recurring booking series for Ferienhaus Kalender
+A series is one row: the first occurrence plus a rule (weekly or yearly every
+`interval`, limited by `count` and/or `until`), optionally rotating through
+parties. Occurrences are computed arithmetically for the requested range only,
+so a 20-year series costs nothing outside the window being looked at.
+
+All series live in memory (restored on startup, like revoked tokens), which
+lets booking writes check them for overlaps without an extra query. Writes
+update the registry while still holding the change-sequence lock. Each
+property has its own registry, so checks only look at that house's series.
+"""
+import os
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache import PerProperty
+from database import BookingSeries, BookingSeriesException
+
+
+# Configuration
+SERIES_HORIZON_YEARS = int(os.getenv("SERIES_HORIZON_YEARS", "2"))  # years ahead listed by /api/bookings
+
+# Occurrence ids are negative, so they never collide with booking ids
+OCCURRENCE_ID_FACTOR = 100_000
+
+
+def occurrence_id(series_id: int, index: int) -> int:
+    return -(series_id * OCCURRENCE_ID_FACTOR + index)
+
+
+def series_horizon(today: Optional[date] = None) -> date:
+    """Last day for which list endpoints without an explicit range expand series"""
+    today = today or date.today()
+    return date(today.year + SERIES_HORIZON_YEARS, 12, 31)
+
+
+def add_years(day: date, years: int) -> date:
+    try:
+        return day.replace(year=day.year + years)
+    except ValueError:  # Feb 29 in a non-leap year
+        return day.replace(year=day.year + years, day=28)
+
+
+@dataclass(frozen=True)
+class Occurrence:
+    """One expanded occurrence - shaped like a booking row for the list endpoints"""
+    series_id: int
+    index: int
+    party_id: int
+    start_date: date
+    end_date: date
+    note: Optional[str]
+    seq: int
+    version: int = 1
+
+    @property
+    def id(self) -> int:
+        return occurrence_id(self.series_id, self.index)
+
+
+@dataclass
+class Series:
+    """Recurrence rule of a booking series plus its skipped occurrences"""
+    id: int
+    party_ids: tuple[int, ...]
+    start_date: date
+    end_date: date
+    freq: str
+    interval: int = 1
+    count: Optional[int] = None
+    until: Optional[date] = None
+    note: Optional[str] = None
+    seq: int = 0
+    skipped: set[date] = field(default_factory=set)
+
+    @property
+    def duration(self) -> timedelta:
+        return self.end_date - self.start_date
+
+    @property
+    def period_days(self) -> int:
+        """Shortest distance between two occurrence starts"""
+        return 7 * self.interval if self.freq == "weekly" else 365 * self.interval
+
+    def occurrence_start(self, index: int) -> date:
+        if self.freq == "weekly":
+            return self.start_date + timedelta(weeks=index * self.interval)
+        return add_years(self.start_date, index * self.interval)
+
+    @property
+    def last_index(self) -> int:
+        """Index of the last occurrence (-1 if the rule yields none)"""
+        last = self.count - 1 if self.count is not None else None
+        if self.until is not None:
+            if self.freq == "weekly":
+                by_until = (self.until - self.start_date).days // (7 * self.interval)
+            else:
+                by_until = (self.until.year - self.start_date.year) // self.interval
+                if self.occurrence_start(by_until) > self.until:
+                    by_until -= 1
+            last = by_until if last is None else min(last, by_until)
+        return last
+
+    @property
+    def last_end_date(self) -> date:
+        return self.occurrence_start(max(self.last_index, 0)) + self.duration
+
+    def occurrence(self, index: int) -> Occurrence:
+        start = self.occurrence_start(index)
+        return Occurrence(
+            series_id=self.id,
+            index=index,
+            party_id=self.party_ids[index % len(self.party_ids)],
+            start_date=start,
+            end_date=start + self.duration,
+            note=self.note,
+            seq=self.seq,
+        )
+
+    def first_index_ending_after(self, day: date) -> int:
+        """Lower bound for the first occurrence ending on or after day"""
+        if self.freq == "weekly":
+            days = (day - self.start_date - self.duration).days
+            return max(0, -(-days // (7 * self.interval)))
+        return max(0, (day.year - self.start_date.year - 1) // self.interval)
+
+    def occurrences(self, start_date: date, end_date: date) -> Iterator[Occurrence]:
+        """Occurrences overlapping start_date..end_date, skipping exceptions"""
+        last = self.last_index
+        index = self.first_index_ending_after(start_date)
+        while index <= last:
+            occurrence = self.occurrence(index)
+            if occurrence.start_date > end_date:
+                break
+            if occurrence.end_date >= start_date and occurrence.start_date not in self.skipped:
+                yield occurrence
+            index += 1
+
+
+def series_from_row(row: BookingSeries, skipped: Optional[set[date]] = None) -> Series:
+    rotation = row.party_rotation.split(",") if row.party_rotation else [row.party_id]
+    return Series(
+        id=row.id,
+        party_ids=tuple(int(party_id) for party_id in rotation),
+        start_date=row.start_date,
+        end_date=row.end_date,
+        freq=row.freq,
+        interval=row.interval,
+        count=row.count,
+        until=row.until,
+        note=row.note,
+        seq=row.seq,
+        skipped=skipped or set(),
+    )
+
+
+class SeriesRegistry:
+    """All booking series of the database, for expansion and overlap checks"""
+
+    def __init__(self):
+        self._series: dict[int, Series] = {}
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def __iter__(self) -> Iterator[Series]:
+        return iter(list(self._series.values()))
+
+    def get(self, series_id: int) -> Optional[Series]:
+        return self._series.get(series_id)
+
+    def add(self, series: Series) -> None:
+        self._series[series.id] = series
+
+    def remove(self, series_id: int) -> Optional[Series]:
+        return self._series.pop(series_id, None)
+
+    def occurrences(self, start_date: date, end_date: date) -> list[Occurrence]:
+        """Occurrences of all series overlapping the range, by start date"""
+        found = [
+            occurrence
+            for series in self._series.values()
+            for occurrence in series.occurrences(start_date, end_date)
+        ]
+        return sorted(found, key=lambda occurrence: occurrence.start_date)
+
+    def conflict(self, start_date: date, end_date: date, exclude_id: Optional[int] = None) -> Optional[Occurrence]:
+        """First occurrence of another series overlapping the range"""
+        for series in self._series.values():
+            if series.id == exclude_id:
+                continue
+            occurrence = next(series.occurrences(start_date, end_date), None)
+            if occurrence is not None:
+                return occurrence
+        return None
+
+    def series_conflict(self, candidate: Series) -> Optional[Occurrence]:
+        """First occurrence of another series colliding with an occurrence of candidate"""
+        for occurrence in candidate.occurrences(candidate.start_date, candidate.last_end_date):
+            clash = self.conflict(occurrence.start_date, occurrence.end_date, exclude_id=candidate.id)
+            if clash is not None:
+                return clash
+        return None
+
+    def changed_since(self, seq: int) -> list[Series]:
+        return [series for series in self._series.values() if series.seq > seq]
+
+    def clear(self) -> None:
+        self._series.clear()
+
+
+# Booking series of this process, per property
+booking_series: PerProperty[SeriesRegistry] = PerProperty(SeriesRegistry)
+
+
+async def restore_series(db: AsyncSession) -> None:
+    """Load all series and their exceptions on startup"""
+    result = await db.execute(select(BookingSeriesException))
+    skipped: dict[int, set[date]] = {}
+    for exception in result.scalars():
+        skipped.setdefault(exception.series_id, set()).add(exception.occurrence_date)
+    result = await db.execute(select(BookingSeries))
+    for row in result.scalars():
+        booking_series[row.property_id].add(series_from_row(row, skipped.get(row.id)))
@@ -6,6 +6,7 @@ import pytest
 from typing import AsyncGenerator
 
 from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 
 # Set test environment before importing app
@@ -17,7 +18,14 @@ os.environ["PARTY_4_PASSWORD"] = "test4"
 os.environ["ADMIN_PASSWORD"] = "admin123"
 os.environ["SESSION_SECRET_KEY"] = "test-secret-key"
 
-from database import Base, get_db
+from database import Base, LazySession, get_db
+from cache import booking_snapshots
+from month_grid import month_grids
+from idempotency import idempotency_cache
+from audit import audit_log
+from series import booking_series
+from properties import properties
+from auth import revoked_tokens
 from main import app
 
 
@@ -34,10 +42,13 @@ test_async_session_maker = async_sessionmaker(
 )
 
 
-async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
+async def override_get_db() -> AsyncGenerator[LazySession, None]:
     """Override database dependency for tests"""
-    async with test_async_session_maker() as session:
+    session = LazySession(test_async_session_maker)
+    try:
         yield session
+    finally:
+        await session.close()
 
 
 # Override the dependency
@@ -49,6 +60,13 @@ async def db_session() -> AsyncGenerator[AsyncSession, None]:
     """Create tables and provide a database session"""
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    booking_snapshots.clear()
+    month_grids.clear()
+    idempotency_cache.clear()
+    audit_log.clear()
+    booking_series.clear()
+    properties.clear()
+    revoked_tokens.clear()
 
     async with test_async_session_maker() as session:
         yield session
@@ -65,6 +83,64 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
         yield ac
 
 
+class QueryCounter:
+    """Records SQL statements sent to the test database"""
+
+    def __init__(self):
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def reset(self) -> None:
+        self.statements.clear()
+
+
+@pytest.fixture
+def query_counter() -> QueryCounter:
+    """Count SQL statements executed while the test runs"""
+    counter = QueryCounter()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.statements.append(statement)
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    yield counter
+    event.remove(test_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+class PoolEvents:
+    """Records connection checkouts and checkins on the test pool"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkins = 0
+
+    @property
+    def checked_out(self) -> int:
+        return self.checkouts - self.checkins
+
+
+@pytest.fixture
+def pool_events() -> PoolEvents:
+    """Count pool checkouts/checkins while the test runs"""
+    events = PoolEvents()
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        events.checkouts += 1
+
+    def on_checkin(dbapi_connection, connection_record):
+        events.checkins += 1
+
+    pool = test_engine.sync_engine.pool
+    event.listen(pool, "checkout", on_checkout)
+    event.listen(pool, "checkin", on_checkin)
+    yield events
+    event.remove(pool, "checkout", on_checkout)
+    event.remove(pool, "checkin", on_checkin)
+
+
 @pytest.fixture
 def auth_headers_admin() -> dict[str, str]:
     """Get auth headers for admin user"""
@@ -0,0 +1,123 @@
+"""
+Tests for admission control and load shedding
+"""
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from datetime import date, timedelta
+
+from admission import AdmissionController, EndpointClass, Overloaded, admission
+
+
+def make_controller(capacity: int = 2, max_wait: float = 0.5, queue: int = 2) -> AdmissionController:
+    return AdmissionController(
+        capacity=capacity,
+        max_wait=max_wait,
+        classes=[
+            EndpointClass(name="write", limit=capacity, max_queue=queue, priority=0),
+            EndpointClass(name="read", limit=capacity, max_queue=queue, priority=2),
+        ]
+    )
+
+
+class TestAdmissionController:
+    """Tests for the slot accounting"""
+
+    @pytest.mark.asyncio
+    async def test_admits_up_to_capacity(self):
+        """Requests within capacity are admitted without waiting"""
+        controller = make_controller(capacity=2)
+
+        await controller.acquire("read")
+        await controller.acquire("write")
+
+        assert controller.active == 2
+        controller.release("read")
+        controller.release("write")
+        assert controller.active == 0
+
+    @pytest.mark.asyncio
+    async def test_full_queue_sheds(self):
+        """Requests beyond capacity and queue are shed immediately"""
+        controller = make_controller(capacity=1, queue=1)
+        await controller.acquire("read")
+
+        waiting = asyncio.create_task(controller.acquire("read"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(Overloaded):
+            await controller.acquire("read")
+        assert controller.stats()["classes"]["read"]["shed"] == 1
+        assert controller.stats()["classes"]["read"]["waiting"] == 1
+
+        controller.release("read")
+        await waiting
+        controller.release("read")
+
+    @pytest.mark.asyncio
+    async def test_wait_timeout_sheds(self):
+        """Queued requests are shed after max_wait"""
+        controller = make_controller(capacity=1, max_wait=0.01)
+        await controller.acquire("read")
+
+        with pytest.raises(Overloaded):
+            await controller.acquire("read")
+
+        assert controller.stats()["classes"]["read"]["waiting"] == 0
+        controller.release("read")
+        await controller.acquire("read")  # the abandoned waiter does not block new requests
+
+    @pytest.mark.asyncio
+    async def test_writes_served_before_reads(self):
+        """A freed slot goes to a waiting write even if a read queued first"""
+        controller = make_controller(capacity=1)
+        await controller.acquire("read")
+        order = []
+
+        async def waiter(name: str):
+            await controller.acquire(name)
+            order.append(name)
+            controller.release(name)
+
+        read = asyncio.create_task(waiter("read"))
+        await asyncio.sleep(0)
+        write = asyncio.create_task(waiter("write"))
+        await asyncio.sleep(0)
+
+        controller.release("read")
+        await asyncio.gather(read, write)
+
+        assert order == ["write", "read"]
+
+
+class TestLoadShedding:
+    """Tests for overloaded endpoints"""
+
+    @pytest.mark.asyncio
+    async def test_overloaded_write_returns_503(self, client: AsyncClient, auth_headers_admin: dict, monkeypatch):
+        """A shed request gets 503 with Retry-After"""
+        monkeypatch.setattr(admission.classes["write"], "max_queue", 0)
+        monkeypatch.setattr(admission.classes["write"], "limit", 1)
+        await admission.acquire("write")
+        try:
+            today = date.today() + timedelta(days=40)
+            response = await client.post(
+                "/api/bookings",
+                headers=auth_headers_admin,
+                json={"party_id": 1, "start_date": str(today), "end_date": str(today)}
+            )
+        finally:
+            admission.release("write")
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+
+    @pytest.mark.asyncio
+    async def test_stats_exposed_in_health(self, client: AsyncClient):
+        """Queue depth and shed counts are part of the health response"""
+        response = await client.get("/health")
+
+        classes = response.json()["admission"]["classes"]
+        assert set(classes) == {"read", "write", "login"}
+        assert {"active", "waiting", "shed"} <= set(classes["write"])
@@ -0,0 +1,179 @@
+"""
+Tests for the hot window, booking archive and partition DDL
+"""
+import pytest
+from httpx import AsyncClient
+from datetime import date, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.schema import CreateTable
+
+from archive import archive_bookings, hot_window_start, run_maintenance
+from database import Booking, BookingArchive
+
+
+OLD_START = date(date.today().year - 3, 6, 1)
+
+
+async def add_booking(db_session, start: date, days: int = 3, party_id: int = 1) -> Booking:
+    booking = Booking(party_id=party_id, start_date=start, end_date=start + timedelta(days=days - 1), seq=1)
+    db_session.add(booking)
+    await db_session.commit()
+    return booking
+
+
+class TestHotWindow:
+    """Tests for the hot window boundary"""
+
+    def test_starts_january_first_of_last_year(self):
+        """By default the current and the previous year are hot"""
+        assert hot_window_start(date(2026, 10, 19)) == date(2025, 1, 1)
+        assert hot_window_start(date(2026, 1, 1)) == date(2025, 1, 1)
+
+
+class TestArchiveBookings:
+    """Tests for the SQLite archive mover"""
+
+    @pytest.mark.asyncio
+    async def test_moves_only_old_bookings(self, db_session):
+        """Bookings that ended before the hot window move to the archive"""
+        old = await add_booking(db_session, OLD_START)
+        current = await add_booking(db_session, date.today())
+
+        moved = await archive_bookings(db_session)
+
+        assert moved == 1
+        assert (await db_session.scalars(select(Booking.id))).all() == [current.id]
+        archived = (await db_session.scalars(select(BookingArchive))).all()
+        assert [(booking.id, booking.start_date) for booking in archived] == [(old.id, OLD_START)]
+
+    @pytest.mark.asyncio
+    async def test_maintenance_is_idempotent(self, db_session):
+        """Running maintenance twice archives each booking once"""
+        await add_booking(db_session, OLD_START)
+        factory = async_sessionmaker(db_session.bind)
+
+        await run_maintenance(factory)
+        await run_maintenance(factory)
+
+        assert await db_session.scalar(select(func.count()).select_from(BookingArchive)) == 1
+
+
+class TestHistoryEndpoints:
+    """Hot endpoints prune, export and stats see everything"""
+
+    @pytest.mark.asyncio
+    async def test_list_excludes_history(self, client: AsyncClient, auth_headers_admin: dict, db_session):
+        """Old bookings are not part of the calendar list or the initial sync"""
+        await add_booking(db_session, OLD_START)
+        current = await add_booking(db_session, date.today())
+
+        response = await client.get("/api/bookings", headers=auth_headers_admin)
+        assert [booking["id"] for booking in response.json()] == [current.id]
+
+        response = await client.get("/api/bookings/changes?since=0", headers=auth_headers_admin)
+        assert [booking["id"] for booking in response.json()["upserts"]] == [current.id]
+
+    @pytest.mark.asyncio
+    async def test_export_includes_archive(self, client: AsyncClient, auth_headers_party1: dict, db_session):
+        """Export reads hot and archived bookings, optionally by date range"""
+        old = await add_booking(db_session, OLD_START)
+        current = await add_booking(db_session, date.today())
+        await archive_bookings(db_session)
+
+        response = await client.get("/api/bookings/export", headers=auth_headers_party1)
+        assert response.status_code == 200
+        assert [booking["id"] for booking in response.json()] == [old.id, current.id]
+
+        response = await client.get(
+            f"/api/bookings/export?to_date={OLD_START + timedelta(days=30)}",
+            headers=auth_headers_party1
+        )
+        assert [booking["id"] for booking in response.json()] == [old.id]
+
+    @pytest.mark.asyncio
+    async def test_stats_include_archive(self, client: AsyncClient, auth_headers_admin: dict, db_session):
+        """Stats aggregate bookings and days per year and party"""
+        await add_booking(db_session, OLD_START, days=3, party_id=2)
+        await add_booking(db_session, OLD_START + timedelta(days=10), days=4, party_id=2)
+        await archive_bookings(db_session)
+
+        response = await client.get("/api/bookings/stats", headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        assert response.json() == [{"year": OLD_START.year, "party_id": 2, "bookings": 2, "days": 7}]
+
+    @pytest.mark.asyncio
+    async def test_archived_booking_blocks_overlap(self, client: AsyncClient, auth_headers_admin: dict, db_session):
+        """A new booking cannot overlap an archived one"""
+        await add_booking(db_session, OLD_START)
+        await archive_bookings(db_session)
+
+        response = await client.post(
+            "/api/bookings",
+            headers=auth_headers_admin,
+            json={"party_id": 1, "start_date": str(OLD_START + timedelta(days=1)), "end_date": str(OLD_START + timedelta(days=5))}
+        )
+
+        assert response.status_code == 409
+
+
+    @pytest.mark.asyncio
+    async def test_archived_booking_editable(self, client: AsyncClient, auth_headers_party1: dict, db_session):
+        """Archived bookings can be updated and deleted, as in a PostgreSQL partition"""
+        edited = await add_booking(db_session, OLD_START)
+        removed = await add_booking(db_session, OLD_START + timedelta(days=30))
+        await archive_bookings(db_session)
+
+        start = OLD_START + timedelta(days=10)
+        response = await client.put(
+            f"/api/bookings/{edited.id}",
+            headers=auth_headers_party1,
+            json={"party_id": 1, "start_date": str(start), "end_date": str(start + timedelta(days=2)), "note": "Nachgetragen"}
+        )
+        assert response.status_code == 200
+        assert response.json()["version"] == 2
+        assert (await client.delete(f"/api/bookings/{removed.id}", headers=auth_headers_party1)).status_code == 200
+
+        db_session.expire_all()
+        assert await db_session.scalar(select(func.count()).select_from(BookingArchive)) == 0
+        assert (await db_session.get(Booking, edited.id)).note == "Nachgetragen"
+        assert await db_session.get(Booking, removed.id) is None
+
+    @pytest.mark.asyncio
+    async def test_archived_booking_stays_archived_on_failure(
+        self, client: AsyncClient, auth_headers_party2: dict, db_session
+    ):
+        """A rejected change leaves the booking in the archive and reports why"""
+        archived = await add_booking(db_session, OLD_START)
+        await archive_bookings(db_session)
+
+        response = await client.delete(f"/api/bookings/{archived.id}", headers=auth_headers_party2)
+        assert response.status_code == 403
+        response = await client.put(
+            f"/api/bookings/{archived.id}",
+            headers=auth_headers_party2,
+            json={"party_id": 2, "start_date": str(OLD_START), "end_date": str(OLD_START)}
+        )
+        assert response.status_code == 403
+
+        assert await db_session.scalar(select(func.count()).select_from(BookingArchive)) == 1
+
+
+class TestPartitionDDL:
+    """PostgreSQL DDL for the partitioned bookings table"""
+
+    def test_partitioned_by_end_date(self):
+        """bookings is range-partitioned and the partition key is part of the primary key"""
+        ddl = str(CreateTable(Booking.__table__).compile(dialect=postgresql.dialect()))
+
+        assert "PARTITION BY RANGE (end_date)" in ddl
+        assert "PRIMARY KEY (id, end_date)" in ddl
+
+    def test_other_tables_unchanged(self):
+        """Tables without a partition key keep their primary key"""
+        ddl = str(CreateTable(BookingArchive.__table__).compile(dialect=postgresql.dialect()))
+
+        assert "PRIMARY KEY (id)" in ddl
+        assert "PARTITION" not in ddl
@@ -0,0 +1,167 @@
+"""
+Tests for the audit log of booking changes
+"""
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from datetime import date, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from audit import AuditLog, audit_log
+from database import AuditEntry
+from series import occurrence_id
+
+
+def booking_json(days: int = 70, note: str = None) -> dict:
+    start = date.today() + timedelta(days=days)
+    return {"party_id": 1, "start_date": str(start), "end_date": str(start + timedelta(days=2)), "note": note}
+
+
+class TestAuditEvents:
+    """Tests for recording booking mutations"""
+
+    @pytest.mark.asyncio
+    async def test_writes_only_buffer(self, client: AsyncClient, auth_headers_party1: dict, db_session):
+        """Writes queue events without inserting anything themselves"""
+        await client.post("/api/bookings", headers=auth_headers_party1, json=booking_json())
+
+        assert len(audit_log) == 1
+        assert await db_session.scalar(select(func.count()).select_from(AuditEntry)) == 0
+
+    @pytest.mark.asyncio
+    async def test_before_and_after(self, client: AsyncClient, auth_headers_party1: dict, auth_headers_admin: dict):
+        """Create, update and delete record who changed what"""
+        created = (await client.post("/api/bookings", headers=auth_headers_party1, json=booking_json())).json()
+        await client.put(
+            f"/api/bookings/{created['id']}",
+            headers=auth_headers_admin,
+            json={**booking_json(80, "Verschoben"), "version": 1}
+        )
+        await client.delete(f"/api/bookings/{created['id']}", headers=auth_headers_party1)
+
+        response = await client.get("/api/audit", headers=auth_headers_admin)
+        deleted, updated, inserted = response.json()["items"]
+
+        assert [inserted["action"], updated["action"], deleted["action"]] == ["create", "update", "delete"]
+        assert inserted["username"] == deleted["username"] == "Siggi & Mausi"
+        assert updated["username"] == "Admin"
+        assert inserted["before"] is None
+        assert inserted["after"]["start_date"] == created["start_date"]
+        assert updated["before"] == inserted["after"]
+        assert updated["after"]["note"] == "Verschoben"
+        assert updated["after"]["version"] == 2
+        assert deleted["before"] == updated["after"]
+        assert deleted["after"] is None
+
+    @pytest.mark.asyncio
+    async def test_series_events(self, client: AsyncClient, auth_headers_party1: dict, auth_headers_admin: dict):
+        """Creating a series, skipping an occurrence and deleting the series are audited"""
+        year = date.today().year + 1
+        rule = {"party_id": 1, "start_date": f"{year}-07-01", "end_date": f"{year}-07-07", "freq": "yearly", "count": 3}
+        series = (await client.post("/api/series", headers=auth_headers_party1, json=rule)).json()
+        await client.post(f"/api/series/{series['id']}/exceptions", headers=auth_headers_party1, json={"date": f"{year + 1}-07-01"})
+        await client.delete(f"/api/series/{series['id']}", headers=auth_headers_admin)
+
+        response = await client.get("/api/audit", headers=auth_headers_admin)
+        deleted, skipped, created = response.json()["items"]
+
+        assert [created["action"], skipped["action"], deleted["action"]] == ["series_create", "series_skip", "series_delete"]
+        assert created["booking_id"] == deleted["booking_id"] == occurrence_id(series["id"], 0)
+        assert skipped["booking_id"] == occurrence_id(series["id"], 1)
+        assert created["before"] is None
+        assert created["after"]["count"] == 3
+        assert skipped["before"] == created["after"]
+        assert skipped["after"]["skipped"] == [f"{year + 1}-07-01"]
+        assert deleted["before"] == skipped["after"]
+        assert deleted["after"] is None
+        assert deleted["username"] == "Admin"
+
+    @pytest.mark.asyncio
+    async def test_failed_writes_are_not_audited(self, client: AsyncClient, auth_headers_party1: dict):
+        """Conflicts and forbidden writes leave no event"""
+        await client.post("/api/bookings", headers=auth_headers_party1, json=booking_json())
+        await client.post("/api/bookings", headers=auth_headers_party1, json=booking_json())
+        await client.delete("/api/bookings/999", headers=auth_headers_party1)
+
+        assert len(audit_log) == 1
+
+
+class TestAuditWriter:
+    """Tests for the buffered, batched writer"""
+
+    @pytest.mark.asyncio
+    async def test_flush_in_batches(self, db_session):
+        """Buffered events are written in multi-row inserts of batch_size"""
+        log = AuditLog(batch_size=3)
+        for booking_id in range(7):
+            log.record("admin", "create", booking_id, after={"note": None})
+
+        written = await log.flush(db_session)
+
+        assert written == 7
+        assert len(log) == 0
+        assert await db_session.scalar(select(func.count()).select_from(AuditEntry)) == 7
+
+    def test_bounded_buffer(self):
+        """A full buffer drops new events instead of blocking the write"""
+        log = AuditLog(max_events=2)
+        for booking_id in range(3):
+            log.record("admin", "delete", booking_id)
+
+        assert len(log) == 2
+        assert log.dropped == 1
+
+    @pytest.mark.asyncio
+    async def test_background_writer(self, db_session):
+        """The writer flushes early once a batch is full"""
+        log = AuditLog(batch_size=2)
+        writer = asyncio.create_task(log.run(async_sessionmaker(db_session.bind), interval=60))
+        try:
+            log.record("admin", "create", 1)
+            log.record("admin", "create", 2)
+            for _ in range(100):
+                if log.written == 2:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            writer.cancel()
+
+        assert log.written == 2
+
+
+class TestAuditEndpoint:
+    """Tests for GET /api/audit"""
+
+    @pytest.mark.asyncio
+    async def test_admin_only(self, client: AsyncClient, auth_headers_party1: dict):
+        """Party users cannot read the audit log"""
+        response = await client.get("/api/audit", headers=auth_headers_party1)
+
+        assert response.status_code == 403
+
+    @pytest.mark.asyncio
+    async def test_pagination(self, client: AsyncClient, auth_headers_admin: dict):
+        """Pages go from newest to oldest via next_before"""
+        for index in range(5):
+            await client.post("/api/bookings", headers=auth_headers_admin, json=booking_json(100 + index * 5))
+
+        first = (await client.get("/api/audit?limit=2", headers=auth_headers_admin)).json()
+        second = (await client.get(f"/api/audit?limit=2&before={first['next_before']}", headers=auth_headers_admin)).json()
+        last = (await client.get(f"/api/audit?limit=2&before={second['next_before']}", headers=auth_headers_admin)).json()
+
+        ids = [item["id"] for page in (first, second, last) for item in page["items"]]
+        assert ids == sorted(ids, reverse=True)
+        assert len(set(ids)) == 5
+        assert last["next_before"] is None
+
+    @pytest.mark.asyncio
+    async def test_filter_by_booking(self, client: AsyncClient, auth_headers_admin: dict):
+        """The history of one booking can be requested"""
+        first = (await client.post("/api/bookings", headers=auth_headers_admin, json=booking_json(100))).json()
+        await client.post("/api/bookings", headers=auth_headers_admin, json=booking_json(110))
+
+        response = await client.get(f"/api/audit?booking_id={first['id']}", headers=auth_headers_admin)
+
+        assert [item["booking_id"] for item in response.json()["items"]] == [first["id"]]
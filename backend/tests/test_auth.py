@@ -1,16 +1,28 @@
 """
 Tests for authentication module
 """
+import asyncio
+
 import pytest
 from httpx import AsyncClient
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
 from auth import (
     verify_password,
     create_session_token,
     verify_session_token,
     can_modify_booking,
+    prune_loop,
+    prune_revoked_tokens,
+    restore_revoked_tokens,
+    revoke_token,
+    revoked_tokens,
+    RevocationList,
     User
 )
+from database import RevokedToken
 
 
 class TestVerifyPassword:
@@ -175,3 +187,100 @@ class TestMeEndpoint:
         )
 
         assert response.status_code == 401
+
+
+class TestRevocationList:
+    """Tests for the in-memory revocation list"""
+
+    def test_revoked_until_expiry(self):
+        """Revoked ids are reported until their token expires"""
+        revocations = RevocationList()
+        revocations.add("live", datetime.utcnow() + timedelta(hours=1))
+        revocations.add("expired", datetime.utcnow() - timedelta(seconds=1))
+
+        assert revocations.is_revoked("live") is True
+        assert revocations.is_revoked("expired") is False
+        assert len(revocations) == 1
+
+    @pytest.mark.asyncio
+    async def test_restore_from_database(self, db_session):
+        """Unexpired revocations are loaded, expired rows are deleted"""
+        db_session.add(RevokedToken(jti="live", expires_at=datetime.utcnow() + timedelta(hours=1)))
+        db_session.add(RevokedToken(jti="expired", expires_at=datetime.utcnow() - timedelta(hours=1)))
+        await db_session.commit()
+
+        await restore_revoked_tokens(db_session)
+
+        assert revoked_tokens.is_revoked("live") is True
+        remaining = (await db_session.execute(select(RevokedToken.jti))).scalars().all()
+        assert remaining == ["live"]
+
+    @pytest.mark.asyncio
+    async def test_revoke_same_token_twice(self, db_session):
+        """A second revocation of the same token (concurrent logout) is no error"""
+        user = User(
+            party_id=1, is_admin=False, username="Siggi & Mausi",
+            jti="twice", expires_at=datetime.utcnow() + timedelta(hours=1)
+        )
+
+        await revoke_token(db_session, user)
+        await revoke_token(db_session, user)
+
+        remaining = (await db_session.execute(select(RevokedToken.jti))).scalars().all()
+        assert remaining == ["twice"]
+
+    @pytest.mark.asyncio
+    async def test_prune_expired(self, db_session):
+        """Pruning deletes expired revocations and keeps live ones"""
+        db_session.add(RevokedToken(jti="live", expires_at=datetime.utcnow() + timedelta(hours=1)))
+        db_session.add(RevokedToken(jti="expired", expires_at=datetime.utcnow() - timedelta(hours=1)))
+        await db_session.commit()
+
+        assert await prune_revoked_tokens(db_session) == 1
+
+        remaining = (await db_session.execute(select(RevokedToken.jti))).scalars().all()
+        assert remaining == ["live"]
+
+    @pytest.mark.asyncio
+    async def test_prune_loop(self, db_session, monkeypatch):
+        """The background task prunes expired revocations after every interval"""
+        db_session.add(RevokedToken(jti="expired", expires_at=datetime.utcnow() - timedelta(hours=1)))
+        await db_session.commit()
+        intervals = []
+
+        async def one_interval(seconds):
+            if intervals:
+                raise asyncio.CancelledError  # stop after the first prune
+            intervals.append(seconds)
+
+        monkeypatch.setattr(asyncio, "sleep", one_interval)
+        with pytest.raises(asyncio.CancelledError):
+            await prune_loop(async_sessionmaker(db_session.bind), interval=60)
+
+        assert intervals == [60]
+        assert (await db_session.execute(select(RevokedToken.jti))).scalars().all() == []
+
+
+class TestLogoutEndpoint:
+    """Tests for /logout endpoint"""
+
+    @pytest.mark.asyncio
+    async def test_logout_revokes_token(self, client: AsyncClient, auth_headers_party1: dict):
+        """The token is rejected after logout"""
+        response = await client.post("/api/auth/logout", headers=auth_headers_party1)
+        assert response.status_code == 200
+
+        response = await client.get("/api/auth/me", headers=auth_headers_party1)
+        assert response.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_logout_keeps_other_sessions(self, client: AsyncClient):
+        """Only the logged-out token is revoked"""
+        user = User(party_id=1, is_admin=False, username="Siggi & Mausi")
+        first = {"Authorization": f"Bearer {create_session_token(user)}"}
+        second = {"Authorization": f"Bearer {create_session_token(user)}"}
+
+        await client.post("/api/auth/logout", headers=first)
+
+        assert (await client.get("/api/auth/me", headers=first)).status_code == 401
+        assert (await client.get("/api/auth/me", headers=second)).status_code == 200
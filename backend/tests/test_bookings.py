@@ -5,6 +5,8 @@ import pytest
 from httpx import AsyncClient
 from datetime import date, timedelta
 
+from database import BookingTombstone
+
 
 class TestGetBookings:
     """Tests for GET /api/bookings"""
@@ -207,6 +209,148 @@ class TestBookingOverlap:
         assert response2.status_code == 409
 
 
+class TestUpdateBooking:
+    """Tests for PUT /api/bookings/{id}"""
+
+    async def create(self, client: AsyncClient, headers: dict, party_id: int, start: date, days: int = 2) -> dict:
+        response = await client.post(
+            "/api/bookings",
+            headers=headers,
+            json={
+                "party_id": party_id,
+                "start_date": str(start),
+                "end_date": str(start + timedelta(days=days))
+            }
+        )
+        assert response.status_code == 201
+        return response.json()
+
+    @pytest.mark.asyncio
+    async def test_update_increments_version(self, client: AsyncClient, auth_headers_party1: dict):
+        """Successful update bumps the version and returns it as ETag"""
+        today = date.today() + timedelta(days=800)
+        booking = await self.create(client, auth_headers_party1, 1, today)
+        assert booking["version"] == 1
+
+        response = await client.put(
+            f"/api/bookings/{booking['id']}",
+            headers=auth_headers_party1,
+            json={
+                "party_id": 1,
+                "start_date": str(today),
+                "end_date": str(today + timedelta(days=4)),
+                "note": "verlängert",
+                "version": 1
+            }
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["version"] == 2
+        assert data["note"] == "verlängert"
+        assert data["end_date"] == str(today + timedelta(days=4))
+        assert response.headers["etag"] == '"2"'
+
+    @pytest.mark.asyncio
+    async def test_stale_version_rejected(self, client: AsyncClient, auth_headers_admin: dict):
+        """Second editor with the old version gets 409 instead of overwriting"""
+        today = date.today() + timedelta(days=810)
+        booking = await self.create(client, auth_headers_admin, 1, today)
+        payload = {
+            "party_id": 1,
+            "start_date": str(today),
+            "end_date": str(today + timedelta(days=2)),
+            "version": 1
+        }
+
+        first = await client.put(
+            f"/api/bookings/{booking['id']}",
+            headers=auth_headers_admin,
+            json={**payload, "note": "erster"}
+        )
+        second = await client.put(
+            f"/api/bookings/{booking['id']}",
+            headers=auth_headers_admin,
+            json={**payload, "note": "zweiter"}
+        )
+
+        assert first.status_code == 200
+        assert second.status_code == 409
+        assert second.headers["etag"] == '"2"'
+
+        bookings = (await client.get("/api/bookings", headers=auth_headers_admin)).json()
+        assert bookings[0]["note"] == "erster"
+
+    @pytest.mark.asyncio
+    async def test_stale_if_match_precondition_failed(self, client: AsyncClient, auth_headers_admin: dict):
+        """Stale If-Match header returns 412"""
+        today = date.today() + timedelta(days=820)
+        booking = await self.create(client, auth_headers_admin, 1, today)
+
+        response = await client.put(
+            f"/api/bookings/{booking['id']}",
+            headers={**auth_headers_admin, "If-Match": '"7"'},
+            json={"party_id": 1, "start_date": str(today), "end_date": str(today + timedelta(days=1))}
+        )
+
+        assert response.status_code == 412
+
+    @pytest.mark.asyncio
+    async def test_update_other_party_forbidden(self, client: AsyncClient, auth_headers_party1: dict, auth_headers_party2: dict):
+        """User cannot update other party's booking"""
+        today = date.today() + timedelta(days=830)
+        booking = await self.create(client, auth_headers_party2, 2, today)
+
+        response = await client.put(
+            f"/api/bookings/{booking['id']}",
+            headers=auth_headers_party1,
+            json={"party_id": 1, "start_date": str(today), "end_date": str(today + timedelta(days=1))}
+        )
+
+        assert response.status_code == 403
+
+    @pytest.mark.asyncio
+    async def test_update_to_other_party_forbidden(self, client: AsyncClient, auth_headers_party1: dict):
+        """User cannot move own booking to another party"""
+        today = date.today() + timedelta(days=840)
+        booking = await self.create(client, auth_headers_party1, 1, today)
+
+        response = await client.put(
+            f"/api/bookings/{booking['id']}",
+            headers=auth_headers_party1,
+            json={"party_id": 2, "start_date": str(today), "end_date": str(today + timedelta(days=1))}
+        )
+
+        assert response.status_code == 403
+
+    @pytest.mark.asyncio
+    async def test_update_overlap_rejected(self, client: AsyncClient, auth_headers_admin: dict):
+        """Update into another booking's range returns 409"""
+        today = date.today() + timedelta(days=850)
+        await self.create(client, auth_headers_admin, 1, today)
+        booking = await self.create(client, auth_headers_admin, 2, today + timedelta(days=10))
+
+        response = await client.put(
+            f"/api/bookings/{booking['id']}",
+            headers=auth_headers_admin,
+            json={"party_id": 2, "start_date": str(today + timedelta(days=1)), "end_date": str(today + timedelta(days=3))}
+        )
+
+        assert response.status_code == 409
+
+    @pytest.mark.asyncio
+    async def test_update_nonexistent_booking(self, client: AsyncClient, auth_headers_admin: dict):
+        """Updating non-existent booking returns 404"""
+        today = date.today()
+        response = await client.put(
+            "/api/bookings/99999",
+            headers=auth_headers_admin,
+            json={"party_id": 1, "start_date": str(today), "end_date": str(today)}
+        )
+
+        assert response.status_code == 404
+
+
 class TestDeleteBooking:
     """Tests for DELETE /api/bookings/{id}"""
 
@@ -316,3 +460,201 @@ class TestGetParties:
         response = await client.get("/api/parties")
 
         assert response.status_code == 401
+
+
+class TestBookingChanges:
+    """Tests for GET /api/bookings/changes"""
+
+    @pytest.mark.asyncio
+    async def test_changes_since_zero(self, client: AsyncClient, auth_headers_admin: dict):
+        """All bookings are returned as upserts from sequence 0"""
+        today = date.today() + timedelta(days=700)
+        await client.post(
+            "/api/bookings",
+            headers=auth_headers_admin,
+            json={"party_id": 1, "start_date": str(today), "end_date": str(today + timedelta(days=2))}
+        )
+
+        response = await client.get("/api/bookings/changes?since=0", headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["upserts"]) == 1
+        assert data["deleted"] == []
+        assert data["seq"] == data["upserts"][0]["seq"]
+
+    @pytest.mark.asyncio
+    async def test_changes_only_after_since(self, client: AsyncClient, auth_headers_admin: dict):
+        """Only changes after the given sequence are returned"""
+        today = date.today() + timedelta(days=710)
+        first = await client.post(
+            "/api/bookings",
+            headers=auth_headers_admin,
+            json={"party_id": 1, "start_date": str(today), "end_date": str(today + timedelta(days=2))}
+        )
+        since = first.json()["seq"]
+
+        second = await client.post(
+            "/api/bookings",
+            headers=auth_headers_admin,
+            json={"party_id": 2, "start_date": str(today + timedelta(days=5)), "end_date": str(today + timedelta(days=6))}
+        )
+
+        response = await client.get(f"/api/bookings/changes?since={since}", headers=auth_headers_admin)
+
+        data = response.json()
+        assert [b["id"] for b in data["upserts"]] == [second.json()["id"]]
+        assert data["seq"] > since
+
+    @pytest.mark.asyncio
+    async def test_update_and_delete_reported(self, client: AsyncClient, auth_headers_admin: dict):
+        """Updates appear as upserts and deletions as tombstones"""
+        today = date.today() + timedelta(days=720)
+        created = (await client.post(
+            "/api/bookings",
+            headers=auth_headers_admin,
+            json={"party_id": 1, "start_date": str(today), "end_date": str(today + timedelta(days=2))}
+        )).json()
+        other = (await client.post(
+            "/api/bookings",
+            headers=auth_headers_admin,
+            json={"party_id": 2, "start_date": str(today + timedelta(days=5)), "end_date": str(today + timedelta(days=6))}
+        )).json()
+        since = other["seq"]
+
+        await client.put(
+            f"/api/bookings/{created['id']}",
+            headers=auth_headers_admin,
+            json={"party_id": 1, "start_date": str(today), "end_date": str(today + timedelta(days=3)), "note": "länger"}
+        )
+        await client.delete(f"/api/bookings/{other['id']}", headers=auth_headers_admin)
+
+        response = await client.get(f"/api/bookings/changes?since={since}", headers=auth_headers_admin)
+
+        data = response.json()
+        assert [b["id"] for b in data["upserts"]] == [created["id"]]
+        assert data["upserts"][0]["note"] == "länger"
+        assert data["deleted"] == [other["id"]]
+
+    @pytest.mark.asyncio
+    async def test_rejected_write_does_not_advance_sequence(self, client: AsyncClient, auth_headers_admin: dict):
+        """A conflicting create leaves no change behind"""
+        today = date.today() + timedelta(days=730)
+        created = (await client.post(
+            "/api/bookings",
+            headers=auth_headers_admin,
+            json={"party_id": 1, "start_date": str(today), "end_date": str(today + timedelta(days=2))}
+        )).json()
+
+        conflict = await client.post(
+            "/api/bookings",
+            headers=auth_headers_admin,
+            json={"party_id": 2, "start_date": str(today + timedelta(days=1)), "end_date": str(today + timedelta(days=4))}
+        )
+        assert conflict.status_code == 409
+
+        response = await client.get(f"/api/bookings/changes?since={created['seq']}", headers=auth_headers_admin)
+
+        assert response.json() == {"seq": created["seq"], "upserts": [], "deleted": []}
+
+    @pytest.mark.asyncio
+    async def test_delete_replaces_old_tombstone(self, client: AsyncClient, auth_headers_admin: dict, db_session):
+        """A tombstone left under a reused id does not make the delete fail"""
+        today = date.today() + timedelta(days=740)
+        created = (await client.post(
+            "/api/bookings",
+            headers=auth_headers_admin,
+            json={"party_id": 1, "start_date": str(today), "end_date": str(today)}
+        )).json()
+        db_session.add(BookingTombstone(booking_id=created["id"], seq=0))
+        await db_session.commit()
+
+        response = await client.delete(f"/api/bookings/{created['id']}", headers=auth_headers_admin)
+        assert response.status_code == 200
+
+        response = await client.get(f"/api/bookings/changes?since={created['seq']}", headers=auth_headers_admin)
+        assert response.json()["deleted"] == [created["id"]]
+
+    @pytest.mark.asyncio
+    async def test_changes_unauthenticated(self, client: AsyncClient):
+        """Unauthenticated request returns 401"""
+        response = await client.get("/api/bookings/changes?since=0")
+
+        assert response.status_code == 401
+
+
+class TestQueryCounts:
+    """Lock in the number of SQL round trips per endpoint"""
+
+    async def create(self, client: AsyncClient, headers: dict, start: date) -> dict:
+        response = await client.post(
+            "/api/bookings",
+            headers=headers,
+            json={"party_id": 1, "start_date": str(start), "end_date": str(start + timedelta(days=2))}
+        )
+        assert response.status_code == 201
+        return response.json()
+
+    @pytest.mark.asyncio
+    async def test_list_bookings(self, client: AsyncClient, auth_headers_admin: dict, query_counter):
+        """Listing bookings is a single SELECT"""
+        await self.create(client, auth_headers_admin, date.today() + timedelta(days=900))
+        query_counter.reset()
+
+        await client.get("/api/bookings", headers=auth_headers_admin)
+
+        assert query_counter.count == 1
+
+    @pytest.mark.asyncio
+    async def test_create_booking(self, client: AsyncClient, auth_headers_admin: dict, query_counter):
+        """Create is sequence allocation plus one guarded INSERT ... RETURNING"""
+        await self.create(client, auth_headers_admin, date.today() + timedelta(days=910))
+
+        assert query_counter.count == 2
+        assert query_counter.statements[1].startswith("INSERT INTO bookings")
+        assert "RETURNING" in query_counter.statements[1]
+
+    @pytest.mark.asyncio
+    async def test_create_conflict(self, client: AsyncClient, auth_headers_admin: dict, query_counter):
+        """A conflicting create needs no extra query to detect the overlap"""
+        start = date.today() + timedelta(days=920)
+        await self.create(client, auth_headers_admin, start)
+        query_counter.reset()
+
+        response = await client.post(
+            "/api/bookings",
+            headers=auth_headers_admin,
+            json={"party_id": 2, "start_date": str(start), "end_date": str(start)}
+        )
+
+        assert response.status_code == 409
+        assert query_counter.count == 2
+
+    @pytest.mark.asyncio
+    async def test_update_booking(self, client: AsyncClient, auth_headers_admin: dict, query_counter):
+        """Update is sequence allocation plus one conditional UPDATE ... RETURNING"""
+        start = date.today() + timedelta(days=930)
+        booking = await self.create(client, auth_headers_admin, start)
+        query_counter.reset()
+
+        response = await client.put(
+            f"/api/bookings/{booking['id']}",
+            headers=auth_headers_admin,
+            json={"party_id": 1, "start_date": str(start), "end_date": str(start), "version": 1}
+        )
+
+        assert response.status_code == 200
+        assert query_counter.count == 2
+        assert "UPDATE bookings" in query_counter.statements[1]  # after the audit CTE
+
+    @pytest.mark.asyncio
+    async def test_delete_booking(self, client: AsyncClient, auth_headers_admin: dict, query_counter):
+        """Delete never loads the row - DELETE ... RETURNING plus tombstone"""
+        booking = await self.create(client, auth_headers_admin, date.today() + timedelta(days=940))
+        query_counter.reset()
+
+        response = await client.delete(f"/api/bookings/{booking['id']}", headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        assert query_counter.count == 3
+        assert not any(statement.startswith("SELECT") for statement in query_counter.statements)
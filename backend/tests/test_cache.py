@@ -0,0 +1,140 @@
+"""
+Tests for read coalescing and snapshot caching
+"""
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from datetime import date, timedelta
+
+from cache import SingleFlight, SnapshotCache
+
+
+class TestSingleFlight:
+    """Tests for request coalescing"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_result(self):
+        """Concurrent calls with the same key run the function once"""
+        flight = SingleFlight()
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        results = await asyncio.gather(*(flight.do("key", load) for _ in range(10)))
+
+        assert calls == 1
+        assert results == [1] * 10
+        assert len(flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_shared_and_not_cached(self):
+        """Waiters see the leader's error; the next call runs again"""
+        flight = SingleFlight()
+        calls = 0
+
+        async def fail():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+        assert calls == 1
+        assert all(isinstance(result, ValueError) for result in results)
+
+        with pytest.raises(ValueError):
+            await flight.do("key", fail)
+        assert calls == 2
+
+
+class TestSnapshotCache:
+    """Tests for immutable snapshots"""
+
+    @pytest.mark.asyncio
+    async def test_snapshot_reused_until_invalidated(self):
+        """Snapshots are built once and rebuilt after invalidation"""
+        cache = SnapshotCache()
+
+        async def build():
+            return b"[]"
+
+        first = await cache.get("bookings", build)
+        second = await cache.get("bookings", build)
+        assert first is second
+        assert cache.builds == 1
+
+        cache.invalidate()
+        third = await cache.get("bookings", build)
+        assert cache.builds == 2
+        assert third.etag == first.etag
+
+    @pytest.mark.asyncio
+    async def test_build_racing_write_not_stored(self):
+        """A build that overlaps an invalidation is not kept"""
+        cache = SnapshotCache()
+
+        async def build():
+            cache.invalidate()  # a write commits while the query runs
+            return b"[1]"
+
+        await cache.get("bookings", build)
+
+        assert len(cache) == 0
+
+
+class TestBookingReadBurst:
+    """Tests for coalesced GET /api/bookings"""
+
+    async def create(self, client: AsyncClient, headers: dict, start: date) -> dict:
+        response = await client.post(
+            "/api/bookings",
+            headers=headers,
+            json={"party_id": 1, "start_date": str(start), "end_date": str(start + timedelta(days=2))}
+        )
+        assert response.status_code == 201
+        return response.json()
+
+    @pytest.mark.asyncio
+    async def test_burst_runs_one_query(self, client: AsyncClient, auth_headers_admin: dict, query_counter):
+        """Concurrent identical reads share a single query"""
+        await self.create(client, auth_headers_admin, date.today() + timedelta(days=50))
+        query_counter.reset()
+
+        responses = await asyncio.gather(*(
+            client.get("/api/bookings", headers=auth_headers_admin) for _ in range(25)
+        ))
+
+        assert all(response.status_code == 200 for response in responses)
+        assert len({response.content for response in responses}) == 1
+        assert query_counter.count == 1
+
+    @pytest.mark.asyncio
+    async def test_write_invalidates_snapshot(self, client: AsyncClient, auth_headers_admin: dict):
+        """A new booking is visible to the next read"""
+        await self.create(client, auth_headers_admin, date.today() + timedelta(days=60))
+        before = await client.get("/api/bookings", headers=auth_headers_admin)
+
+        await self.create(client, auth_headers_admin, date.today() + timedelta(days=70))
+        after = await client.get("/api/bookings", headers=auth_headers_admin)
+
+        assert len(before.json()) == 1
+        assert len(after.json()) == 2
+        assert before.headers["etag"] != after.headers["etag"]
+
+    @pytest.mark.asyncio
+    async def test_not_modified(self, client: AsyncClient, auth_headers_admin: dict):
+        """Matching If-None-Match returns 304 without a body"""
+        first = await client.get("/api/bookings", headers=auth_headers_admin)
+
+        response = await client.get(
+            "/api/bookings",
+            headers={**auth_headers_admin, "If-None-Match": first.headers["etag"]}
+        )
+
+        assert response.status_code == 304
+        assert response.content == b""
@@ -0,0 +1,114 @@
+"""
+Tests for response compression
+"""
+import pytest
+from httpx import AsyncClient
+from datetime import date, timedelta
+
+from compression import negotiate_encoding, compressed_cache, brotli
+
+
+async def create_bookings(client: AsyncClient, headers: dict, count: int) -> None:
+    """Create count non-overlapping bookings"""
+    start = date.today() + timedelta(days=1000)
+    for i in range(count):
+        response = await client.post(
+            "/api/bookings",
+            headers=headers,
+            json={
+                "party_id": (i % 4) + 1,
+                "start_date": str(start + timedelta(days=i * 3)),
+                "end_date": str(start + timedelta(days=i * 3 + 1)),
+                "note": "Sommerurlaub"
+            }
+        )
+        assert response.status_code == 201
+
+
+class TestNegotiateEncoding:
+    """Tests for Accept-Encoding negotiation"""
+
+    def test_gzip_accepted(self):
+        """gzip is chosen when it is the only accepted coding"""
+        assert negotiate_encoding("gzip") == "gzip"
+
+    def test_nothing_accepted(self):
+        """No supported coding returns None"""
+        assert negotiate_encoding("") is None
+        assert negotiate_encoding("identity") is None
+        assert negotiate_encoding("deflate") is None
+
+    def test_zero_quality_rejected(self):
+        """q=0 explicitly refuses a coding"""
+        assert negotiate_encoding("gzip;q=0") is None
+
+    def test_wildcard(self):
+        """Wildcard accepts the preferred supported coding"""
+        assert negotiate_encoding("*") in ("br", "gzip")
+
+    @pytest.mark.skipif(brotli is None, reason="brotli not installed")
+    def test_brotli_preferred(self):
+        """brotli wins over gzip when both are accepted"""
+        assert negotiate_encoding("gzip, deflate, br") == "br"
+
+    @pytest.mark.skipif(brotli is not None, reason="brotli installed")
+    def test_brotli_unavailable(self):
+        """Without brotli installed gzip is used"""
+        assert negotiate_encoding("br, gzip") == "gzip"
+
+
+class TestCompressionMiddleware:
+    """Tests for compressed API responses"""
+
+    @pytest.mark.asyncio
+    async def test_large_response_gzipped(self, client: AsyncClient, auth_headers_admin: dict):
+        """Booking lists above the threshold are gzip-compressed"""
+        await create_bookings(client, auth_headers_admin, 12)
+
+        response = await client.get(
+            "/api/bookings",
+            headers={**auth_headers_admin, "Accept-Encoding": "gzip"}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert len(response.json()) == 12
+
+    @pytest.mark.asyncio
+    async def test_small_response_not_compressed(self, client: AsyncClient, auth_headers_admin: dict):
+        """Responses below the threshold are sent as-is"""
+        response = await client.get(
+            "/api/bookings",
+            headers={**auth_headers_admin, "Accept-Encoding": "gzip"}
+        )
+
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+
+    @pytest.mark.asyncio
+    async def test_identity_not_compressed(self, client: AsyncClient, auth_headers_admin: dict):
+        """Clients that do not accept gzip get uncompressed bodies"""
+        await create_bookings(client, auth_headers_admin, 12)
+
+        response = await client.get(
+            "/api/bookings",
+            headers={**auth_headers_admin, "Accept-Encoding": "identity"}
+        )
+
+        assert "content-encoding" not in response.headers
+        assert len(response.json()) == 12
+
+    @pytest.mark.asyncio
+    async def test_repeated_poll_uses_cache(self, client: AsyncClient, auth_headers_admin: dict):
+        """Identical responses are compressed once and served from cache"""
+        await create_bookings(client, auth_headers_admin, 12)
+        compressed_cache.clear()
+        headers = {**auth_headers_admin, "Accept-Encoding": "gzip"}
+
+        first = await client.get("/api/bookings", headers=headers)
+        second = await client.get("/api/bookings", headers=headers)
+
+        assert compressed_cache.misses == 1
+        assert compressed_cache.hits == 1
+        assert first.content == second.content
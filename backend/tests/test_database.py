@@ -0,0 +1,107 @@
+"""
+Tests for database session handling
+"""
+import pytest
+from httpx import AsyncClient
+from datetime import date, timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from database import LazySession, Booking
+
+
+class TestLazySession:
+    """Tests for the lazily connecting session wrapper"""
+
+    @pytest.mark.asyncio
+    async def test_no_checkout_before_first_statement(self, db_session, pool_events):
+        """Creating the wrapper does not touch the pool"""
+        session = LazySession(async_sessionmaker(db_session.bind))
+
+        assert session.in_use is False
+        assert pool_events.checkouts == 0
+
+        await session.execute(select(Booking))
+        assert session.in_use is True
+        assert pool_events.checked_out == 1
+
+        await session.close()
+
+    @pytest.mark.asyncio
+    async def test_commit_releases_connection(self, db_session, pool_events):
+        """The connection goes back to the pool as soon as the unit of work commits"""
+        session = LazySession(async_sessionmaker(db_session.bind))
+        await session.execute(select(Booking))
+        await session.commit()
+
+        assert session.in_use is False
+        assert pool_events.checked_out == 0
+
+        # The next statement opens a fresh unit of work
+        await session.execute(select(Booking))
+        assert pool_events.checkouts == 2
+        await session.rollback()
+        assert pool_events.checked_out == 0
+
+
+class TestPoolUsage:
+    """Requests that fail auth or validation never check out a connection"""
+
+    @pytest.mark.asyncio
+    async def test_unauthenticated_request(self, client: AsyncClient, pool_events):
+        """Missing token is rejected before the pool is touched"""
+        response = await client.get("/api/bookings")
+
+        assert response.status_code == 401
+        assert pool_events.checkouts == 0
+
+    @pytest.mark.asyncio
+    async def test_invalid_token(self, client: AsyncClient, pool_events):
+        """Invalid token is rejected before the pool is touched"""
+        response = await client.post(
+            "/api/bookings",
+            headers={"Authorization": "Bearer invalid-token"},
+            json={"party_id": 1, "start_date": str(date.today()), "end_date": str(date.today())}
+        )
+
+        assert response.status_code == 401
+        assert pool_events.checkouts == 0
+
+    @pytest.mark.asyncio
+    async def test_invalid_body(self, client: AsyncClient, auth_headers_admin: dict, pool_events):
+        """Validation errors are returned without a database connection"""
+        response = await client.post(
+            "/api/bookings",
+            headers=auth_headers_admin,
+            json={"party_id": 1, "start_date": str(date.today()), "end_date": "kein Datum"}
+        )
+
+        assert response.status_code == 422
+        assert pool_events.checkouts == 0
+
+    @pytest.mark.asyncio
+    async def test_forbidden_create(self, client: AsyncClient, auth_headers_party1: dict, pool_events):
+        """Authorization failures that need no data are answered without the pool"""
+        today = date.today()
+        response = await client.post(
+            "/api/bookings",
+            headers=auth_headers_party1,
+            json={"party_id": 2, "start_date": str(today), "end_date": str(today + timedelta(days=1))}
+        )
+
+        assert response.status_code == 403
+        assert pool_events.checkouts == 0
+
+    @pytest.mark.asyncio
+    async def test_connections_returned(self, client: AsyncClient, auth_headers_admin: dict, pool_events):
+        """Successful requests give their connection back"""
+        today = date.today() + timedelta(days=30)
+        await client.post(
+            "/api/bookings",
+            headers=auth_headers_admin,
+            json={"party_id": 1, "start_date": str(today), "end_date": str(today + timedelta(days=1))}
+        )
+        await client.get("/api/bookings", headers=auth_headers_admin)
+
+        assert pool_events.checkouts == 2
+        assert pool_events.checked_out == 0
@@ -0,0 +1,129 @@
+"""
+Tests for the columnar and MessagePack bulk formats
+"""
+import pytest
+from httpx import AsyncClient
+from datetime import date, timedelta
+
+from database import Booking
+from formats import columnar, msgpack
+from database import PARTIES
+
+
+def decode(payload: dict) -> list[dict]:
+    """Reference decoder - what the frontend does with a columnar payload"""
+    epoch = date.fromisoformat(payload["epoch"])
+    parties = payload["parties"]
+    return [
+        {
+            "id": payload["id"][row],
+            "party_id": parties[payload["party"][row]]["id"],
+            "party_name": parties[payload["party"][row]]["name"],
+            "party_color": parties[payload["party"][row]]["color"],
+            "start_date": str(epoch + timedelta(days=payload["start"][row])),
+            "end_date": str(epoch + timedelta(days=payload["end"][row])),
+            "note": payload["note"][row],
+            "seq": payload["seq"][row],
+            "version": payload["version"][row],
+            "series_id": payload["series"][row],
+        }
+        for row in range(len(payload["id"]))
+    ]
+
+
+async def seed_history(db_session, count: int, start: date) -> None:
+    """Back-to-back bookings of 3 days, cycling through the parties"""
+    db_session.add_all([
+        Booking(
+            party_id=index % 4 + 1,
+            start_date=start + timedelta(days=index * 4),
+            end_date=start + timedelta(days=index * 4 + 2),
+            note="Sommerferien" if index % 10 == 0 else None,
+            seq=index + 1
+        )
+        for index in range(count)
+    ])
+    await db_session.commit()
+
+
+class TestColumnar:
+    """Tests for the struct-of-arrays encoding"""
+
+    def test_empty(self):
+        """No bookings give empty columns"""
+        payload = columnar([], PARTIES)
+
+        assert payload["id"] == []
+        assert payload["parties"] == PARTIES
+
+    @pytest.mark.asyncio
+    async def test_same_content_as_json(self, client: AsyncClient, auth_headers_admin: dict, db_session):
+        """The columnar list decodes to exactly the JSON list"""
+        await seed_history(db_session, 20, date.today())
+
+        plain = await client.get("/api/bookings", headers=auth_headers_admin)
+        compact = await client.get("/api/bookings?format=columnar", headers=auth_headers_admin)
+
+        assert compact.status_code == 200
+        assert compact.headers["content-type"] == "application/json"
+        assert decode(compact.json()) == plain.json()
+        assert compact.headers["etag"] != plain.headers["etag"]
+
+    @pytest.mark.asyncio
+    async def test_unknown_party(self, client: AsyncClient, auth_headers_admin: dict, db_session):
+        """A booking of a party missing from the list is encoded like the JSON list shows it"""
+        await seed_history(db_session, 3, date.today())
+        db_session.add(Booking(party_id=99, start_date=date.today() + timedelta(days=30),
+                               end_date=date.today() + timedelta(days=31), seq=10))
+        await db_session.commit()
+
+        plain = await client.get("/api/bookings", headers=auth_headers_admin)
+        compact = await client.get("/api/bookings?format=columnar", headers=auth_headers_admin)
+
+        assert compact.status_code == 200
+        assert decode(compact.json()) == plain.json()
+        assert plain.json()[-1]["party_name"] == "Unbekannt"
+        assert compact.json()["parties"][:len(PARTIES)] == PARTIES
+
+    @pytest.mark.asyncio
+    async def test_export_multi_year_is_smaller(self, client: AsyncClient, auth_headers_admin: dict, db_session):
+        """A multi-year export shrinks several-fold"""
+        await seed_history(db_session, 1000, date.today() - timedelta(days=3 * 365))
+        headers = {**auth_headers_admin, "Accept-Encoding": "identity"}
+
+        plain = await client.get("/api/bookings/export", headers=headers)
+        compact = await client.get("/api/bookings/export?format=columnar", headers=headers)
+
+        assert decode(compact.json()) == plain.json()
+        assert len(plain.content) > 3 * len(compact.content)
+
+    @pytest.mark.asyncio
+    async def test_unknown_format(self, client: AsyncClient, auth_headers_admin: dict):
+        """Unsupported formats are rejected"""
+        response = await client.get("/api/bookings?format=xml", headers=auth_headers_admin)
+
+        assert response.status_code == 422
+
+
+class TestMessagePack:
+    """Tests for the optional binary variant"""
+
+    @pytest.mark.skipif(msgpack is None, reason="msgpack not installed")
+    @pytest.mark.asyncio
+    async def test_msgpack_matches_columnar(self, client: AsyncClient, auth_headers_admin: dict, db_session):
+        """MessagePack carries the columnar payload"""
+        await seed_history(db_session, 5, date.today())
+
+        compact = await client.get("/api/bookings?format=columnar", headers=auth_headers_admin)
+        binary = await client.get("/api/bookings?format=msgpack", headers=auth_headers_admin)
+
+        assert binary.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(binary.content) == compact.json()
+
+    @pytest.mark.skipif(msgpack is not None, reason="msgpack installed")
+    @pytest.mark.asyncio
+    async def test_msgpack_unavailable(self, client: AsyncClient, auth_headers_admin: dict):
+        """Without the msgpack package the format is refused"""
+        response = await client.get("/api/bookings?format=msgpack", headers=auth_headers_admin)
+
+        assert response.status_code == 406
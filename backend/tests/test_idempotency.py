@@ -0,0 +1,204 @@
+"""
+Tests for Idempotency-Key handling of booking writes
+"""
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from datetime import date, timedelta
+from sqlalchemy import func, select
+
+from database import Booking, IdempotencyRecord
+import idempotency
+from idempotency import REPLAYED_HEADER, idempotency_cache
+
+
+def booking_json(days: int = 60, party_id: int = 1) -> dict:
+    start = date.today() + timedelta(days=days)
+    return {"party_id": party_id, "start_date": str(start), "end_date": str(start + timedelta(days=2))}
+
+
+async def count_bookings(db_session) -> int:
+    return await db_session.scalar(select(func.count()).select_from(Booking))
+
+
+class TestIdempotentCreate:
+    """Tests for POST /api/bookings with Idempotency-Key"""
+
+    @pytest.mark.asyncio
+    async def test_retry_returns_original_response(self, client: AsyncClient, auth_headers_party1: dict, db_session):
+        """A retried create returns the first response and creates nothing"""
+        headers = {**auth_headers_party1, "Idempotency-Key": "create-1"}
+
+        first = await client.post("/api/bookings", headers=headers, json=booking_json())
+        retry = await client.post("/api/bookings", headers=headers, json=booking_json())
+
+        assert first.status_code == retry.status_code == 201
+        assert retry.json() == first.json()
+        assert REPLAYED_HEADER not in first.headers
+        assert retry.headers[REPLAYED_HEADER] == "true"
+        assert await count_bookings(db_session) == 1
+
+    @pytest.mark.asyncio
+    async def test_replay_skips_overlap_check(self, client: AsyncClient, auth_headers_party1: dict, query_counter):
+        """A replay is answered from the cache without touching the database"""
+        headers = {**auth_headers_party1, "Idempotency-Key": "create-2"}
+        await client.post("/api/bookings", headers=headers, json=booking_json())
+
+        query_counter.reset()
+        retry = await client.post("/api/bookings", headers=headers, json=booking_json())
+
+        assert retry.status_code == 201
+        assert query_counter.count == 0
+
+    @pytest.mark.asyncio
+    async def test_survives_cache_loss(self, client: AsyncClient, auth_headers_party1: dict, db_session):
+        """Keys are persisted, so a replay after a restart still matches"""
+        headers = {**auth_headers_party1, "Idempotency-Key": "create-3"}
+        first = await client.post("/api/bookings", headers=headers, json=booking_json())
+        idempotency_cache.clear()
+
+        retry = await client.post("/api/bookings", headers=headers, json=booking_json())
+
+        assert retry.json() == first.json()
+        assert retry.headers[REPLAYED_HEADER] == "true"
+        assert await db_session.scalar(select(func.count()).select_from(IdempotencyRecord)) == 1
+
+    @pytest.mark.asyncio
+    async def test_errors_are_replayed(self, client: AsyncClient, auth_headers_party1: dict):
+        """A stored 409 is returned again even after the conflict is gone"""
+        blocker = await client.post("/api/bookings", headers=auth_headers_party1, json=booking_json())
+        headers = {**auth_headers_party1, "Idempotency-Key": "conflict"}
+
+        first = await client.post("/api/bookings", headers=headers, json=booking_json())
+        await client.delete(f"/api/bookings/{blocker.json()['id']}", headers=auth_headers_party1)
+        retry = await client.post("/api/bookings", headers=headers, json=booking_json())
+
+        assert first.status_code == retry.status_code == 409
+        assert retry.json() == first.json()
+
+    @pytest.mark.asyncio
+    async def test_key_reused_for_other_request(self, client: AsyncClient, auth_headers_party1: dict):
+        """The same key with a different body is rejected"""
+        headers = {**auth_headers_party1, "Idempotency-Key": "reused"}
+        await client.post("/api/bookings", headers=headers, json=booking_json(60))
+
+        response = await client.post("/api/bookings", headers=headers, json=booking_json(90))
+
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_keys_are_scoped_per_user(
+        self, client: AsyncClient, auth_headers_party1: dict, auth_headers_party2: dict, db_session
+    ):
+        """Two users may use the same key"""
+        first = await client.post(
+            "/api/bookings", headers={**auth_headers_party1, "Idempotency-Key": "k"}, json=booking_json(60, 1)
+        )
+        second = await client.post(
+            "/api/bookings", headers={**auth_headers_party2, "Idempotency-Key": "k"}, json=booking_json(90, 2)
+        )
+
+        assert first.status_code == second.status_code == 201
+        assert await count_bookings(db_session) == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_wait(self, client: AsyncClient, auth_headers_party1: dict, db_session):
+        """Duplicates sent at the same time run once and share the response"""
+        headers = {**auth_headers_party1, "Idempotency-Key": "parallel"}
+
+        responses = await asyncio.gather(*(
+            client.post("/api/bookings", headers=headers, json=booking_json()) for _ in range(5)
+        ))
+
+        assert {response.status_code for response in responses} == {201}
+        assert len({response.json()["id"] for response in responses}) == 1
+        assert sum(REPLAYED_HEADER in response.headers for response in responses) == 4
+        assert await count_bookings(db_session) == 1
+
+    @pytest.mark.asyncio
+    async def test_invalid_key(self, client: AsyncClient, auth_headers_party1: dict):
+        """Overlong keys are rejected"""
+        headers = {**auth_headers_party1, "Idempotency-Key": "x" * 201}
+
+        response = await client.post("/api/bookings", headers=headers, json=booking_json())
+
+        assert response.status_code == 400
+
+
+class TestIdempotentUpdateAndDelete:
+    """Tests for PUT and DELETE with Idempotency-Key"""
+
+    @pytest.mark.asyncio
+    async def test_update_retry_keeps_version_and_etag(self, client: AsyncClient, auth_headers_party1: dict):
+        """A retried update is not applied twice"""
+        created = (await client.post("/api/bookings", headers=auth_headers_party1, json=booking_json())).json()
+        headers = {**auth_headers_party1, "Idempotency-Key": "update-1"}
+        body = {**booking_json(), "note": "Neu", "version": created["version"]}
+
+        first = await client.put(f"/api/bookings/{created['id']}", headers=headers, json=body)
+        retry = await client.put(f"/api/bookings/{created['id']}", headers=headers, json=body)
+
+        assert first.status_code == retry.status_code == 200
+        assert retry.json()["version"] == created["version"] + 1
+        assert retry.headers["etag"] == first.headers["etag"]
+
+    @pytest.mark.asyncio
+    async def test_delete_retry_is_not_404(self, client: AsyncClient, auth_headers_party1: dict):
+        """A retried delete returns the original success"""
+        created = (await client.post("/api/bookings", headers=auth_headers_party1, json=booking_json())).json()
+        headers = {**auth_headers_party1, "Idempotency-Key": "delete-1"}
+
+        first = await client.delete(f"/api/bookings/{created['id']}", headers=headers)
+        retry = await client.delete(f"/api/bookings/{created['id']}", headers=headers)
+
+        assert first.status_code == retry.status_code == 200
+        assert retry.json() == first.json()
+
+
+class TestKeyAndWriteTogether:
+    """The key is committed in the transaction of the write"""
+
+    @pytest.mark.asyncio
+    async def test_write_not_committed_without_key(
+        self, client: AsyncClient, auth_headers_party1: dict, db_session, monkeypatch
+    ):
+        """If storing the key fails, the booking is not created either - a retry can run safely"""
+        def broken(key, stored):
+            raise RuntimeError("Datenbank weg")
+
+        monkeypatch.setattr(idempotency, "record_values", broken)
+        headers = {**auth_headers_party1, "Idempotency-Key": "atomic-1"}
+
+        with pytest.raises(RuntimeError):
+            await client.post("/api/bookings", headers=headers, json=booking_json())
+
+        assert await count_bookings(db_session) == 0
+
+    @pytest.mark.asyncio
+    async def test_key_taken_by_other_worker(
+        self, client: AsyncClient, auth_headers_party1: dict, db_session, monkeypatch
+    ):
+        """A duplicate that missed the stored key rolls back its write and replays the first response"""
+        created = (await client.post("/api/bookings", headers=auth_headers_party1, json=booking_json())).json()
+        headers = {**auth_headers_party1, "Idempotency-Key": "update-race"}
+        body = {**booking_json(), "note": "Neu"}
+        first = await client.put(f"/api/bookings/{created['id']}", headers=headers, json=body)
+
+        # Another worker: no cached response, and the lookup ran before the first write committed
+        idempotency_cache.clear()
+        load_stored = idempotency.load_stored
+        lookups = []
+
+        async def late_lookup(db, key):
+            lookups.append(key)
+            return None if len(lookups) == 1 else await load_stored(db, key)
+
+        monkeypatch.setattr(idempotency, "load_stored", late_lookup)
+        retry = await client.put(f"/api/bookings/{created['id']}", headers=headers, json=body)
+
+        assert retry.status_code == 200
+        assert retry.headers[REPLAYED_HEADER] == "true"
+        assert retry.json() == first.json()
+        booking = await db_session.scalar(select(Booking).where(Booking.id == created["id"]))
+        assert booking.version == created["version"] + 1
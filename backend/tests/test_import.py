@@ -0,0 +1,207 @@
+"""
+Tests for importing bookings from iCalendar and CSV files
+"""
+import io
+import threading
+import pytest
+from httpx import AsyncClient
+from datetime import date, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from auth import User
+from database import AuditEntry, LazySession
+from importer import ImportFormatError, import_bookings, read_csv, read_ical
+from properties import properties
+
+
+YEAR = date.today().year + 1
+
+
+async def upload(client: AsyncClient, headers: dict, content: str, filename: str = "buchungen.csv", **data):
+    return await client.post(
+        "/api/import",
+        headers=headers,
+        files={"file": (filename, content.encode(), "text/calendar" if filename.endswith(".ics") else "text/csv")},
+        data={name: str(value) for name, value in data.items()}
+    )
+
+
+class TestParsing:
+    """Tests for reading rows from the files"""
+
+    def test_csv_semicolon_german(self):
+        """German spreadsheets: semicolons, German dates and column names"""
+        rows = list(read_csv(io.StringIO(
+            "Familie;Von;Bis;Notiz\n"
+            f"Extern;1.7.{YEAR};07.07.{YEAR};Gäste\n"
+            "\n"
+            f"2;{YEAR}-08-01;kaputt;\n"
+        )))
+
+        assert [(row.line, row.party, row.start_date, row.end_date, row.note) for row in rows[:1]] == [
+            (2, "Extern", date(YEAR, 7, 1), date(YEAR, 7, 7), "Gäste")
+        ]
+        assert rows[1].line == 4
+        assert rows[1].error == "Ungültiges Datum"
+
+    def test_ical_events(self):
+        """All-day DTEND is exclusive; folded and escaped summaries are decoded"""
+        rows = list(read_ical(io.StringIO(
+            "BEGIN:VCALENDAR\r\n"
+            "VERSION:2.0\r\n"
+            "BEGIN:VEVENT\r\n"
+            f"DTSTART;VALUE=DATE:{YEAR}0701\r\n"
+            f"DTEND;VALUE=DATE:{YEAR}0708\r\n"
+            "SUMMARY:Sommer\\, erste\r\n"
+            "  Woche\r\n"
+            "END:VEVENT\r\n"
+            "BEGIN:VEVENT\r\n"
+            f"DTSTART;TZID=Europe/Berlin:{YEAR}0801T150000\r\n"
+            f"DTEND;TZID=Europe/Berlin:{YEAR}0803T100000\r\n"
+            "END:VEVENT\r\n"
+            "BEGIN:VEVENT\r\n"
+            f"DTSTART;VALUE=DATE:{YEAR}1224\r\n"
+            "RRULE:FREQ=YEARLY\r\n"
+            "END:VEVENT\r\n"
+            "END:VCALENDAR\r\n"
+        )))
+
+        assert [(row.line, row.start_date, row.end_date, row.note) for row in rows[:2]] == [
+            (3, date(YEAR, 7, 1), date(YEAR, 7, 7), "Sommer, erste Woche"),
+            (9, date(YEAR, 8, 1), date(YEAR, 8, 3), None),
+        ]
+        assert rows[2].error == "Wiederkehrende Termine bitte als Serie anlegen"
+
+
+class TestImportEndpoint:
+    """Tests for POST /api/import"""
+
+    @pytest.mark.asyncio
+    async def test_csv_report(self, client: AsyncClient, auth_headers_admin: dict, db_session):
+        """Valid rows are created, the others reported with their reason"""
+        await client.post(
+            "/api/bookings",
+            headers=auth_headers_admin,
+            json={"party_id": 3, "start_date": f"{YEAR}-09-01", "end_date": f"{YEAR}-09-05"}
+        )
+        response = await upload(client, auth_headers_admin, (
+            "party,start_date,end_date,note\n"
+            f"1,{YEAR}-07-01,{YEAR}-07-07,Sommer\n"
+            f"Siggi & Mausi,{YEAR}-07-05,{YEAR}-07-10,\n"
+            f"2,{YEAR}-09-05,{YEAR}-09-06,\n"
+            f"9,{YEAR}-10-01,{YEAR}-10-02,\n"
+            f"2,{YEAR}-11-05,{YEAR}-11-01,\n"
+            f",{YEAR}-12-01,{YEAR}-12-02,\n"
+        ))
+
+        assert response.status_code == 200
+        report = response.json()
+        assert (report["created"], report["conflicts"], report["invalid"]) == (1, 2, 3)
+        assert [(row["line"], row["status"], row["detail"]) for row in report["rows"]] == [
+            (2, "created", None),
+            (3, "conflict", "Es gibt bereits eine Buchung in diesem Zeitraum"),
+            (4, "conflict", "Es gibt bereits eine Buchung in diesem Zeitraum"),
+            (5, "invalid", "Ungültige Familie"),
+            (6, "invalid", "Das Ende liegt vor dem Beginn"),
+            (7, "invalid", "Familie fehlt"),
+        ]
+
+        bookings = (await client.get("/api/bookings", headers=auth_headers_admin)).json()
+        imported = next(booking for booking in bookings if booking["id"] == report["rows"][0]["id"])
+        assert (imported["party_id"], imported["note"]) == (1, "Sommer")
+        assert await db_session.scalar(select(func.count()).select_from(AuditEntry)) == 1
+
+    @pytest.mark.asyncio
+    async def test_ical_with_party(self, client: AsyncClient, auth_headers_party1: dict):
+        """iCalendar events are booked for the given party"""
+        calendar = (
+            "BEGIN:VCALENDAR\n"
+            "BEGIN:VEVENT\n"
+            f"DTSTART;VALUE=DATE:{YEAR}0701\n"
+            f"DTEND;VALUE=DATE:{YEAR}0708\n"
+            "SUMMARY:Sommer\n"
+            "END:VEVENT\n"
+            "END:VCALENDAR\n"
+        )
+
+        response = await upload(client, auth_headers_party1, calendar, "kalender.ics", party_id=1)
+
+        assert response.json()["created"] == 1
+        month = (await client.get(f"/api/calendar/month/{YEAR}/7", headers=auth_headers_party1)).json()
+        assert [day["date"] for day in month["days"] if day["bookings"]][-1] == f"{YEAR}-07-07"
+
+    @pytest.mark.asyncio
+    async def test_party_users_import_own_party_only(self, client: AsyncClient, auth_headers_party1: dict):
+        """Rows for other families are rejected for party users"""
+        response = await upload(client, auth_headers_party1, (
+            "party_id,start_date,end_date\n"
+            f"1,{YEAR}-07-01,{YEAR}-07-07\n"
+            f"2,{YEAR}-08-01,{YEAR}-08-07\n"
+        ))
+
+        assert [row["status"] for row in response.json()["rows"]] == ["created", "invalid"]
+
+    @pytest.mark.asyncio
+    async def test_unreadable_files(self, client: AsyncClient, auth_headers_admin: dict):
+        """Files without the required columns or calendar header are rejected"""
+        response = await upload(client, auth_headers_admin, "datum,wer\n2026-01-01,1\n")
+        assert response.status_code == 400
+        response = await upload(client, auth_headers_admin, "hallo\n", "kalender.ics")
+        assert response.status_code == 400
+
+
+class ThreadRecordingStream(io.StringIO):
+    """StringIO remembering the threads it was read from"""
+
+    def __init__(self, content: str):
+        super().__init__(content)
+        self.threads = set()
+
+    def readline(self, *args):
+        self.threads.add(threading.current_thread())
+        return super().readline(*args)
+
+    def __next__(self):
+        self.threads.add(threading.current_thread())
+        return super().__next__()
+
+
+class TestChunks:
+    """Tests for chunked loading"""
+
+    @pytest.mark.asyncio
+    async def test_file_read_off_event_loop(self, db_session):
+        """Header and rows are read in the worker thread, also when the header is rejected"""
+        db = LazySession(async_sessionmaker(db_session.bind, expire_on_commit=False))
+        admin = User(username="Admin", party_id=None, is_admin=True)
+
+        stream = ThreadRecordingStream(f"party_id;start_date;end_date\n1;{YEAR}-03-01;{YEAR}-03-02\n")
+        report = await import_bookings(db, properties.get(1), admin, read_csv(stream))
+        assert report["created"] == 1
+        assert stream.threads and threading.current_thread() not in stream.threads
+
+        stream = ThreadRecordingStream("party_id,von\n1,1.3.2030\n")
+        with pytest.raises(ImportFormatError):
+            await import_bookings(db, properties.get(1), admin, read_csv(stream))
+        assert stream.threads and threading.current_thread() not in stream.threads
+
+    @pytest.mark.asyncio
+    async def test_statements_per_chunk(self, db_session, query_counter):
+        """Every chunk costs the same few statements, regardless of its size; overlaps are found across chunks"""
+        first = date(YEAR, 1, 1)
+        content = "party_id,start_date,end_date\n" + "".join(
+            f"1,{first + timedelta(days=3 * index)},{first + timedelta(days=3 * index + 1)}\n"
+            for index in range(10)
+        ) + f"1,{YEAR}-01-02,{YEAR}-01-02\n"
+        db = LazySession(async_sessionmaker(db_session.bind, expire_on_commit=False))
+        admin = User(username="Admin", party_id=None, is_admin=True)
+
+        report = await import_bookings(
+            db, properties.get(1), admin, read_csv(io.StringIO(content)), chunk_size=5
+        )
+
+        assert (report["created"], report["conflicts"]) == (10, 1)
+        # Full chunks: change sequence, overlap range, bookings, audit entries;
+        # the last one only conflicts and stops after the overlap range
+        assert query_counter.count == 2 * 4 + 2
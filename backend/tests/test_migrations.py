@@ -0,0 +1,108 @@
+"""
+Tests for the Alembic migration chain (SQLite)
+"""
+import os
+import sqlite3
+import subprocess
+import sys
+from contextlib import closing
+from datetime import date, timedelta
+from typing import AsyncGenerator
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from database import LazySession, get_db
+from main import app
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Schema of the first release, created by init_db() before there were migrations
+INITIAL_SCHEMA = """
+CREATE TABLE bookings (
+    id INTEGER NOT NULL,
+    party_id INTEGER NOT NULL,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    note TEXT,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE INDEX ix_bookings_party_id ON bookings (party_id);
+CREATE INDEX ix_bookings_start_date ON bookings (start_date);
+CREATE INDEX ix_bookings_end_date ON bookings (end_date);
+CREATE TABLE parties (
+    id INTEGER NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    color VARCHAR(7) NOT NULL,
+    PRIMARY KEY (id)
+);
+INSERT INTO bookings (party_id, start_date, end_date) VALUES (1, '2026-01-02', '2026-01-04');
+"""
+
+
+def migrated_database(path: str) -> str:
+    """Database of the first release, upgraded to head with alembic"""
+    with closing(sqlite3.connect(path)) as connection:
+        connection.executescript(INITIAL_SCHEMA)
+    url = f"sqlite+aiosqlite:///{path}"
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=BACKEND_DIR, env={**os.environ, "DATABASE_URL": url}, check=True, capture_output=True
+    )
+    return url
+
+
+class TestMigrations:
+    """Tests for databases upgraded through the migrations"""
+
+    def test_bookings_keep_autoincrement(self, tmp_path):
+        """Rebuilding bookings in batch mode keeps AUTOINCREMENT and the id sequence"""
+        path = str(tmp_path / "upgraded.db")
+        migrated_database(path)
+
+        with closing(sqlite3.connect(path)) as connection:
+            schema = connection.execute("SELECT sql FROM sqlite_master WHERE name = 'bookings'").fetchone()[0]
+            sequence = connection.execute("SELECT seq FROM sqlite_sequence WHERE name = 'bookings'").fetchone()
+
+        assert "AUTOINCREMENT" in schema
+        assert sequence == (1,)
+
+    @pytest.mark.asyncio
+    async def test_deleted_ids_not_reused(self, client: AsyncClient, auth_headers_party1: dict, tmp_path):
+        """Create, delete the newest booking, create, delete again: ids stay unique"""
+        engine = create_async_engine(migrated_database(str(tmp_path / "upgraded.db")))
+        session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        async def upgraded_db() -> AsyncGenerator[LazySession, None]:
+            session = LazySession(session_maker)
+            try:
+                yield session
+            finally:
+                await session.close()
+
+        previous = app.dependency_overrides[get_db]
+        app.dependency_overrides[get_db] = upgraded_db
+        try:
+            start = date.today() + timedelta(days=30)
+            ids = []
+            for _ in range(2):
+                response = await client.post(
+                    "/api/bookings",
+                    json={"party_id": 1, "start_date": start.isoformat(), "end_date": start.isoformat()},
+                    headers=auth_headers_party1
+                )
+                assert response.status_code == 201
+                ids.append(response.json()["id"])
+                response = await client.delete(f"/api/bookings/{ids[-1]}", headers=auth_headers_party1)
+                assert response.status_code == 200
+
+            changes = (await client.get("/api/bookings/changes?since=0", headers=auth_headers_party1)).json()
+        finally:
+            app.dependency_overrides[get_db] = previous
+            await engine.dispose()
+
+        assert ids[0] != ids[1]
+        assert sorted(changes["deleted"]) == sorted(ids)
@@ -0,0 +1,93 @@
+"""
+Tests for event-loop monitoring and the readiness endpoint
+"""
+import asyncio
+import time
+from collections import deque
+
+import pytest
+from httpx import AsyncClient
+
+import main
+from monitoring import LoopMonitor, loop_monitor
+
+
+class TestLoopMonitor:
+    """Tests for lag sampling and stall capture"""
+
+    @pytest.mark.asyncio
+    async def test_blocking_call_recorded_as_stall(self):
+        """A blocking call shows up as lag, with the blocking frame in the stall stack"""
+        monitor = LoopMonitor(interval=0.02, stall_threshold=0.05)
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.05)
+
+        time.sleep(0.2)  # blocks the loop
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert monitor.running is False
+        slowest = monitor.slowest()[0]
+        assert slowest.duration >= 0.15
+        assert any("test_blocking_call_recorded_as_stall" in frame for frame in slowest.stack)
+
+    def test_percentiles(self):
+        """Percentiles are taken over the sample window"""
+        monitor = LoopMonitor(window=100)
+        for lag in range(100):
+            monitor.record(lag / 1000)
+
+        assert monitor.percentile(0.5) == 0.05
+        assert monitor.percentile(0.99) == 0.099
+        assert monitor.stats()["lag_max_ms"] == 99.0
+
+
+class TestReadiness:
+    """Tests for /health/ready and its admin details"""
+
+    @pytest.mark.asyncio
+    async def test_ready(self, client: AsyncClient):
+        """A healthy worker reports ready - without internals, the endpoint is public"""
+        response = await client.get("/health/ready")
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "ready", "problems": []}
+
+    @pytest.mark.asyncio
+    async def test_details_admin_only(self, client: AsyncClient, auth_headers_admin: dict, auth_headers_party1: dict):
+        """Loop, database, pool and cache details are served to admins"""
+        assert (await client.get("/api/debug/health")).status_code == 401
+        assert (await client.get("/api/debug/health", headers=auth_headers_party1)).status_code == 403
+
+        response = await client.get("/api/debug/health", headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ready"
+        assert data["database"]["ok"] is True
+        assert {"lag_p99_ms", "slowest"} <= set(data["loop"])
+        assert {"booking_snapshots", "compressed_bodies", "revoked_tokens"} <= set(data["caches"])
+
+    @pytest.mark.asyncio
+    async def test_not_ready_when_loop_lags(self, client: AsyncClient, monkeypatch):
+        """p99 lag above the threshold takes the worker out of rotation"""
+        monkeypatch.setattr(loop_monitor, "samples", deque([1.0] * 10))
+
+        response = await client.get("/health/ready")
+
+        assert response.status_code == 503
+        assert response.json()["problems"] == ["event loop lag"]
+
+    @pytest.mark.asyncio
+    async def test_not_ready_when_database_times_out(self, client: AsyncClient, auth_headers_admin: dict, monkeypatch):
+        """A database ping exceeding the timeout makes the worker not ready"""
+        monkeypatch.setattr(main, "READY_DB_TIMEOUT", 0)
+
+        response = await client.get("/health/ready")
+
+        assert response.status_code == 503
+        assert "database unreachable" in response.json()["problems"]
+        details = (await client.get("/api/debug/health", headers=auth_headers_admin)).json()
+        assert details["database"]["ok"] is False
@@ -0,0 +1,146 @@
+"""
+Tests for the month grid endpoint and its per-month cache
+"""
+import pytest
+from httpx import AsyncClient
+from datetime import date
+from types import SimpleNamespace
+
+from database import DEFAULT_PROPERTY_ID
+from month_grid import build_month_grid, grid_bounds, month_grids
+
+
+def booking(id: int, start: date, end: date, party_id: int = 1):
+    return SimpleNamespace(id=id, party_id=party_id, start_date=start, end_date=end)
+
+
+def cells(grid: dict) -> dict[str, list]:
+    return {day["date"]: day["bookings"] for day in grid["days"]}
+
+
+async def create_booking(client: AsyncClient, headers: dict, start: date, end: date):
+    response = await client.post(
+        "/api/bookings",
+        headers=headers,
+        json={"party_id": 1, "start_date": str(start), "end_date": str(end)}
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+class TestGridBuild:
+    """Tests for the sweep building the 42 cells"""
+
+    def test_bounds_start_on_monday(self):
+        """The grid starts on the Monday on or before the 1st"""
+        assert grid_bounds(2026, 6) == (date(2026, 6, 1), date(2026, 7, 12))      # 1st is a Monday
+        assert grid_bounds(2026, 11) == (date(2026, 10, 26), date(2026, 12, 6))
+
+    def test_positions(self):
+        """Bookings get start/middle/end/single positions per day"""
+        grid = build_month_grid(2026, 6, [
+            booking(1, date(2026, 5, 20), date(2026, 6, 2)),
+            booking(2, date(2026, 6, 10), date(2026, 6, 10)),
+            booking(3, date(2026, 6, 11), date(2026, 6, 13)),
+        ])
+        by_date = cells(grid)
+
+        assert len(grid["days"]) == 42
+        assert by_date["2026-06-01"] == [{"id": 1, "party_id": 1, "position": "middle"}]
+        assert by_date["2026-06-02"][0]["position"] == "end"
+        assert by_date["2026-06-03"] == []
+        assert by_date["2026-06-10"][0]["position"] == "single"
+        assert [cell[0]["position"] for cell in (by_date["2026-06-11"], by_date["2026-06-12"], by_date["2026-06-13"])] == [
+            "start", "middle", "end"
+        ]
+        assert by_date["2026-06-14"] == []
+
+    def test_matches_naive_filter(self):
+        """The sweep gives the same cells as filtering all bookings per day"""
+        bookings = [
+            booking(index, date(2026, 1, 1 + index * 3), date(2026, 1, 3 + index * 3), party_id=index % 4 + 1)
+            for index in range(10)
+        ]
+        grid = build_month_grid(2026, 1, bookings)
+
+        for day in grid["days"]:
+            current = date.fromisoformat(day["date"])
+            expected = [b.id for b in bookings if b.start_date <= current <= b.end_date]
+            assert [cell["id"] for cell in day["bookings"]] == expected
+
+
+class TestMonthGridEndpoint:
+    """Tests for GET /api/calendar/month/{year}/{month}"""
+
+    @pytest.mark.asyncio
+    async def test_requires_auth(self, client: AsyncClient):
+        """Anonymous requests are rejected"""
+        response = await client.get("/api/calendar/month/2026/6")
+
+        assert response.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_invalid_month(self, client: AsyncClient, auth_headers_admin: dict):
+        """Months outside 1..12 are rejected"""
+        response = await client.get("/api/calendar/month/2026/13", headers=auth_headers_admin)
+
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_grid_shows_bookings(self, client: AsyncClient, auth_headers_admin: dict):
+        """A booking across a month boundary appears in both grids"""
+        today = date.today()
+        year = today.year + 1
+        created = await create_booking(client, auth_headers_admin, date(year, 3, 30), date(year, 4, 2))
+
+        march = (await client.get(f"/api/calendar/month/{year}/3", headers=auth_headers_admin)).json()
+        april = (await client.get(f"/api/calendar/month/{year}/4", headers=auth_headers_admin)).json()
+
+        assert cells(march)[f"{year}-03-30"] == [{"id": created["id"], "party_id": 1, "position": "start"}]
+        assert cells(april)[f"{year}-04-02"][0]["position"] == "end"
+        assert sum(day["in_month"] for day in april["days"]) == 30
+
+    @pytest.mark.asyncio
+    async def test_cached_with_etag(self, client: AsyncClient, auth_headers_admin: dict, query_counter):
+        """A second read is served from the cache and revalidates with 304"""
+        year = date.today().year + 1
+        first = await client.get(f"/api/calendar/month/{year}/5", headers=auth_headers_admin)
+
+        query_counter.reset()
+        second = await client.get(
+            f"/api/calendar/month/{year}/5",
+            headers={**auth_headers_admin, "If-None-Match": first.headers["etag"]}
+        )
+
+        assert second.status_code == 304
+        assert query_counter.count == 0
+
+    @pytest.mark.asyncio
+    async def test_write_invalidates_only_touched_months(self, client: AsyncClient, auth_headers_admin: dict):
+        """Create, move and delete drop only the months showing the booking"""
+        year = date.today().year + 1
+        for month in (2, 6, 9):
+            await client.get(f"/api/calendar/month/{year}/{month}", headers=auth_headers_admin)
+
+        grids = month_grids[DEFAULT_PROPERTY_ID]
+        created = await create_booking(client, auth_headers_admin, date(year, 6, 10), date(year, 6, 12))
+        assert (year, 6) not in grids
+        assert (year, 2) in grids and (year, 9) in grids
+
+        await client.get(f"/api/calendar/month/{year}/6", headers=auth_headers_admin)
+        response = await client.put(
+            f"/api/bookings/{created['id']}",
+            headers=auth_headers_admin,
+            json={"party_id": 1, "start_date": f"{year}-09-10", "end_date": f"{year}-09-12"}
+        )
+        assert response.status_code == 200
+        assert (year, 6) not in grids and (year, 9) not in grids
+        assert (year, 2) in grids
+
+        await client.get(f"/api/calendar/month/{year}/9", headers=auth_headers_admin)
+        await client.delete(f"/api/bookings/{created['id']}", headers=auth_headers_admin)
+        assert (year, 9) not in grids
+        assert (year, 2) in grids
+
+        september = (await client.get(f"/api/calendar/month/{year}/9", headers=auth_headers_admin)).json()
+        assert all(day["bookings"] == [] for day in september["days"])
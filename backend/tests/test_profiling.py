@@ -0,0 +1,99 @@
+"""
+Tests for on-demand profiling
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from profiling import SamplingProfiler, request_profiles
+
+
+def busy_wait(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class TestSamplingProfiler:
+    """Tests for the stack sampler"""
+
+    @pytest.mark.asyncio
+    async def test_attributes_time_to_busy_function(self):
+        """A function hogging the loop dominates the samples"""
+        profiler = SamplingProfiler(threading.get_ident(), interval=0.002)
+        sampling = asyncio.create_task(asyncio.to_thread(profiler.run, 0.2))
+        await asyncio.sleep(0.01)
+        busy_wait(0.1)
+        await sampling
+
+        functions = {entry["function"]: entry for entry in profiler.stats()["functions"]}
+        assert functions["busy_wait"]["total_samples"] > 10
+
+
+class TestProfileEndpoint:
+    """Tests for /api/debug/profile"""
+
+    @pytest.mark.asyncio
+    async def test_admin_only(self, client: AsyncClient, auth_headers_party1: dict):
+        """Non-admins cannot profile"""
+        response = await client.post("/api/debug/profile?seconds=0.1", headers=auth_headers_party1)
+
+        assert response.status_code == 403
+
+    @pytest.mark.asyncio
+    async def test_window_profile(self, client: AsyncClient, auth_headers_admin: dict):
+        """Live requests during the window show up in the stats"""
+        async def traffic():
+            await asyncio.sleep(0.02)
+            for _ in range(5):
+                await client.get("/api/bookings", headers=auth_headers_admin)
+
+        response, _ = await asyncio.gather(
+            client.post("/api/debug/profile?seconds=0.3", headers=auth_headers_admin),
+            traffic()
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["samples"] > 0
+        assert {"function", "file", "own_ms", "total_ms"} <= set(data["functions"][0])
+
+    @pytest.mark.asyncio
+    async def test_concurrent_window_rejected(self, client: AsyncClient, auth_headers_admin: dict):
+        """Only one profile runs at a time"""
+        first, second = await asyncio.gather(
+            client.post("/api/debug/profile?seconds=0.2", headers=auth_headers_admin),
+            client.post("/api/debug/profile?seconds=0.2", headers=auth_headers_admin)
+        )
+
+        assert sorted([first.status_code, second.status_code]) == [200, 409]
+
+
+class TestRequestProfile:
+    """Tests for the X-Profile header"""
+
+    @pytest.mark.asyncio
+    async def test_profiled_request(self, client: AsyncClient, auth_headers_admin: dict):
+        """An admin request with X-Profile gets a profile id to fetch the stats"""
+        response = await client.get("/api/bookings", headers={**auth_headers_admin, "X-Profile": "1"})
+        assert response.status_code == 200
+        profile_id = response.headers["x-profile-id"]
+
+        response = await client.get(f"/api/debug/profile/{profile_id}", headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        assert response.json()["path"] == "/api/bookings"
+        assert response.json()["functions"][0]["calls"] > 0
+
+    @pytest.mark.asyncio
+    async def test_header_ignored_for_non_admin(self, client: AsyncClient, auth_headers_party1: dict):
+        """Non-admin requests are not profiled"""
+        before = len(request_profiles)
+        response = await client.get("/api/bookings", headers={**auth_headers_party1, "X-Profile": "1"})
+
+        assert response.status_code == 200
+        assert "x-profile-id" not in response.headers
+        assert len(request_profiles) == before
@@ -0,0 +1,204 @@
+"""
+Tests for multiple properties (houses)
+"""
+import pytest
+from httpx import AsyncClient
+from datetime import date, timedelta
+
+import auth
+from cache import booking_snapshots
+from database import DEFAULT_PROPERTY_ID
+
+
+START = date.today() + timedelta(days=60)
+
+
+async def create_property(client: AsyncClient, headers: dict, name: str = "Strandhaus") -> dict:
+    response = await client.post(
+        "/api/properties",
+        headers=headers,
+        json={"name": name, "parties": [{"name": "Familie Nord", "color": "#123456"}, {"name": "Familie Süd", "color": "#654321"}]}
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def booking_json(party_id: int, days: int = 0) -> dict:
+    start = START + timedelta(days=days)
+    return {"party_id": party_id, "start_date": str(start), "end_date": str(start + timedelta(days=3))}
+
+
+class TestPropertyEndpoints:
+    """Tests for /api/properties"""
+
+    @pytest.mark.asyncio
+    async def test_create_admin_only(self, client: AsyncClient, auth_headers_admin: dict, auth_headers_party1: dict):
+        """Admins add properties; new parties get ids of their own"""
+        response = await client.post(
+            "/api/properties", headers=auth_headers_party1, json={"name": "Hütte", "parties": [{"name": "A", "color": "#000000"}]}
+        )
+        assert response.status_code == 403
+
+        created = await create_property(client, auth_headers_admin)
+
+        assert created["id"] != DEFAULT_PROPERTY_ID
+        assert [party["name"] for party in created["parties"]] == ["Familie Nord", "Familie Süd"]
+        assert min(party["id"] for party in created["parties"]) > 4
+
+    @pytest.mark.asyncio
+    async def test_visibility(self, client: AsyncClient, auth_headers_admin: dict, auth_headers_party1: dict):
+        """Party users only see and reach the property of their party"""
+        created = await create_property(client, auth_headers_admin)
+
+        admin_view = (await client.get("/api/properties", headers=auth_headers_admin)).json()
+        party_view = (await client.get("/api/properties", headers=auth_headers_party1)).json()
+        assert [prop["id"] for prop in admin_view] == [DEFAULT_PROPERTY_ID, created["id"]]
+        assert [prop["id"] for prop in party_view] == [DEFAULT_PROPERTY_ID]
+
+        response = await client.get(f"/api/properties/{created['id']}/bookings", headers=auth_headers_party1)
+        assert response.status_code == 403
+        response = await client.get("/api/properties/999/bookings", headers=auth_headers_admin)
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_parties_per_property(self, client: AsyncClient, auth_headers_admin: dict):
+        """Each property lists its own parties; the unscoped route is the default property"""
+        created = await create_property(client, auth_headers_admin)
+
+        default = (await client.get("/api/parties", headers=auth_headers_admin)).json()
+        scoped = (await client.get(f"/api/properties/{created['id']}/parties", headers=auth_headers_admin)).json()
+
+        assert len(default) == 4
+        assert scoped == created["parties"]
+
+
+class TestPropertyLogins:
+    """Tests for logins of parties of further properties"""
+
+    @pytest.fixture(autouse=True)
+    def fast_hashing(self, monkeypatch):
+        monkeypatch.setattr(auth, "PASSWORD_HASH_ITERATIONS", 1000)
+
+    async def create_with_login(self, client: AsyncClient, headers: dict) -> dict:
+        response = await client.post(
+            "/api/properties",
+            headers=headers,
+            json={"name": "Strandhaus", "parties": [
+                {"name": "Familie Nord", "color": "#123456", "password": "nord123"},
+                {"name": "Familie Süd", "color": "#654321"},
+            ]}
+        )
+        assert response.status_code == 201
+        return response.json()
+
+    @pytest.mark.asyncio
+    async def test_party_logs_in_to_its_property(self, client: AsyncClient, auth_headers_admin: dict):
+        """A party with a password logs in and only reaches its own house"""
+        created = await self.create_with_login(client, auth_headers_admin)
+
+        response = await client.post("/api/auth/login", json={"username": "Familie Nord", "password": "nord123"})
+        assert response.status_code == 200
+        assert response.json()["user"]["party_id"] == created["parties"][0]["id"]
+        headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+        visible = (await client.get("/api/properties", headers=headers)).json()
+        assert [prop["id"] for prop in visible] == [created["id"]]
+        scoped = f"/api/properties/{created['id']}/bookings"
+        assert (await client.post(scoped, headers=headers, json=booking_json(created["parties"][0]["id"]))).status_code == 201
+        assert (await client.get("/api/bookings", headers=headers)).status_code == 403
+
+    @pytest.mark.asyncio
+    async def test_wrong_or_missing_password_rejected(self, client: AsyncClient, auth_headers_admin: dict):
+        """Wrong passwords and parties without a password cannot log in"""
+        await self.create_with_login(client, auth_headers_admin)
+
+        for username, password in (("Familie Nord", "falsch"), ("Familie Süd", ""), ("Familie Süd", "x"), ("Niemand", "x")):
+            response = await client.post("/api/auth/login", json={"username": username, "password": password})
+            assert response.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_login_names_unique(self, client: AsyncClient, auth_headers_admin: dict):
+        """A login name may not be taken by another party or by Admin"""
+        for name in ("Siggi & Mausi", "Admin"):
+            response = await client.post(
+                "/api/properties",
+                headers=auth_headers_admin,
+                json={"name": "Hütte", "parties": [{"name": name, "color": "#000000", "password": "geheim"}]}
+            )
+            assert response.status_code == 409
+
+
+class TestScopedBookings:
+    """Tests for property-scoped booking routes"""
+
+    @pytest.mark.asyncio
+    async def test_overlap_is_per_property(self, client: AsyncClient, auth_headers_admin: dict):
+        """The same dates can be booked in two houses, but not twice in one"""
+        created = await create_property(client, auth_headers_admin)
+        scoped = f"/api/properties/{created['id']}/bookings"
+        party_id = created["parties"][0]["id"]
+
+        assert (await client.post("/api/bookings", headers=auth_headers_admin, json=booking_json(1))).status_code == 201
+        assert (await client.post(scoped, headers=auth_headers_admin, json=booking_json(party_id))).status_code == 201
+        assert (await client.post(scoped, headers=auth_headers_admin, json=booking_json(party_id, 1))).status_code == 409
+
+        default = (await client.get("/api/bookings", headers=auth_headers_admin)).json()
+        house = (await client.get(scoped, headers=auth_headers_admin)).json()
+        assert [booking["party_id"] for booking in default] == [1]
+        assert [booking["party_name"] for booking in house] == ["Familie Nord"]
+
+    @pytest.mark.asyncio
+    async def test_parties_of_other_properties_rejected(self, client: AsyncClient, auth_headers_admin: dict):
+        """A booking must be for a party of the same property"""
+        created = await create_property(client, auth_headers_admin)
+
+        response = await client.post(
+            f"/api/properties/{created['id']}/bookings", headers=auth_headers_admin, json=booking_json(1)
+        )
+        assert response.status_code == 422
+        response = await client.post("/api/bookings", headers=auth_headers_admin, json=booking_json(created["parties"][0]["id"]))
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_bookings_only_reachable_through_their_property(self, client: AsyncClient, auth_headers_admin: dict):
+        """Updating or deleting a booking through another property's route is a 404"""
+        created = await create_property(client, auth_headers_admin)
+        booking = (await client.post("/api/bookings", headers=auth_headers_admin, json=booking_json(1))).json()
+        other = f"/api/properties/{created['id']}/bookings/{booking['id']}"
+
+        assert (await client.put(other, headers=auth_headers_admin, json=booking_json(1, 10))).status_code == 422
+        assert (await client.delete(other, headers=auth_headers_admin)).status_code == 404
+        response = await client.put(
+            other, headers=auth_headers_admin, json=booking_json(created["parties"][0]["id"], 10)
+        )
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_change_sequence_per_property(self, client: AsyncClient, auth_headers_admin: dict):
+        """Each property counts its own changes and only syncs its own bookings"""
+        created = await create_property(client, auth_headers_admin)
+        for days in (0, 10, 20):
+            await client.post("/api/bookings", headers=auth_headers_admin, json=booking_json(1, days))
+        scoped = f"/api/properties/{created['id']}/bookings"
+        await client.post(scoped, headers=auth_headers_admin, json=booking_json(created["parties"][0]["id"]))
+
+        changes = (await client.get(f"{scoped}/changes", headers=auth_headers_admin)).json()
+
+        assert changes["seq"] == 1
+        assert len(changes["upserts"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_caches_per_property(self, client: AsyncClient, auth_headers_admin: dict, query_counter):
+        """A write to one house keeps the cached lists of the others"""
+        created = await create_property(client, auth_headers_admin)
+        scoped = f"/api/properties/{created['id']}/bookings"
+        first = await client.get("/api/bookings", headers=auth_headers_admin)
+
+        await client.post(scoped, headers=auth_headers_admin, json=booking_json(created["parties"][0]["id"]))
+        query_counter.reset()
+        second = await client.get("/api/bookings", headers=auth_headers_admin)
+
+        assert query_counter.count == 0
+        assert second.headers["etag"] == first.headers["etag"]
+        assert booking_snapshots[DEFAULT_PROPERTY_ID].builds == 1
+        assert booking_snapshots[created["id"]].builds == 0
@@ -0,0 +1,136 @@
+"""
+Query plan regression tests for the hot booking queries
+Seeds 100k bookings spread over 200 properties and fails if a query falls
+back to a sequential scan or reads beyond the requested property.
+PostgreSQL plans are checked when TEST_POSTGRES_URL points to a scratch database.
+"""
+import json
+import os
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from database import Base, Booking
+from main import booking_overlap_condition
+
+
+SEED_ROWS = 100_000
+SEED_PROPERTIES = 200
+PROPERTY_ID = 1
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+# Upcoming dates - the seeded history ends before them
+WINDOW_START = date(2090, 7, 1)
+WINDOW_END = WINDOW_START + timedelta(days=14)
+
+
+def hot_queries() -> dict:
+    """The queries that run on every booking request or calendar view"""
+    return {
+        "overlap": select(booking_overlap_condition(PROPERTY_ID, WINDOW_START, WINDOW_END)),
+        "overlap_excluding": select(booking_overlap_condition(PROPERTY_ID, WINDOW_START, WINDOW_END, exclude_id=5)),
+        "window": select(Booking).where(
+            Booking.property_id == PROPERTY_ID,
+            Booking.start_date <= WINDOW_END,
+            Booking.end_date >= WINDOW_START
+        ).order_by(Booking.start_date),
+        "party": select(Booking).where(
+            Booking.party_id == 1,
+            Booking.start_date >= WINDOW_START
+        ).order_by(Booking.start_date),
+        "changes": select(Booking).where(Booking.property_id == PROPERTY_ID, Booking.seq > SEED_ROWS - 10),
+    }
+
+
+def compile_query(query, engine) -> str:
+    return str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+
+
+class TestSQLitePlans:
+    """EXPLAIN QUERY PLAN on SQLite"""
+
+    @pytest.fixture(scope="class")
+    def seeded_engine(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            # Three bookings per day, 200 properties, 4 parties, ending 2081
+            conn.execute(text(
+                """
+                WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < :rows)
+                INSERT INTO bookings (property_id, party_id, start_date, end_date, seq, version, created_at, updated_at)
+                SELECT i % :properties + 1, i % 4 + 1,
+                       date('1990-01-01', '+' || (i / 3) || ' days'),
+                       date('1990-01-01', '+' || (i / 3 + 2) || ' days'),
+                       i, 1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+                FROM n
+                """
+            ), {"rows": SEED_ROWS, "properties": SEED_PROPERTIES})
+        yield engine
+        engine.dispose()
+
+    @pytest.mark.parametrize("name", list(hot_queries()))
+    def test_no_sequential_scan(self, seeded_engine, name: str):
+        """Hot queries search an index instead of scanning the table"""
+        sql = compile_query(hot_queries()[name], seeded_engine)
+        with seeded_engine.connect() as conn:
+            plan = [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+        scans = [step for step in plan if step.startswith("SCAN") and step != "SCAN CONSTANT ROW"]
+        assert scans == [], f"{name}: {plan}"
+
+    def test_overlap_uses_composite_index(self, seeded_engine):
+        """The overlap check is answered from the (property_id, end_date, start_date) index"""
+        sql = compile_query(hot_queries()["overlap"], seeded_engine)
+        with seeded_engine.connect() as conn:
+            plan = " ".join(row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+
+        assert "ix_bookings_property_end_start" in plan
+        assert "property_id=?" in plan  # other properties' rows are never read
+
+
+def seq_scanned_tables(node: dict) -> list[str]:
+    """Relations read by Seq Scan nodes anywhere in a JSON plan"""
+    tables = [node["Relation Name"]] if node.get("Node Type") == "Seq Scan" else []
+    for child in node.get("Plans", []):
+        tables += seq_scanned_tables(child)
+    return tables
+
+
+@pytest.mark.skipif(not TEST_POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+class TestPostgresPlans:
+    """EXPLAIN on PostgreSQL (tables are created and dropped in the target database)"""
+
+    @pytest.mark.asyncio
+    async def test_no_sequential_scan(self):
+        """Hot queries use an index scan on an analyzed 100k-row table"""
+        engine = create_async_engine(TEST_POSTGRES_URL)
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.execute(text(
+                    """
+                    INSERT INTO bookings (property_id, party_id, start_date, end_date, seq, version, created_at, updated_at)
+                    SELECT i % :properties + 1, i % 4 + 1,
+                           DATE '1990-01-01' + i / 3,
+                           DATE '1990-01-01' + i / 3 + 2,
+                           i, 1, now(), now()
+                    FROM generate_series(1, :rows) AS i
+                    """
+                ), {"rows": SEED_ROWS, "properties": SEED_PROPERTIES})
+                await conn.execute(text("ANALYZE bookings"))
+
+            async with engine.connect() as conn:
+                for name, query in hot_queries().items():
+                    sql = compile_query(query, engine)
+                    result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")
+                    plan = result.scalar()
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    assert seq_scanned_tables(plan[0]["Plan"]) == [], f"{name}: {plan}"
+        finally:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+            await engine.dispose()
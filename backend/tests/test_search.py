@@ -0,0 +1,124 @@
+"""
+Tests for full-text search over booking notes
+"""
+import pytest
+from httpx import AsyncClient
+from datetime import date, timedelta
+from sqlalchemy import text
+
+from archive import archive_bookings
+from database import Booking
+from search import fts_query
+
+
+async def create_booking(client: AsyncClient, headers: dict, days: int, note: str) -> dict:
+    start = date.today() + timedelta(days=days)
+    response = await client.post(
+        "/api/bookings",
+        headers=headers,
+        json={"party_id": 1, "start_date": str(start), "end_date": str(start + timedelta(days=2)), "note": note}
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+async def search(client: AsyncClient, headers: dict, query: str) -> list[int]:
+    response = await client.get(f"/api/bookings/search?{query}", headers=headers)
+    assert response.status_code == 200
+    return [booking["id"] for booking in response.json()]
+
+
+class TestFtsQuery:
+    """Tests for turning user input into an FTS5 query"""
+
+    def test_words_become_prefixes(self):
+        """Each word is quoted and matched as prefix"""
+        assert fts_query("Geburtstag Oma") == '"Geburtstag"* "Oma"*'
+
+    def test_syntax_is_neutralized(self):
+        """FTS5 operators and quotes in the input cannot break the query"""
+        assert fts_query('Handwerker" OR NEAR(') == '"Handwerker"* "OR"* "NEAR"*'
+        assert fts_query("-- !!") is None
+
+
+class TestSearchEndpoint:
+    """Tests for GET /api/bookings/search"""
+
+    @pytest.mark.asyncio
+    async def test_requires_auth(self, client: AsyncClient):
+        """Anonymous searches are rejected"""
+        response = await client.get("/api/bookings/search?q=Oma")
+
+        assert response.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_finds_notes(self, client: AsyncClient, auth_headers_admin: dict):
+        """Words and word prefixes match, case- and accent-insensitive"""
+        birthday = await create_booking(client, auth_headers_admin, 50, "Geburtstagsfeier von Oma Müller")
+        craftsmen = await create_booking(client, auth_headers_admin, 60, "Handwerker kommen")
+        await create_booking(client, auth_headers_admin, 70, None)
+
+        assert await search(client, auth_headers_admin, "q=geburtstag") == [birthday["id"]]
+        assert await search(client, auth_headers_admin, "q=muller") == [birthday["id"]]
+        assert await search(client, auth_headers_admin, "q=Handwerker") == [craftsmen["id"]]
+        assert await search(client, auth_headers_admin, "q=Urlaub") == []
+        assert await search(client, auth_headers_admin, "q=%21%21") == []
+
+    @pytest.mark.asyncio
+    async def test_ranked(self, client: AsyncClient, auth_headers_admin: dict):
+        """Notes matching more often rank first"""
+        once = await create_booking(client, auth_headers_admin, 50, "Gäste am Wochenende, danach Putzen und noch mehr")
+        twice = await create_booking(client, auth_headers_admin, 60, "Gäste, Gäste")
+
+        assert await search(client, auth_headers_admin, "q=Gäste") == [twice["id"], once["id"]]
+
+    @pytest.mark.asyncio
+    async def test_date_range(self, client: AsyncClient, auth_headers_admin: dict):
+        """from_date/to_date restrict results to overlapping bookings"""
+        early = await create_booking(client, auth_headers_admin, 50, "Handwerker Bad")
+        late = await create_booking(client, auth_headers_admin, 150, "Handwerker Küche")
+        middle = str(date.today() + timedelta(days=100))
+
+        assert await search(client, auth_headers_admin, f"q=Handwerker&to_date={middle}") == [early["id"]]
+        assert await search(client, auth_headers_admin, f"q=Handwerker&from_date={middle}") == [late["id"]]
+
+    @pytest.mark.asyncio
+    async def test_index_follows_writes(self, client: AsyncClient, auth_headers_admin: dict):
+        """Updated notes are found by their new text only; deleted bookings disappear"""
+        booking = await create_booking(client, auth_headers_admin, 50, "Geburtstag")
+        await client.put(
+            f"/api/bookings/{booking['id']}",
+            headers=auth_headers_admin,
+            json={
+                "party_id": 1, "start_date": booking["start_date"], "end_date": booking["end_date"],
+                "note": "Hochzeit", "version": booking["version"]
+            }
+        )
+
+        assert await search(client, auth_headers_admin, "q=Geburtstag") == []
+        assert await search(client, auth_headers_admin, "q=Hochzeit") == [booking["id"]]
+
+        await client.delete(f"/api/bookings/{booking['id']}", headers=auth_headers_admin)
+        assert await search(client, auth_headers_admin, "q=Hochzeit") == []
+
+    @pytest.mark.asyncio
+    async def test_archived_bookings_stay_searchable(self, client: AsyncClient, auth_headers_admin: dict, db_session):
+        """Moving a booking to the archive keeps it in the index"""
+        old_start = date.today().replace(month=1, day=1) - timedelta(days=800)
+        db_session.add(Booking(party_id=2, start_date=old_start, end_date=old_start + timedelta(days=3), note="Silvester", seq=1))
+        await db_session.commit()
+
+        assert await archive_bookings(db_session) == 1
+        assert await search(client, auth_headers_admin, "q=Silvester") != []
+
+    @pytest.mark.asyncio
+    async def test_uses_index(self, db_session):
+        """The match is answered by the FTS index, not by scanning bookings"""
+        plan = await db_session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT bookings.id FROM bookings "
+            "JOIN booking_search ON booking_search.rowid = bookings.id WHERE booking_search MATCH 'oma'"
+        ))
+        details = " ".join(row.detail for row in plan)
+
+        assert "VIRTUAL TABLE INDEX" in details
+        assert "SCAN bookings" not in details
@@ -0,0 +1,217 @@
+"""
+Tests for recurring booking series
+"""
+import pytest
+from httpx import AsyncClient
+from datetime import date
+from sqlalchemy import func, select
+
+from database import BookingSeries
+from series import Series, booking_series, occurrence_id
+
+
+NEXT_YEAR = date.today().year + 1
+
+
+def summer_week(**rule) -> dict:
+    """Yearly first week of July for party 1, for 20 years unless overridden"""
+    return {
+        "party_id": 1,
+        "start_date": str(date(NEXT_YEAR, 7, 1)),
+        "end_date": str(date(NEXT_YEAR, 7, 7)),
+        "note": "Sommerwoche",
+        "freq": "yearly",
+        "count": 20,
+        **rule,
+    }
+
+
+async def create_series(client: AsyncClient, headers: dict, **rule) -> dict:
+    response = await client.post("/api/series", headers=headers, json=summer_week(**rule))
+    assert response.status_code == 201
+    return response.json()
+
+
+class TestExpansion:
+    """Tests for expanding a recurrence rule"""
+
+    def test_only_requested_range(self):
+        """A 20-year series yields just the occurrences overlapping the range"""
+        series = Series(id=1, party_ids=(1,), start_date=date(2030, 7, 1), end_date=date(2030, 7, 7), freq="yearly", count=20)
+
+        found = list(series.occurrences(date(2040, 1, 1), date(2041, 7, 3)))
+
+        assert [occurrence.start_date for occurrence in found] == [date(2040, 7, 1), date(2041, 7, 1)]
+        assert [occurrence.index for occurrence in found] == [10, 11]
+        assert series.last_end_date == date(2049, 7, 7)
+
+    def test_weekly_until_and_skipped(self):
+        """until bounds the series; skipped start dates are left out"""
+        series = Series(
+            id=2, party_ids=(2,), start_date=date(2030, 1, 5), end_date=date(2030, 1, 6),
+            freq="weekly", interval=2, until=date(2030, 3, 1), skipped={date(2030, 2, 2)}
+        )
+
+        starts = [occurrence.start_date for occurrence in series.occurrences(date.min, date.max)]
+
+        assert starts == [date(2030, 1, 5), date(2030, 1, 19), date(2030, 2, 16)]
+
+    def test_rotation_and_leap_day(self):
+        """Parties take turns; Feb 29 falls back to Feb 28"""
+        series = Series(id=3, party_ids=(1, 2, 3), start_date=date(2028, 2, 29), end_date=date(2028, 3, 2), freq="yearly", count=4)
+
+        found = list(series.occurrences(date.min, date.max))
+
+        assert [occurrence.party_id for occurrence in found] == [1, 2, 3, 1]
+        assert found[1].start_date == date(2029, 2, 28)
+        assert found[1].end_date == date(2029, 3, 2)
+        assert found[1].id == occurrence_id(3, 1) < 0
+
+
+class TestSeriesEndpoints:
+    """Tests for /api/series"""
+
+    @pytest.mark.asyncio
+    async def test_one_row_expanded_in_list(self, client: AsyncClient, auth_headers_party1: dict, db_session):
+        """A 20-year series is one row; /api/bookings shows the occurrences up to the horizon"""
+        created = await create_series(client, auth_headers_party1)
+
+        response = await client.get("/api/bookings", headers=auth_headers_party1)
+        occurrences = [booking for booking in response.json() if booking["series_id"] == created["id"]]
+
+        assert await db_session.scalar(select(func.count()).select_from(BookingSeries)) == 1
+        assert [booking["start_date"] for booking in occurrences] == [f"{NEXT_YEAR}-07-01", f"{NEXT_YEAR + 1}-07-01"]
+        assert all(booking["id"] < 0 and booking["note"] == "Sommerwoche" for booking in occurrences)
+
+    @pytest.mark.asyncio
+    async def test_export_range(self, client: AsyncClient, auth_headers_party1: dict):
+        """The export expands exactly the requested range"""
+        await create_series(client, auth_headers_party1)
+
+        response = await client.get(
+            f"/api/bookings/export?from_date={NEXT_YEAR + 10}-01-01&to_date={NEXT_YEAR + 12}-12-31",
+            headers=auth_headers_party1
+        )
+
+        assert [booking["start_date"][:4] for booking in response.json()] == [str(NEXT_YEAR + year) for year in (10, 11, 12)]
+
+    @pytest.mark.asyncio
+    async def test_bookings_cannot_overlap_occurrences(self, client: AsyncClient, auth_headers_party1: dict):
+        """Creating or moving a booking onto any occurrence is a conflict"""
+        await create_series(client, auth_headers_party1)
+        clash = {"party_id": 1, "start_date": f"{NEXT_YEAR + 15}-07-05", "end_date": f"{NEXT_YEAR + 15}-07-09"}
+        free = {"party_id": 1, "start_date": f"{NEXT_YEAR + 15}-08-05", "end_date": f"{NEXT_YEAR + 15}-08-09"}
+
+        assert (await client.post("/api/bookings", headers=auth_headers_party1, json=clash)).status_code == 409
+        booking = (await client.post("/api/bookings", headers=auth_headers_party1, json=free)).json()
+        response = await client.put(f"/api/bookings/{booking['id']}", headers=auth_headers_party1, json=clash)
+
+        assert response.status_code == 409
+
+    @pytest.mark.asyncio
+    async def test_series_conflicts(self, client: AsyncClient, auth_headers_party1: dict, auth_headers_admin: dict):
+        """A series is rejected if an occurrence hits a booking or another series"""
+        await client.post(
+            "/api/bookings",
+            headers=auth_headers_admin,
+            json={"party_id": 2, "start_date": f"{NEXT_YEAR + 5}-07-03", "end_date": f"{NEXT_YEAR + 5}-07-04"}
+        )
+        response = await client.post("/api/series", headers=auth_headers_party1, json=summer_week())
+        assert response.status_code == 409
+
+        await create_series(client, auth_headers_party1, count=5)
+        response = await client.post(
+            "/api/series",
+            headers=auth_headers_admin,
+            json=summer_week(party_id=2, start_date=f"{NEXT_YEAR + 2}-07-07", end_date=f"{NEXT_YEAR + 2}-07-10")
+        )
+        assert response.status_code == 409
+
+    @pytest.mark.asyncio
+    async def test_validation(self, client: AsyncClient, auth_headers_party1: dict):
+        """Series must be finite and their occurrences must not overlap each other"""
+        endless = summer_week()
+        del endless["count"]
+
+        assert (await client.post("/api/series", headers=auth_headers_party1, json=endless)).status_code == 422
+        # Occurrence ids leave room for 100 000 occurrences per series
+        too_long = summer_week(freq="weekly", until="3999-12-31")
+        del too_long["count"]
+        assert (await client.post("/api/series", headers=auth_headers_party1, json=too_long)).status_code == 422
+        response = await client.post(
+            "/api/series",
+            headers=auth_headers_party1,
+            json=summer_week(freq="weekly", end_date=f"{NEXT_YEAR}-07-08")
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_rotation_needs_all_parties(self, client: AsyncClient, auth_headers_party1: dict, auth_headers_admin: dict):
+        """Only admins can create series rotating between families"""
+        christmas = summer_week(
+            start_date=f"{NEXT_YEAR}-12-23", end_date=f"{NEXT_YEAR}-12-27", party_rotation=[1, 2, 3]
+        )
+
+        assert (await client.post("/api/series", headers=auth_headers_party1, json=christmas)).status_code == 403
+        response = await client.post("/api/series", headers=auth_headers_admin, json=christmas)
+        assert response.status_code == 201
+        assert response.json()["party_rotation"] == [1, 2, 3]
+
+        listed = (await client.get("/api/bookings", headers=auth_headers_party1)).json()
+        assert [booking["party_id"] for booking in listed if booking["series_id"]] == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_skip_occurrence(self, client: AsyncClient, auth_headers_party1: dict):
+        """A skipped occurrence disappears, frees its dates and syncs as deletion"""
+        created = await create_series(client, auth_headers_party1)
+        since = (await client.get("/api/bookings/changes", headers=auth_headers_party1)).json()["seq"]
+
+        response = await client.post(
+            f"/api/series/{created['id']}/exceptions", headers=auth_headers_party1, json={"date": f"{NEXT_YEAR + 1}-07-01"}
+        )
+        assert response.status_code == 201
+        assert response.json()["skipped"] == [f"{NEXT_YEAR + 1}-07-01"]
+
+        changes = (await client.get(f"/api/bookings/changes?since={since}", headers=auth_headers_party1)).json()
+        assert changes["deleted"] == [occurrence_id(created["id"], 1)]
+        assert [booking["start_date"] for booking in changes["upserts"]] == [f"{NEXT_YEAR}-07-01"]
+
+        free = {"party_id": 1, "start_date": f"{NEXT_YEAR + 1}-07-02", "end_date": f"{NEXT_YEAR + 1}-07-03"}
+        assert (await client.post("/api/bookings", headers=auth_headers_party1, json=free)).status_code == 201
+
+        response = await client.post(
+            f"/api/series/{created['id']}/exceptions", headers=auth_headers_party1, json={"date": f"{NEXT_YEAR + 1}-07-02"}
+        )
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_delete(self, client: AsyncClient, auth_headers_party1: dict, auth_headers_party2: dict):
+        """Deleting removes all occurrences; other families cannot delete"""
+        created = await create_series(client, auth_headers_party1)
+        grid = f"/api/calendar/month/{NEXT_YEAR}/7"
+        assert (await client.get(grid, headers=auth_headers_party1)).json()["days"][6]["bookings"] != []
+
+        assert (await client.delete(f"/api/series/{created['id']}", headers=auth_headers_party2)).status_code == 403
+        response = await client.delete(f"/api/series/{created['id']}", headers=auth_headers_party1)
+
+        assert response.status_code == 200
+        assert len(booking_series) == 0
+        assert (await client.get("/api/series", headers=auth_headers_party1)).json() == []
+        assert all(day["bookings"] == [] for day in (await client.get(grid, headers=auth_headers_party1)).json()["days"])
+        changes = (await client.get(f"/api/bookings/changes?since={created['seq']}", headers=auth_headers_party1)).json()
+        assert sorted(changes["deleted"]) == [occurrence_id(created["id"], 1), occurrence_id(created["id"], 0)]
+
+    @pytest.mark.asyncio
+    async def test_booking_writes_add_no_queries(self, client: AsyncClient, auth_headers_party1: dict, query_counter):
+        """The series overlap check runs in memory"""
+        await create_series(client, auth_headers_party1)
+        query_counter.reset()
+
+        response = await client.post(
+            "/api/bookings",
+            headers=auth_headers_party1,
+            json={"party_id": 1, "start_date": f"{NEXT_YEAR}-08-01", "end_date": f"{NEXT_YEAR}-08-03"}
+        )
+
+        assert response.status_code == 201
+        assert query_counter.count == 2
@@ -0,0 +1,99 @@
+"""
+Tests for concurrent booking writes (see stress.py for the full harness)
+"""
+import pytest
+from httpx import AsyncClient, ASGITransport
+from datetime import date
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from database import Base, Booking, BookingSeries, BookingSeriesException, LazySession, get_db
+from main import app
+from series import occurrence_id
+from stress import find_overlaps, run_stress
+
+
+@pytest.fixture
+async def file_db(tmp_path):
+    """
+    File-backed SQLite with a real connection pool. The shared in-memory test
+    engine runs every session on one connection, which hides write races.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/stress.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_get_db():
+        session = LazySession(session_maker)
+        try:
+            yield session
+        finally:
+            await session.close()
+
+    previous = app.dependency_overrides[get_db]
+    app.dependency_overrides[get_db] = override_get_db
+    yield session_maker
+    app.dependency_overrides[get_db] = previous
+    await engine.dispose()
+
+
+class TestConcurrentWrites:
+    """Concurrent conflicting creates and updates never double-book"""
+
+    @pytest.mark.asyncio
+    async def test_no_double_booking(self, file_db):
+        """Hundreds of concurrent writes leave no overlapping bookings"""
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            report = await run_stress(client, requests=200, concurrency=30)
+
+        assert report.statuses[201] > 0
+        assert report.statuses[409] > 0  # the workload really competed for dates
+        assert set(report.statuses) <= {200, 201, 409}
+        assert await find_overlaps(file_db) == []
+
+
+class TestFindOverlaps:
+    """Tests for the overlap verification itself"""
+
+    @pytest.mark.asyncio
+    async def test_reports_overlapping_pairs(self, db_session):
+        """Overlaps are found even behind a long booking"""
+        db_session.add_all([
+            Booking(id=1, party_id=1, start_date=date(2190, 1, 1), end_date=date(2190, 1, 20), seq=1),
+            Booking(id=2, party_id=2, start_date=date(2190, 1, 5), end_date=date(2190, 1, 6), seq=2),
+            Booking(id=3, party_id=3, start_date=date(2190, 1, 10), end_date=date(2190, 1, 12), seq=3),
+            Booking(id=4, party_id=4, start_date=date(2190, 1, 21), end_date=date(2190, 1, 22), seq=4),
+        ])
+        await db_session.commit()
+
+        overlaps = await find_overlaps(async_sessionmaker(db_session.bind))
+
+        assert overlaps == [(1, 2), (1, 3)]
+
+    @pytest.mark.asyncio
+    async def test_properties_checked_separately(self, db_session):
+        """The same dates in two houses are no overlap"""
+        db_session.add_all([
+            Booking(id=1, property_id=1, party_id=1, start_date=date(2190, 1, 1), end_date=date(2190, 1, 5), seq=1),
+            Booking(id=2, property_id=2, party_id=5, start_date=date(2190, 1, 1), end_date=date(2190, 1, 5), seq=1),
+        ])
+        await db_session.commit()
+
+        assert await find_overlaps(async_sessionmaker(db_session.bind)) == []
+
+    @pytest.mark.asyncio
+    async def test_series_occurrences_included(self, db_session):
+        """A booking overlapping an occurrence is reported, a skipped occurrence is not"""
+        db_session.add_all([
+            BookingSeries(
+                id=1, party_id=1, start_date=date(2190, 7, 1), end_date=date(2190, 7, 7), freq="yearly", count=3, seq=1
+            ),
+            BookingSeriesException(series_id=1, occurrence_date=date(2192, 7, 1)),
+            Booking(id=1, party_id=2, start_date=date(2191, 7, 5), end_date=date(2191, 7, 8), seq=2),
+            Booking(id=2, party_id=2, start_date=date(2192, 7, 5), end_date=date(2192, 7, 8), seq=3),
+        ])
+        await db_session.commit()
+
+        overlaps = await find_overlaps(async_sessionmaker(db_session.bind))
+
+        assert overlaps == [(occurrence_id(1, 1), 1)]
@@ -0,0 +1,122 @@
+"""
+Tests for request tracing
+"""
+import io
+import json
+
+import pytest
+from httpx import AsyncClient
+from datetime import date, timedelta
+
+from tracing import ConsoleExporter, FileExporter, MemoryExporter, Span, new_id, span, summarize, tracer
+
+
+@pytest.fixture
+def exporter(monkeypatch) -> MemoryExporter:
+    memory = MemoryExporter()
+    monkeypatch.setattr(tracer, "exporter", memory)
+    return memory
+
+
+async def create_booking(client: AsyncClient, headers: dict, days: int = 80):
+    start = date.today() + timedelta(days=days)
+    return await client.post(
+        "/api/bookings",
+        headers={**headers, "Accept-Encoding": "identity"},
+        json={"party_id": 1, "start_date": str(start), "end_date": str(start + timedelta(days=2))}
+    )
+
+
+class TestRequestSpans:
+    """Tests for the spans of a request"""
+
+    @pytest.mark.asyncio
+    async def test_create_booking_spans(self, client: AsyncClient, auth_headers_admin: dict, exporter):
+        """Auth, checkout, SQL, overlap check and send are separate spans of one trace"""
+        response = await create_booking(client, auth_headers_admin)
+        assert response.status_code == 201
+
+        spans = exporter.traces[-1]
+        by_name = {}
+        for item in spans:
+            by_name.setdefault(item.name, []).append(item)
+
+        root = by_name["POST /api/bookings"][0]
+        assert root.attributes["http.status_code"] == 201
+        assert {"auth.verify_token", "db.checkout", "db.query", "booking.overlap_check", "http.send"} <= set(by_name)
+        assert {item.trace_id for item in spans} == {root.trace_id}
+
+        overlap_check = by_name["booking.overlap_check"][0]
+        assert any(query.parent_id == overlap_check.span_id for query in by_name["db.query"])
+        assert all(item.end_ns >= item.start_ns for item in spans)
+
+    @pytest.mark.asyncio
+    async def test_serialization_span(self, client: AsyncClient, auth_headers_admin: dict, exporter):
+        """Building the bookings snapshot is traced as serialization"""
+        await client.get("/api/bookings", headers=auth_headers_admin)
+
+        names = [item.name for item in exporter.traces[-1]]
+        assert "GET /api/bookings" in names
+        assert "serialize" in names
+
+    @pytest.mark.asyncio
+    async def test_continues_traceparent(self, client: AsyncClient, auth_headers_admin: dict, exporter):
+        """An incoming W3C traceparent becomes the parent of the request"""
+        trace_id, parent_id = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+        await client.get(
+            "/api/auth/me",
+            headers={**auth_headers_admin, "traceparent": f"00-{trace_id}-{parent_id}-01"}
+        )
+
+        root = next(item for item in exporter.traces[-1] if item.name == "GET /api/auth/me")
+        assert root.trace_id == trace_id
+        assert root.parent_id == parent_id
+
+    def test_span_outside_request_is_noop(self):
+        """Without a traced request, span() does nothing"""
+        with span("anything") as current:
+            assert current is None
+
+
+class TestExporters:
+    """Tests for the console and OTLP file sinks"""
+
+    @pytest.mark.asyncio
+    async def test_file_export_and_summary(self, client: AsyncClient, auth_headers_admin: dict, monkeypatch, tmp_path):
+        """The file sink writes OTLP/JSON lines that summarize per endpoint"""
+        path = tmp_path / "traces.jsonl"
+        monkeypatch.setattr(tracer, "exporter", FileExporter(str(path)))
+
+        await create_booking(client, auth_headers_admin, days=90)
+        await create_booking(client, auth_headers_admin, days=100)
+        tracer.flush()
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 2
+        spans = json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert {"traceId", "spanId", "name", "startTimeUnixNano", "endTimeUnixNano"} <= set(spans[0])
+
+        summary = summarize(str(path))
+        assert {"auth.verify_token", "db.query", "booking.overlap_check"} <= set(summary["POST /api/bookings"])
+
+    def test_file_export_off_caller_thread(self, tmp_path):
+        """export() only queues; the writer thread opens the file and logs failures"""
+        exporter = FileExporter(str(tmp_path / "missing" / "traces.jsonl"))
+        root = Span(name="GET /", trace_id=new_id(16), span_id=new_id(8), parent_id=None, start_ns=1, end_ns=2)
+
+        exporter.export([root])  # would raise FileNotFoundError if written inline
+        exporter.flush()
+
+        assert not (tmp_path / "missing").exists()
+
+    @pytest.mark.asyncio
+    async def test_console_tree(self, client: AsyncClient, auth_headers_admin: dict, monkeypatch):
+        """The console sink prints the request as an indented tree"""
+        stream = io.StringIO()
+        monkeypatch.setattr(tracer, "exporter", ConsoleExporter(stream))
+
+        await client.get("/api/auth/me", headers=auth_headers_admin)
+
+        lines = stream.getvalue().splitlines()
+        assert lines[0].startswith("GET /api/auth/me ")
+        assert any(line.startswith("  auth.verify_token ") for line in lines)
@@ -0,0 +1,355 @@
+"""
+Request tracing for Ferienhaus Kalender
+Splits each request into timed spans (auth, session checkout, SQL statements,
+overlap check, serialization, response send). The current span travels in a
+contextvar, which SQLAlchemy carries into its greenlets, so spans nest without
+passing anything around.
+
+Export needs no collector:
+    TRACING=console  - one indented tree per request on stderr
+    TRACING=file     - OTLP/JSON lines (one ExportTraceServiceRequest per request)
+                       in TRACING_FILE, readable by OTLP tooling
+Summarize a trace file per endpoint with: python tracing.py traces.jsonl
+"""
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+TRACING = os.getenv("TRACING", "").lower()  # "", "console" or "file"
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+SERVICE_NAME = "ferienhaus-kalender"
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+@dataclass
+class Span:
+    """One timed operation of a trace"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    kind: int = SPAN_KIND_INTERNAL
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: bool = False
+    finished: list["Span"] = field(default_factory=list)  # root span only: spans of the trace
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_root_span: ContextVar[Optional[Span]] = ContextVar("root_span", default=None)
+
+
+def new_id(size: int) -> str:
+    return os.urandom(size).hex()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Time a block as child of the current span - a no-op outside a traced request"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    child = start_span(name, parent, kind, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException:
+        child.error = True
+        raise
+    finally:
+        _current_span.reset(token)
+        end_span(child)
+
+
+def start_span(name: str, parent: Span, kind: int, attributes: dict[str, Any]) -> Span:
+    return Span(
+        name=name,
+        trace_id=parent.trace_id,
+        span_id=new_id(8),
+        parent_id=parent.span_id,
+        kind=kind,
+        start_ns=time.time_ns(),
+        attributes=attributes,
+    )
+
+
+def end_span(finished: Span) -> None:
+    finished.end_ns = time.time_ns()
+    root = _root_span.get()
+    if root is not None:
+        root.finished.append(finished)
+
+
+def otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: list[Span]) -> dict:
+    """OTLP/JSON ExportTraceServiceRequest for the spans of one trace"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{
+                "scope": {"name": "ferienhaus.tracing"},
+                "spans": [
+                    {
+                        "traceId": item.trace_id,
+                        "spanId": item.span_id,
+                        **({"parentSpanId": item.parent_id} if item.parent_id else {}),
+                        "name": item.name,
+                        "kind": item.kind,
+                        "startTimeUnixNano": str(item.start_ns),
+                        "endTimeUnixNano": str(item.end_ns),
+                        "attributes": [{"key": key, "value": otlp_value(value)} for key, value in item.attributes.items()],
+                        "status": {"code": 2 if item.error else 1},
+                    }
+                    for item in spans
+                ],
+            }],
+        }]
+    }
+
+
+class ConsoleExporter:
+    """Prints each trace as an indented tree"""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def export(self, spans: list[Span]) -> None:
+        children = defaultdict(list)
+        for item in spans:
+            children[item.parent_id].append(item)
+        ids = {item.span_id for item in spans}
+        lines = []
+
+        def walk(item: Span, depth: int) -> None:
+            lines.append(f"{'  ' * depth}{item.name} {item.duration_ms:.2f} ms")
+            for child in sorted(children[item.span_id], key=lambda entry: entry.start_ns):
+                walk(child, depth + 1)
+
+        for root in (item for item in spans if item.parent_id not in ids):
+            walk(root, 0)
+        (self.stream or sys.stderr).write("\n".join(lines) + "\n")
+
+
+class FileExporter:
+    """
+    Appends one OTLP/JSON line per trace.
+    export() only queues the spans; a writer thread serializes and appends
+    them, so requests never wait for the disk.
+    """
+
+    def __init__(self, path: str = TRACING_FILE):
+        self.path = path
+        self._queue: queue.Queue[list[Span]] = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, spans: list[Span]) -> None:
+        self._queue.put(spans)
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write, name="trace-writer", daemon=True)
+                    self._writer.start()
+
+    def flush(self) -> None:
+        """Block until every queued trace is written"""
+        self._queue.join()
+
+    def _write(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                with open(self.path, "a", encoding="utf-8") as file:
+                    for spans in batch:
+                        file.write(json.dumps(to_otlp(spans), separators=(",", ":")) + "\n")
+            except OSError as error:
+                logger.warning("Writing traces to %s failed: %s", self.path, error)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+class MemoryExporter:
+    """Keeps traces in memory (tests)"""
+
+    def __init__(self):
+        self.traces: list[list[Span]] = []
+
+    def export(self, spans: list[Span]) -> None:
+        self.traces.append(spans)
+
+
+def build_exporter(kind: str = TRACING):
+    if kind == "console":
+        return ConsoleExporter()
+    if kind == "file":
+        return FileExporter()
+    return None
+
+
+class Tracer:
+    """Holds the configured exporter; tracing is off without one"""
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def flush(self) -> None:
+        """Wait for exporters that write in the background"""
+        flush = getattr(self.exporter, "flush", None)
+        if flush:
+            flush()
+
+
+tracer = Tracer(build_exporter())
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening the root span of each request.
+    Continues a W3C traceparent from the caller and records the time spent
+    sending the response as its own span.
+    """
+
+    def __init__(self, app: ASGIApp, tracer: Tracer = tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        trace_id, parent_id = new_id(16), None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                match = TRACEPARENT.match(value.decode("latin-1"))
+                if match:
+                    trace_id, parent_id = match.groups()
+
+        root = Span(
+            name=f"{scope['method']} {scope['path']}",
+            trace_id=trace_id,
+            span_id=new_id(8),
+            parent_id=parent_id,
+            kind=SPAN_KIND_SERVER,
+            start_ns=time.time_ns(),
+            attributes={"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        root_token = _root_span.set(root)
+        current_token = _current_span.set(root)
+        sending: Optional[Span] = None
+
+        async def send_traced(message: Message) -> None:
+            nonlocal sending
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                root.error = message["status"] >= 500
+                sending = start_span("http.send", root, SPAN_KIND_INTERNAL, {})
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False) and sending:
+                end_span(sending)
+
+        try:
+            await self.app(scope, receive, send_traced)
+        except BaseException:
+            root.error = True
+            raise
+        finally:
+            route = scope.get("route")
+            if route is not None and hasattr(route, "path"):
+                root.name = f"{scope['method']} {route.path}"
+                root.attributes["http.route"] = route.path
+            _current_span.reset(current_token)
+            end_span(root)
+            _root_span.reset(root_token)
+            self.tracer.exporter.export(root.finished)
+
+
+# SQL statements become client spans of whatever span is current
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement_span(conn, cursor, statement, parameters, context, executemany):
+    parent = _current_span.get()
+    if parent is not None and context is not None:
+        context._trace_span = start_span("db.query", parent, SPAN_KIND_CLIENT, {"db.statement": statement[:200]})
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_statement_span(conn, cursor, statement, parameters, context, executemany):
+    statement_span = getattr(context, "_trace_span", None)
+    if statement_span is not None:
+        context._trace_span = None
+        end_span(statement_span)
+
+
+def summarize(path: str) -> dict[str, dict[str, float]]:
+    """Mean milliseconds per endpoint and span name from an OTLP/JSON trace file"""
+    totals: dict[str, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    requests: dict[str, int] = defaultdict(int)
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            spans = json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+            root = next(item for item in spans if item["kind"] == SPAN_KIND_SERVER)
+            requests[root["name"]] += 1
+            for item in spans:
+                duration = (int(item["endTimeUnixNano"]) - int(item["startTimeUnixNano"])) / 1_000_000
+                totals[root["name"]][item["name"]] += duration
+    return {
+        endpoint: {name: round(total / requests[endpoint], 3) for name, total in names.items()}
+        for endpoint, names in totals.items()
+    }
+
+
+if __name__ == "__main__":
+    for endpoint, names in summarize(sys.argv[1] if len(sys.argv) > 1 else TRACING_FILE).items():
+        print(endpoint)
+        for name, mean in sorted(names.items(), key=lambda item: item[1], reverse=True):
+            print(f"  {name:<28} {mean:8.3f} ms")
@@ -0,0 +1,56 @@
+import { bench, describe } from 'vitest'
+import { mount, type VueWrapper } from '@vue/test-utils'
+import YearOverview from '../../components/YearOverview.vue'
+import { bookings } from '../../composables/useApi'
+import type { Booking } from '../../types'
+
+// Rendering the year view should cost the same per day however long the
+// booking history is: compare re-renders with 1 and 20 years of bookings.
+// Run with `npm run bench`.
+
+const DAY_MS = 24 * 60 * 60 * 1000
+const thisYear = new Date().getFullYear()
+
+// A 5-day booking every week from `years` ago until the end of next year
+function history(years: number): Booking[] {
+  const list: Booking[] = []
+  const end = Date.UTC(thisYear + 1, 11, 31)
+  for (let start = Date.UTC(thisYear - years + 1, 0, 1), id = 1; start + 4 * DAY_MS <= end; start += 7 * DAY_MS, id++) {
+    list.push({
+      id,
+      party_id: (id % 4) + 1,
+      party_name: `Familie ${(id % 4) + 1}`,
+      party_color: '#E63946',
+      start_date: new Date(start).toISOString().slice(0, 10),
+      end_date: new Date(start + 4 * DAY_MS).toISOString().slice(0, 10),
+      note: null,
+      seq: id,
+      version: 1
+    })
+  }
+  return list
+}
+
+for (const years of [1, 20]) {
+  describe(`YearOverview, ${years} Jahr(e) Buchungen`, () => {
+    const data = history(years)
+    let wrapper: VueWrapper | null = null
+    let forward = true
+
+    // Same data in every iteration: the index is built once, then only the
+    // twelve months are re-rendered (alternating between this and next year)
+    bench('Jahr wechseln', async () => {
+      bookings.value = data
+      if (!wrapper) {
+        wrapper = mount(YearOverview)
+      }
+      await wrapper.find(forward ? '[aria-label="Nächstes Jahr"]' : '[aria-label="Vorheriges Jahr"]').trigger('click')
+      forward = !forward
+    }, {
+      teardown() {
+        wrapper?.unmount()
+        wrapper = null
+      }
+    })
+  })
+}
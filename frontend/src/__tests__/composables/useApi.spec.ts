@@ -0,0 +1,126 @@
+import { describe, it, expect, beforeEach, vi } from 'vitest'
+import type { CachedData } from '../../composables/useOfflineCache'
+import type { Booking, ColumnarBookings } from '../../types'
+
+const stored: { data: CachedData | null } = { data: null }
+
+// Mock the IndexedDB cache
+vi.mock('../../composables/useOfflineCache', () => ({
+  useOfflineCache: () => ({
+    readCache: async () => stored.data,
+    writeCache: async (data: CachedData) => { stored.data = structuredClone(data) },
+    clearCache: async () => { stored.data = null }
+  })
+}))
+
+// Mock fetch
+const mockFetch = vi.fn()
+globalThis.fetch = mockFetch
+
+import { decodeColumnarBookings, useApi } from '../../composables/useApi'
+
+const cachedBooking: Booking = {
+  id: 1, party_id: 1, party_name: 'Familie A', party_color: '#ff0000',
+  start_date: '2026-07-01', end_date: '2026-07-05', note: null, seq: 3, version: 1, series_id: null
+}
+
+describe('useApi', () => {
+  describe('decodeColumnarBookings', () => {
+    it('should expand columns into bookings', () => {
+      const payload: ColumnarBookings = {
+        format: 'columnar',
+        epoch: '2026-12-30',
+        parties: [
+          { id: 1, name: 'Familie A', color: '#ff0000' },
+          { id: 2, name: 'Familie B', color: '#00ff00' }
+        ],
+        id: [7, -100001],
+        party: [1, 0],
+        start: [0, 5],
+        end: [3, 5],
+        note: ['Silvester', null],
+        seq: [4, 5],
+        version: [1, 2],
+        series: [null, 1]
+      }
+
+      expect(decodeColumnarBookings(payload)).toEqual([
+        {
+          id: 7, party_id: 2, party_name: 'Familie B', party_color: '#00ff00',
+          start_date: '2026-12-30', end_date: '2027-01-02', note: 'Silvester', seq: 4, version: 1, series_id: null
+        },
+        {
+          id: -100001, party_id: 1, party_name: 'Familie A', party_color: '#ff0000',
+          start_date: '2027-01-04', end_date: '2027-01-04', note: null, seq: 5, version: 2, series_id: 1
+        }
+      ])
+    })
+  })
+
+  describe('offline cache', () => {
+    beforeEach(() => {
+      mockFetch.mockReset()
+      useApi().clearData()
+      stored.data = {
+        parties: [{ id: 1, name: 'Familie A', color: '#ff0000' }],
+        bookings: [cachedBooking],
+        seq: 3,
+        etag: '"snapshot-3"'
+      }
+    })
+
+    it('should show cached data and keep it when the server answers 304', async () => {
+      const { bookings, parties, restoreFromCache, loadBookings } = useApi()
+
+      expect(await restoreFromCache()).toBe(true)
+      expect(parties.value.map(p => p.name)).toEqual(['Familie A'])
+      expect(bookings.value).toEqual([cachedBooking])
+
+      mockFetch.mockResolvedValueOnce({ ok: false, status: 304 })
+      await loadBookings()
+
+      const [url, init] = mockFetch.mock.calls[0]
+      expect(url).toBe('/api/bookings?format=columnar')
+      expect(init.headers['If-None-Match']).toBe('"snapshot-3"')
+      expect(bookings.value).toEqual([cachedBooking])
+    })
+
+    it('should store changes synced from the server', async () => {
+      const { bookings, restoreFromCache, syncBookings } = useApi()
+      await restoreFromCache()
+      const added = { ...cachedBooking, id: 2, start_date: '2026-08-01', end_date: '2026-08-03', seq: 4 }
+
+      mockFetch.mockResolvedValueOnce({
+        ok: true,
+        json: () => Promise.resolve({ seq: 4, upserts: [added], deleted: [] })
+      })
+      await syncBookings()
+      await vi.waitFor(() => expect(stored.data?.seq).toBe(4))
+
+      expect(mockFetch.mock.calls[0][0]).toBe('/api/bookings/changes?since=3')
+      expect(bookings.value.map(b => b.id)).toEqual([1, 2])
+      expect(stored.data?.bookings.map(b => b.id)).toEqual([1, 2])
+    })
+
+    it('should load the month grid past the HTTP cache', async () => {
+      const { loadMonthGrid } = useApi()
+      mockFetch.mockResolvedValueOnce({ ok: true, json: () => Promise.resolve({ year: 2026, month: 7, days: [] }) })
+
+      await loadMonthGrid(2026, 7)
+
+      const [url, init] = mockFetch.mock.calls[0]
+      expect(url).toBe('/api/calendar/month/2026/7')
+      expect(init.cache).toBe('no-cache')
+    })
+
+    it('should forget cached data on clearData', async () => {
+      const { bookings, restoreFromCache, clearData } = useApi()
+      await restoreFromCache()
+
+      clearData()
+
+      expect(bookings.value).toEqual([])
+      expect(await restoreFromCache()).toBe(false)
+    })
+  })
+})
@@ -119,6 +119,37 @@ describe('useAuth', () => {
     })
   })
 
+  describe('restoreSession', () => {
+    it('should restore the user of the last visit and keep it while offline', async () => {
+      mockFetch.mockResolvedValueOnce({
+        ok: true,
+        json: () => Promise.resolve({
+          token: 'test-token',
+          user: { party_id: 1, is_admin: false, username: 'Test' },
+          message: 'Success'
+        })
+      })
+      const { login, restoreSession, verifySession, currentUser, isAuthenticated } = useAuth()
+      await login('Test', 'password')
+      currentUser.value = null
+
+      expect(restoreSession()).toBe(true)
+      expect(currentUser.value?.username).toBe('Test')
+
+      mockFetch.mockRejectedValueOnce(new TypeError('Failed to fetch'))
+      expect(await verifySession()).toBe(true)
+      expect(isAuthenticated.value).toBe(true)
+    })
+
+    it('should not restore without a session token', () => {
+      const { restoreSession, isAuthenticated } = useAuth()
+      localStorageMock.store['session_user'] = JSON.stringify({ party_id: 1, is_admin: false, username: 'Test' })
+
+      expect(restoreSession()).toBe(false)
+      expect(isAuthenticated.value).toBe(false)
+    })
+  })
+
   describe('getAuthHeaders', () => {
     it('should return empty object when not authenticated', () => {
       const { getAuthHeaders, logout } = useAuth()
@@ -0,0 +1,70 @@
+import { describe, it, expect, beforeEach, vi } from 'vitest'
+import { ref } from 'vue'
+import type { Booking } from '../../types'
+
+const bookings = ref<Booking[]>([])
+
+// Mock the useApi composable
+vi.mock('../../composables/useApi', () => ({
+  useApi: () => ({ bookings })
+}))
+
+import { buildDateIndex, useBookingIndex } from '../../composables/useBookingIndex'
+
+function booking(id: number, start_date: string, end_date: string): Booking {
+  return {
+    id,
+    party_id: 1,
+    party_name: 'Test Party',
+    party_color: '#ff0000',
+    start_date,
+    end_date,
+    note: null,
+    seq: id,
+    version: 1
+  }
+}
+
+describe('useBookingIndex', () => {
+  beforeEach(() => {
+    bookings.value = []
+  })
+
+  describe('buildDateIndex', () => {
+    it('should list a booking on each of its days', () => {
+      const index = buildDateIndex([booking(1, '2024-01-30', '2024-02-02')])
+
+      expect([...index.keys()]).toEqual(['2024-01-30', '2024-01-31', '2024-02-01', '2024-02-02'])
+    })
+
+    it('should not skip or repeat days around daylight saving changes', () => {
+      const index = buildDateIndex([booking(1, '2024-03-30', '2024-04-01'), booking(2, '2024-10-26', '2024-10-28')])
+
+      expect([...index.keys()]).toEqual([
+        '2024-03-30', '2024-03-31', '2024-04-01', '2024-10-26', '2024-10-27', '2024-10-28'
+      ])
+    })
+
+    it('should keep both bookings of a changeover day in order', () => {
+      const index = buildDateIndex([booking(1, '2024-01-10', '2024-01-12'), booking(2, '2024-01-12', '2024-01-14')])
+
+      expect(index.get('2024-01-12')?.map(b => b.id)).toEqual([1, 2])
+      expect(index.get('2024-01-11')?.map(b => b.id)).toEqual([1])
+      expect(index.has('2024-01-15')).toBe(false)
+    })
+  })
+
+  describe('bookingsOn', () => {
+    it('should share one index and follow changes of bookings', () => {
+      const first = useBookingIndex()
+      const second = useBookingIndex()
+      expect(first.bookingsByDate).toBe(second.bookingsByDate)
+      expect(first.bookingsOn('2024-01-10')).toEqual([])
+
+      bookings.value = [booking(1, '2024-01-10', '2024-01-11')]
+
+      expect(second.bookingsOn('2024-01-10').map(b => b.id)).toEqual([1])
+      expect(second.bookingsOn('2024-01-12')).toEqual([])
+    })
+  })
+})
@@ -1,14 +1,18 @@
 import { describe, it, expect, beforeEach, vi } from 'vitest'
 import { ref } from 'vue'
-import type { Booking } from '../../types'
+import type { Booking, MonthGrid, Party } from '../../types'
 
 // Create the bookings ref with explicit type
 const bookings = ref<Booking[]>([])
+const parties = ref<Party[]>([])
+const loadMonthGrid = vi.fn<(year: number, month: number) => Promise<MonthGrid | undefined>>()
 
 // Mock the useApi composable
 vi.mock('../../composables/useApi', () => ({
   useApi: () => ({
     bookings,
+    parties,
+    loadMonthGrid,
     loadParties: vi.fn(),
     loadBookings: vi.fn(),
     createBooking: vi.fn(),
@@ -22,6 +26,7 @@ import { useCalendar } from '../../composables/useCalendar'
 describe('useCalendar', () => {
   beforeEach(() => {
     bookings.value = []
+    loadMonthGrid.mockReset()
   })
 
   describe('weekdays', () => {
@@ -100,7 +105,9 @@ describe('useCalendar', () => {
         party_color: '#ff0000',
         start_date: '2024-01-10',
         end_date: '2024-01-12',
-        note: null
+        note: null,
+        seq: 1,
+        version: 1
       }]
 
       const jan10 = calendarDays.value.find(d => d.date === '2024-01-10')
@@ -126,7 +133,9 @@ describe('useCalendar', () => {
         party_color: '#ff0000',
         start_date: '2024-01-15',
         end_date: '2024-01-15',
-        note: null
+        note: null,
+        seq: 1,
+        version: 1
       }]
 
       const jan15 = calendarDays.value.find(d => d.date === '2024-01-15')
@@ -135,6 +144,35 @@ describe('useCalendar', () => {
     })
   })
 
+  describe('server month grid', () => {
+    it('should show the grid from the API once loaded', async () => {
+      parties.value = [{ id: 2, name: 'Familie B', color: '#00ff00' }]
+      const days = Array.from({ length: 42 }, (_, i) => {
+        const date = new Date(Date.UTC(2024, 4, 27 + i)).toISOString().slice(0, 10)
+        return {
+          date,
+          day: Number(date.slice(8)),
+          in_month: date.startsWith('2024-06'),
+          bookings: date === '2024-06-10'
+            ? [{ id: 5, party_id: 2, position: 'single' as const }]
+            : []
+        }
+      })
+      loadMonthGrid.mockResolvedValue({ year: 2024, month: 6, start: days[0].date, end: days[41].date, days })
+
+      const { currentDate } = useCalendar()
+      currentDate.value = new Date(2024, 5, 1)
+      const { calendarDays } = useCalendar()
+      await new Promise(resolve => setTimeout(resolve))
+
+      expect(loadMonthGrid).toHaveBeenCalledWith(2024, 6)
+      const day = calendarDays.value.find(d => d.date === '2024-06-10')
+      expect(day?.bookings).toEqual([
+        { id: 5, color: '#00ff00', partyName: 'Familie B', position: 'single' }
+      ])
+    })
+  })
+
   describe('navigation', () => {
     it('should go to previous month', () => {
       const { currentDate, previousMonth, monthYearDisplay } = useCalendar()
@@ -1,6 +1,7 @@
-import { ref, type Ref } from 'vue'
+import { ref, toRaw, type Ref } from 'vue'
 import { useAuth } from './useAuth'
-import type { Party, Booking, BookingCreate } from '../types'
+import { useOfflineCache } from './useOfflineCache'
+import type { Party, Booking, BookingChanges, BookingCreate, ColumnarBookings, ImportReport, MonthGrid } from '../types'
 
 const API_BASE = '/api'
 
@@ -8,13 +9,109 @@ const API_BASE = '/api'
 export const parties: Ref<Party[]> = ref([])
 export const bookings: Ref<Booking[]> = ref([])
 
+// Highest change sequence applied to `bookings`
+let lastSeq = 0
+
+// ETag of the bookings snapshot last loaded, for conditional reloads
+let bookingsEtag: string | null = null
+
+function maxSeq(list: Booking[]): number {
+  return list.reduce((max, b) => Math.max(max, b.seq), 0)
+}
+
+const DAY_MS = 24 * 60 * 60 * 1000
+
+function newIdempotencyKey(): string {
+  // randomUUID needs a secure context (HTTPS or localhost)
+  return crypto.randomUUID?.() ?? `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`
+}
+
+// Send a booking write with an Idempotency-Key. A request lost on a flaky
+// connection is retried once with the same key, so it is never applied twice.
+async function sendWrite(
+  url: string,
+  init: RequestInit & { headers: Record<string, string> }
+): Promise<Response> {
+  const request = {
+    ...init,
+    headers: { ...init.headers, 'Idempotency-Key': newIdempotencyKey() }
+  }
+  try {
+    return await fetch(url, request)
+  } catch {
+    return fetch(url, request)
+  }
+}
+
+// Expand a columnar payload back into Booking objects
+export function decodeColumnarBookings(payload: ColumnarBookings): Booking[] {
+  const epoch = Date.parse(`${payload.epoch}T00:00:00Z`)
+  const toDate = (offset: number) => new Date(epoch + offset * DAY_MS).toISOString().slice(0, 10)
+
+  return payload.id.map((id, row) => {
+    const party = payload.parties[payload.party[row]]
+    return {
+      id,
+      party_id: party.id,
+      party_name: party.name,
+      party_color: party.color,
+      start_date: toDate(payload.start[row]),
+      end_date: toDate(payload.end[row]),
+      note: payload.note[row],
+      seq: payload.seq[row],
+      version: payload.version[row],
+      series_id: payload.series[row]
+    }
+  })
+}
+
 export function useApi() {
   const { getAuthHeaders } = useAuth()
+  const { readCache, writeCache, clearCache } = useOfflineCache()
+
+  // Keep the current state for the next visit; a failed write only costs the head start
+  function saveToCache(): void {
+    writeCache({
+      parties: toRaw(parties.value).map(party => toRaw(party)),
+      bookings: toRaw(bookings.value).map(booking => toRaw(booking)),
+      seq: lastSeq,
+      etag: bookingsEtag
+    }).catch(error => console.error('Error caching bookings:', error))
+  }
+
+  // Show the data of the last visit; returns false if there is none
+  async function restoreFromCache(): Promise<boolean> {
+    try {
+      const cached = await readCache()
+      if (!cached) {
+        return false
+      }
+      parties.value = cached.parties
+      bookings.value = cached.bookings
+      lastSeq = cached.seq
+      bookingsEtag = cached.etag
+      return true
+    } catch (error) {
+      console.error('Error reading cached bookings:', error)
+      return false
+    }
+  }
+
+  // Forget everything loaded for this session (logout)
+  function clearData(): void {
+    parties.value = []
+    bookings.value = []
+    lastSeq = 0
+    bookingsEtag = null
+    clearCache().catch(error => console.error('Error clearing cached bookings:', error))
+  }
 
   async function loadParties(): Promise<void> {
     try {
+      // no-cache: revalidated with the server, never a copy from the browser's HTTP cache
       const response = await fetch(`${API_BASE}/parties`, {
-        headers: getAuthHeaders()
+        headers: getAuthHeaders(),
+        cache: 'no-cache'
       })
 
       if (!response.ok) {
@@ -22,6 +119,7 @@ export function useApi() {
       }
 
       parties.value = await response.json()
+      saveToCache()
     } catch (error) {
       console.error('Error loading parties:', error)
       throw error
@@ -30,23 +128,85 @@ export function useApi() {
 
   async function loadBookings(): Promise<void> {
     try {
-      const response = await fetch(`${API_BASE}/bookings`, {
-        headers: getAuthHeaders()
+      const headers = getAuthHeaders()
+      if (bookingsEtag) {
+        headers['If-None-Match'] = bookingsEtag
+      }
+      const response = await fetch(`${API_BASE}/bookings?format=columnar`, {
+        headers,
+        cache: 'no-cache'
       })
 
+      if (response.status === 304) {
+        return // the bookings we have are current
+      }
       if (!response.ok) {
         throw new Error(`HTTP ${response.status}`)
       }
 
-      bookings.value = await response.json()
+      bookings.value = decodeColumnarBookings(await response.json())
+      lastSeq = maxSeq(bookings.value)
+      bookingsEtag = response.headers.get('ETag')
+      saveToCache()
     } catch (error) {
       console.error('Error loading bookings:', error)
       throw error
     }
   }
 
+  async function syncBookings(): Promise<void> {
+    try {
+      const response = await fetch(`${API_BASE}/bookings/changes?since=${lastSeq}`, {
+        headers: getAuthHeaders(),
+        cache: 'no-cache'
+      })
+
+      if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`)
+      }
+
+      const changes: BookingChanges = await response.json()
+      if (changes.upserts.length === 0 && changes.deleted.length === 0) {
+        lastSeq = Math.max(lastSeq, changes.seq)
+        return
+      }
+
+      const byId = new Map(bookings.value.map(b => [b.id, b]))
+      for (const id of changes.deleted) {
+        byId.delete(id)
+      }
+      for (const booking of changes.upserts) {
+        byId.set(booking.id, booking)
+      }
+
+      bookings.value = [...byId.values()].sort((a, b) =>
+        a.start_date.localeCompare(b.start_date)
+      )
+      lastSeq = Math.max(lastSeq, changes.seq)
+      saveToCache()
+    } catch (error) {
+      console.error('Error syncing bookings:', error)
+      throw error
+    }
+  }
+
+  // month is 1-based, as in the API. Reloaded after every write, so it must
+  // not be answered from the browser's HTTP cache either
+  async function loadMonthGrid(year: number, month: number): Promise<MonthGrid> {
+    const response = await fetch(`${API_BASE}/calendar/month/${year}/${month}`, {
+      headers: getAuthHeaders(),
+      cache: 'no-cache'
+    })
+
+    if (!response.ok) {
+      throw new Error(`HTTP ${response.status}`)
+    }
+
+    return response.json()
+  }
+
   async function createBooking(booking: BookingCreate): Promise<Booking> {
-    const response = await fetch(`${API_BASE}/bookings`, {
+    const response = await sendWrite(`${API_BASE}/bookings`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
@@ -60,12 +220,13 @@ export function useApi() {
       throw new Error(error.detail || 'Fehler beim Speichern')
     }
 
-    await loadBookings()
-    return response.json()
+    const result = await response.json()
+    await syncBookings()
+    return result
   }
 
   async function updateBooking(id: number, booking: BookingCreate): Promise<Booking> {
-    const response = await fetch(`${API_BASE}/bookings/${id}`, {
+    const response = await sendWrite(`${API_BASE}/bookings/${id}`, {
       method: 'PUT',
       headers: {
         'Content-Type': 'application/json',
@@ -76,16 +237,20 @@ export function useApi() {
 
     if (!response.ok) {
       const error = await response.json()
+      if (response.status === 409 || response.status === 412) {
+        // Someone else changed the booking meanwhile - show the current state
+        await syncBookings().catch(() => undefined)
+      }
       throw new Error(error.detail || 'Fehler beim Aktualisieren')
     }
 
     const result = await response.json()
-    await loadBookings()
+    await syncBookings()
     return result
   }
 
   async function deleteBooking(id: number): Promise<void> {
-    const response = await fetch(`${API_BASE}/bookings/${id}`, {
+    const response = await sendWrite(`${API_BASE}/bookings/${id}`, {
       method: 'DELETE',
       headers: getAuthHeaders()
     })
@@ -95,7 +260,31 @@ export function useApi() {
       throw new Error(error.detail || 'Fehler beim Löschen')
     }
 
-    await loadBookings()
+    await syncBookings()
+  }
+
+  // Import an iCalendar (.ics) or CSV file; partyId is used for rows without a party
+  async function importBookings(file: File, partyId?: number): Promise<ImportReport> {
+    const form = new FormData()
+    form.append('file', file)
+    if (partyId !== undefined) {
+      form.append('party_id', String(partyId))
+    }
+
+    const response = await fetch(`${API_BASE}/import`, {
+      method: 'POST',
+      headers: getAuthHeaders(),
+      body: form
+    })
+
+    if (!response.ok) {
+      const error = await response.json()
+      throw new Error(error.detail || 'Fehler beim Import')
+    }
+
+    const report = await response.json()
+    await syncBookings()
+    return report
   }
 
   return {
@@ -103,8 +292,13 @@ export function useApi() {
     bookings,
     loadParties,
     loadBookings,
+    syncBookings,
+    restoreFromCache,
+    clearData,
+    loadMonthGrid,
     createBooking,
     updateBooking,
-    deleteBooking
+    deleteBooking,
+    importBookings
   }
 }
@@ -30,14 +30,46 @@ export function useAuth() {
     sessionToken.value = data.token
     currentUser.value = data.user
     localStorage.setItem('session_token', data.token)
+    localStorage.setItem('session_user', JSON.stringify(data.user))
 
     return data
   }
 
-  function logout(): void {
+  function clearSession(): void {
     sessionToken.value = null
     currentUser.value = null
     localStorage.removeItem('session_token')
+    localStorage.removeItem('session_user')
+  }
+
+  // Take the user of the last visit without asking the server, so the app can
+  // render at once; verifySession() confirms the session afterwards
+  function restoreSession(): boolean {
+    const stored = localStorage.getItem('session_user')
+    if (!sessionToken.value || !stored) {
+      return false
+    }
+    try {
+      currentUser.value = JSON.parse(stored)
+      return true
+    } catch {
+      return false
+    }
+  }
+
+  function logout(): void {
+    const token = sessionToken.value
+    clearSession()
+
+    // Revoke the token server-side; local logout does not wait for it
+    if (token) {
+      Promise.resolve(
+        fetch(`${API_BASE}/auth/logout`, {
+          method: 'POST',
+          headers: { 'Authorization': `Bearer ${token}` }
+        })
+      ).catch(() => undefined)
+    }
   }
 
   async function verifySession(): Promise<boolean> {
@@ -54,14 +86,19 @@ export function useAuth() {
 
       if (response.ok) {
         currentUser.value = await response.json()
+        localStorage.setItem('session_user', JSON.stringify(currentUser.value))
         return true
       }
     } catch (error) {
       console.error('Session verification failed:', error)
+      // Offline: keep a restored session, the next request that reaches the server checks it
+      if (currentUser.value) {
+        return true
+      }
     }
 
     // Invalid session - clear it
-    logout()
+    clearSession()
     return false
   }
 
@@ -90,6 +127,7 @@ export function useAuth() {
     // Methods
     login,
     logout,
+    restoreSession,
     verifySession,
     getAuthHeaders,
     canModifyBooking
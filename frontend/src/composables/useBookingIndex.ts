@@ -0,0 +1,45 @@
+import { computed, type ComputedRef } from 'vue'
+import { useApi } from './useApi'
+import type { Booking } from '../types'
+
+const DAY_MS = 24 * 60 * 60 * 1000
+
+// Date (YYYY-MM-DD) -> bookings covering that day, in the order of the input
+// (bookings are kept sorted by start date). Each booking's days are walked
+// once, so building costs the number of booked days and a lookup is O(1).
+export function buildDateIndex(list: readonly Booking[]): Map<string, Booking[]> {
+  const index = new Map<string, Booking[]>()
+  for (const booking of list) {
+    const end = Date.parse(`${booking.end_date}T00:00:00Z`)
+    for (let day = Date.parse(`${booking.start_date}T00:00:00Z`); day <= end; day += DAY_MS) {
+      const date = new Date(day).toISOString().slice(0, 10)
+      const covering = index.get(date)
+      if (covering) {
+        covering.push(booking)
+      } else {
+        index.set(date, [booking])
+      }
+    }
+  }
+  return index
+}
+
+// Shared by all components: rebuilt once per change of `bookings`, not per rendered day
+let bookingsByDate: ComputedRef<Map<string, Booking[]>> | null = null
+
+export function useBookingIndex() {
+  if (!bookingsByDate) {
+    const { bookings } = useApi()
+    bookingsByDate = computed(() => buildDateIndex(bookings.value))
+  }
+  const index = bookingsByDate
+
+  function bookingsOn(date: string): Booking[] {
+    return index.value.get(date) ?? []
+  }
+
+  return {
+    bookingsByDate: index,
+    bookingsOn
+  }
+}
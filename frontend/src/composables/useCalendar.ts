@@ -1,6 +1,7 @@
-import { ref, computed, type Ref, type ComputedRef } from 'vue'
+import { ref, computed, watch, type Ref, type ComputedRef } from 'vue'
 import { useApi } from './useApi'
-import type { CalendarDay, DayBooking, BookingPosition } from '../types'
+import { useBookingIndex } from './useBookingIndex'
+import type { CalendarDay, DayBooking, BookingPosition, MonthGrid } from '../types'
 
 const currentDate: Ref<Date> = ref(new Date())
 
@@ -12,7 +13,30 @@ const monthNames: readonly string[] = [
 ]
 
 export function useCalendar() {
-  const { bookings } = useApi()
+  const { bookings, parties, loadMonthGrid } = useApi()
+  const { bookingsOn } = useBookingIndex()
+
+  // Server-computed grid of the shown month; null while loading or stale
+  const monthGrid: Ref<MonthGrid | null> = ref(null)
+  let gridRequest = 0
+
+  watch(
+    [() => currentDate.value.getFullYear(), () => currentDate.value.getMonth(), bookings],
+    async ([year, month]) => {
+      monthGrid.value = null
+      const request = ++gridRequest
+      try {
+        const grid = await loadMonthGrid(year, month + 1)
+        if (grid && request === gridRequest) {
+          monthGrid.value = grid
+        }
+      } catch {
+        // Keep computing the grid locally
+      }
+    },
+    { immediate: true }
+  )
+
   const monthYearDisplay: ComputedRef<string> = computed(() => {
     const month = monthNames[currentDate.value.getMonth()]
     const year = currentDate.value.getFullYear()
@@ -20,6 +44,10 @@ export function useCalendar() {
   })
 
   const calendarDays: ComputedRef<CalendarDay[]> = computed(() => {
+    if (monthGrid.value) {
+      return fromMonthGrid(monthGrid.value)
+    }
+
     const year = currentDate.value.getFullYear()
     const month = currentDate.value.getMonth()
 
@@ -55,6 +83,24 @@ export function useCalendar() {
     return days
   })
 
+  function fromMonthGrid(grid: MonthGrid): CalendarDay[] {
+    const todayStr = formatDateISO(new Date())
+    const partyById = new Map(parties.value.map(p => [p.id, p]))
+
+    return grid.days.map(day => ({
+      date: day.date,
+      dayNumber: day.day,
+      isCurrentMonth: day.in_month,
+      isToday: day.date === todayStr,
+      bookings: day.bookings.map(b => ({
+        id: b.id,
+        color: partyById.get(b.party_id)?.color ?? '#888888',
+        partyName: partyById.get(b.party_id)?.name ?? 'Unbekannt',
+        position: b.position
+      }))
+    }))
+  }
+
   function createDayObject(date: Date, isCurrentMonth: boolean, today: Date): CalendarDay {
     const dateStr = formatDateISO(date)
     const dayBookings = getBookingsForDate(dateStr)
@@ -69,8 +115,7 @@ export function useCalendar() {
   }
 
   function getBookingsForDate(dateStr: string): DayBooking[] {
-    return bookings.value
-      .filter(b => dateStr >= b.start_date && dateStr <= b.end_date)
+    return bookingsOn(dateStr)
       .map(b => {
         let position: BookingPosition = 'middle'
         if (b.start_date === dateStr && b.end_date === dateStr) {
@@ -0,0 +1,73 @@
+import type { Party, Booking } from '../types'
+
+const DB_NAME = 'ferienhaus-kalender'
+const STORE = 'cache'
+const KEY = 'bookings'
+
+// Runtime cache of the service worker (src/sw.js) for API reads
+const API_CACHE = 'ferienhaus-api'
+
+// Last bookings snapshot: shown at once on the next visit, then revalidated
+export interface CachedData {
+  parties: Party[]
+  bookings: Booking[]
+  seq: number
+  etag: string | null
+}
+
+let database: Promise<IDBDatabase | null> | null = null
+
+// Without IndexedDB (private mode, tests) the app simply runs uncached
+function openDatabase(): Promise<IDBDatabase | null> {
+  if (typeof indexedDB === 'undefined') {
+    return Promise.resolve(null)
+  }
+  return new Promise(resolve => {
+    const request = indexedDB.open(DB_NAME, 1)
+    request.onupgradeneeded = () => request.result.createObjectStore(STORE)
+    request.onsuccess = () => resolve(request.result)
+    request.onerror = () => resolve(null)
+  })
+}
+
+async function withStore<T>(
+  mode: IDBTransactionMode,
+  action: (store: IDBObjectStore) => IDBRequest<T>
+): Promise<T | undefined> {
+  database ??= openDatabase()
+  const db = await database
+  if (!db) {
+    return undefined
+  }
+  return new Promise((resolve, reject) => {
+    const transaction = db.transaction(STORE, mode)
+    const request = action(transaction.objectStore(STORE))
+    transaction.oncomplete = () => resolve(request.result)
+    transaction.onerror = () => reject(transaction.error)
+    transaction.onabort = () => reject(transaction.error)
+  })
+}
+
+export function useOfflineCache() {
+  async function readCache(): Promise<CachedData | null> {
+    return (await withStore<CachedData>('readonly', store => store.get(KEY))) ?? null
+  }
+
+  async function writeCache(data: CachedData): Promise<void> {
+    await withStore('readwrite', store => store.put(data, KEY))
+  }
+
+  // On logout: nothing of this session may be shown to the next user
+  async function clearCache(): Promise<void> {
+    await withStore('readwrite', store => store.delete(KEY))
+    if (typeof caches !== 'undefined') {
+      await caches.delete(API_CACHE)
+    }
+  }
+
+  return {
+    readCache,
+    writeCache,
+    clearCache
+  }
+}
@@ -3,3 +3,12 @@ import './style.css'
 import App from './App.vue'
 
 createApp(App).mount('#app')
+
+// Offline app shell and API cache; the worker only exists in builds (see vite.config.ts)
+if (import.meta.env.PROD && 'serviceWorker' in navigator) {
+  window.addEventListener('load', () => {
+    navigator.serviceWorker.register('/sw.js').catch(error => {
+      console.error('Service worker registration failed:', error)
+    })
+  })
+}
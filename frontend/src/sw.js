@@ -0,0 +1,82 @@
+// Service worker: the app shell works offline, API reads fall back to their last response.
+// Reads are never answered stale while online: the app already renders from its
+// IndexedDB copy (useOfflineCache.ts) and reloads the grid after every write.
+// Not loaded as a module - the serviceWorker plugin in vite.config.ts fills in
+// the files of the build and emits this file as /sw.js.
+
+const PRECACHE = __PRECACHE_MANIFEST__
+const SHELL_CACHE = 'ferienhaus-shell-__PRECACHE_VERSION__'
+const API_CACHE = 'ferienhaus-api' // cleared on logout, see useOfflineCache.ts
+
+self.addEventListener('install', event => {
+  event.waitUntil(
+    caches.open(SHELL_CACHE)
+      .then(cache => cache.addAll(PRECACHE))
+      .then(() => self.skipWaiting())
+  )
+})
+
+self.addEventListener('activate', event => {
+  // Drop the shells of previous builds
+  event.waitUntil(
+    caches.keys()
+      .then(names => Promise.all(
+        names
+          .filter(name => name.startsWith('ferienhaus-shell-') && name !== SHELL_CACHE)
+          .map(name => caches.delete(name))
+      ))
+      .then(() => self.clients.claim())
+  )
+})
+
+function isCacheable(response) {
+  return response.status === 200 && response.type === 'basic'
+}
+
+async function fromNetwork(request, cacheName) {
+  const response = await fetch(request)
+  if (isCacheable(response)) {
+    const cache = await caches.open(cacheName)
+    await cache.put(request, response.clone())
+  }
+  return response
+}
+
+// Current data from the network; the cached copy is the offline fallback
+async function networkFirst(request) {
+  try {
+    return await fromNetwork(request, API_CACHE)
+  } catch (error) {
+    const cached = await caches.match(request, { cacheName: API_CACHE })
+    if (cached) {
+      return cached
+    }
+    throw error
+  }
+}
+
+// Hashed build files never change; a new build comes with a new service worker
+async function fromShell(request) {
+  const cached = await caches.match(request, { cacheName: SHELL_CACHE })
+  return cached || fetch(request)
+}
+
+self.addEventListener('fetch', event => {
+  const { request } = event
+  const url = new URL(request.url)
+  if (request.method !== 'GET' || url.origin !== self.location.origin) {
+    return
+  }
+
+  if (url.pathname.startsWith('/api/')) {
+    if (url.pathname.startsWith('/api/auth/')) {
+      return
+    }
+    event.respondWith(networkFirst(request))
+    return
+  }
+
+  if (PRECACHE.includes(url.pathname)) {
+    event.respondWith(fromShell(request))
+  }
+})
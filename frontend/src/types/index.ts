@@ -32,6 +32,30 @@ export interface Booking {
   start_date: string
   end_date: string
   note: string | null
+  seq: number
+  version: number
+  series_id?: number | null  // set for occurrences of a recurring series (id < 0)
+}
+
+// Struct-of-arrays form of Booking[] (GET /api/bookings?format=columnar)
+export interface ColumnarBookings {
+  format: 'columnar'
+  epoch: string
+  parties: Party[]
+  id: number[]
+  party: number[]
+  start: number[]
+  end: number[]
+  note: (string | null)[]
+  seq: number[]
+  version: number[]
+  series: (number | null)[]
+}
+
+export interface BookingChanges {
+  seq: number
+  upserts: Booking[]
+  deleted: number[]
 }
 
 export interface BookingCreate {
@@ -39,6 +63,22 @@ export interface BookingCreate {
   start_date: string
   end_date: string
   note?: string | null
+  version?: number
+}
+
+// Result of POST /api/import, one entry per row of the file
+export interface ImportRow {
+  line: number
+  status: 'created' | 'conflict' | 'invalid'
+  id: number | null
+  detail: string | null
+}
+
+export interface ImportReport {
+  created: number
+  conflicts: number
+  invalid: number
+  rows: ImportRow[]
 }
 
 // API Response
@@ -72,3 +112,19 @@ export interface CalendarDay {
   isToday: boolean
   bookings: DayBooking[]
 }
+
+// Precomputed month view (GET /api/calendar/month/{year}/{month})
+export interface MonthGridDay {
+  date: string
+  day: number
+  in_month: boolean
+  bookings: { id: number; party_id: number; position: BookingPosition }[]
+}
+
+export interface MonthGrid {
+  year: number
+  month: number
+  start: string
+  end: string
+  days: MonthGridDay[]
+}
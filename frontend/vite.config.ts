@@ -1,9 +1,34 @@
-import { defineConfig } from 'vite'
+import { defineConfig, type Plugin } from 'vite'
 import vue from '@vitejs/plugin-vue'
 import tailwindcss from '@tailwindcss/vite'
+import { createHash } from 'node:crypto'
+import { readFileSync } from 'node:fs'
+
+// Emit src/sw.js as /sw.js with the files of this build to precache; the
+// cache name changes with the hashed file names, so every release is fetched once
+function serviceWorker(): Plugin {
+  return {
+    name: 'service-worker',
+    apply: 'build',
+    enforce: 'post',
+    generateBundle(_options, bundle) {
+      const files = [
+        '/',
+        ...Object.keys(bundle)
+          .filter(name => name !== 'index.html' && !name.endsWith('.map'))
+          .map(name => `/${name}`)
+      ]
+      const version = createHash('sha256').update(files.join('\n')).digest('hex').slice(0, 12)
+      const source = readFileSync(new URL('./src/sw.js', import.meta.url), 'utf-8')
+        .replace('__PRECACHE_MANIFEST__', JSON.stringify(files))
+        .replace('__PRECACHE_VERSION__', version)
+      this.emitFile({ type: 'asset', fileName: 'sw.js', source })
+    },
+  }
+}
 
 export default defineConfig({
-  plugins: [vue(), tailwindcss()],
+  plugins: [vue(), tailwindcss(), serviceWorker()],
   server: {
     port: 5173,
     proxy: {